@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class AdmissionController:
+    """
+    Caps the number of active transactions. Transactions over the cap wait in a FIFO
+    queue and are admitted as others end.
+
+    In adaptive mode the cap follows the abort rate of the last `window` finished
+    transactions: it is halved when the rate exceeds the target and raised by one,
+    up to max_active, while it stays below.
+    """
+    def __init__(self, max_active, adaptive=False, target_abort_rate=0.2, window=20, min_active=1):
+        if max_active < 1:
+            raise ValueError("The admission cap must be at least 1")
+        self.max_active = max_active
+        self.limit = max_active
+        self.min_active = min(min_active, max_active)
+        self.adaptive = adaptive
+        self.target_abort_rate = target_abort_rate
+        self.outcomes = deque(maxlen=window)
+        self.active = set()
+        self.queue = deque()
+        self.operations = defaultdict(int)
+        self.committed = 0
+        self.aborted = 0
+        self.committed_operations = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def admit(self, txn_name):
+        """Admits a transaction if a slot is free and nobody is queued, otherwise queues it. Returns whether it was admitted."""
+        with self.lock:
+            if len(self.active) < self.limit and not self.queue:
+                self.active.add(txn_name)
+                return True
+            self.queue.append(txn_name)
+            log.info(f"Admission: {txn_name} queued, {len(self.active)} active at cap {self.limit}")
+            return False
+
+    def record_operation(self, txn_name):
+        """Counts a read or write of an admitted transaction towards goodput"""
+        with self.lock:
+            self.operations[txn_name] += 1
+
+    def release(self, txn_name, committed):
+        """
+        Frees the slot of an ended transaction, adapts the cap and returns the names of
+        the queued transactions admitted in its place, in queue order.
+        """
+        with self.lock:
+            if txn_name not in self.active:
+                return []
+            self.active.discard(txn_name)
+            operations = self.operations.pop(txn_name, 0)
+            if committed:
+                self.committed += 1
+                self.committed_operations += operations
+            else:
+                self.aborted += 1
+            self.outcomes.append(committed)
+            if self.adaptive:
+                self.adapt()
+
+            admitted = []
+            while self.queue and len(self.active) < self.limit:
+                next_txn = self.queue.popleft()
+                self.active.add(next_txn)
+                admitted.append(next_txn)
+            return admitted
+
+    def adapt(self):
+        """Halves the cap when the abort rate over a full window exceeds the target, otherwise raises it by one"""
+        if len(self.outcomes) < self.outcomes.maxlen:
+            return
+        abort_rate = self.outcomes.count(False) / len(self.outcomes)
+        if abort_rate > self.target_abort_rate:
+            self.limit = max(self.min_active, self.limit // 2)
+        elif self.limit < self.max_active:
+            self.limit += 1
+        else:
+            return
+        log.info(f"Admission: abort rate {abort_rate:.2f}, cap set to {self.limit}")
+        self.outcomes.clear()
+
+    def goodput(self):
+        """Returns the committed operations per second since the controller was created"""
+        elapsed = time.monotonic() - self.started
+        return self.committed_operations / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self):
+        """Returns the admission state and goodput as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                "cap": self.limit,
+                "max_active": self.max_active,
+                "active": len(self.active),
+                "queued": len(self.queue),
+                "committed": self.committed,
+                "aborted": self.aborted,
+                "committed_operations": self.committed_operations,
+                "goodput_ops_per_second": self.goodput(),
+            }
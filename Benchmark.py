@@ -0,0 +1,279 @@
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from BulkLoader import BulkLoader
+from ConcurrencyControl import ConcurrencyControl
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class Benchmark:
+    """
+    Benchmark suite of the simulator. Every benchmark returns a list of result dicts
+    (name, parameters, seconds) that the command line prints as JSON lines.
+    """
+    def __init__(self, work_dir=None):
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="ssi-bench-")
+
+    def timed(self, name, function, **parameters):
+        """Runs function once and returns its result and a result dict with the elapsed seconds"""
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        return result, {"benchmark": name, **parameters, "seconds": round(elapsed, 4),
+                        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+    def startup(self, num_variables=1000000, num_sites=10, storage="columnar", placement="default", replication_factor=None):
+        """
+        Times writing and bulk loading a num_variables-row initial state in both file formats,
+        then building a Simulator over it.
+        """
+        from Simulator import Simulator
+        loader = BulkLoader()
+        var_ids = range(1, num_variables + 1)
+        values = range(7, 7 * num_variables + 1, 7)
+        binary_file = os.path.join(self.work_dir, f"state-{num_variables}.bin")
+        csv_file = os.path.join(self.work_dir, f"state-{num_variables}.csv")
+        results = []
+
+        _, result = self.timed("startup.write_binary", lambda: loader.write_binary(binary_file, var_ids, values), rows=num_variables)
+        results.append(result)
+        _, result = self.timed("startup.write_csv", lambda: loader.write_csv(csv_file, var_ids, values), rows=num_variables)
+        results.append(result)
+        _, result = self.timed("startup.load_csv", lambda: loader.load(csv_file), rows=num_variables)
+        results.append(result)
+        _, result = self.timed("startup.load_binary", lambda: loader.load(binary_file), rows=num_variables)
+        results.append(result)
+        simulator, result = self.timed("startup.simulator", lambda: Simulator(storage_backend=storage, num_sites=num_sites,
+                                                                               placement_policy=placement,
+                                                                               replication_factor=replication_factor,
+                                                                               initial_state_file=binary_file),
+                                       variables=num_variables, sites=num_sites, storage=storage, placement=placement)
+        result["copies"] = simulator.placement.snapshot()["copies"]
+        results.append(result)
+        return results
+
+    def topology(self, num_variables=1000000, num_sites=1000, storage="objects", placement="default", replication_factor=None):
+        """
+        Times importing the simulator in a fresh interpreter, building a Simulator over a large
+        topology with default initial values, and running the first transaction on it.
+        """
+        from Simulator import Simulator
+        results = []
+        code = "import time; start = time.perf_counter(); import Simulator; print(time.perf_counter() - start)"
+        #Imported from the work directory, so an app.log created by the import shows up there
+        environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=self.work_dir, env=environment)
+        results.append({"benchmark": "topology.import", "seconds": round(float(output.stdout), 4),
+                        "side_effects": output.stderr != "" or os.path.exists(os.path.join(self.work_dir, "app.log"))})
+        simulator, result = self.timed("topology.simulator", lambda: Simulator(storage_backend=storage, num_sites=num_sites,
+                                                                                num_variables=num_variables,
+                                                                                placement_policy=placement,
+                                                                                replication_factor=replication_factor),
+                                       variables=num_variables, sites=num_sites, storage=storage, placement=placement)
+        results.append(result)
+        first_transaction = ["begin(T1)", f"W(T1,x{num_variables},1)", "R(T1,x1)", "R(T1,x2)", "end(T1)"]
+        _, result = self.timed("topology.first_transaction",
+                               lambda: [simulator.process_instruction(line) for line in first_transaction])
+        result["materialized_sites"] = sum(1 for site in simulator.site_manager.getAllSites() if site.has_data_manager())
+        results.append(result)
+        return results
+
+    def read_scaling(self, max_threads=8, transactions=64, reads_per_transaction=200, num_variables=200,
+                     versions=10, storage="objects"):
+        """
+        Times a batch of snapshot reads of many read-only transactions over versions-long chains,
+        served by 1 to max_threads threads, and checks every thread count reads the same values.
+        """
+        from Simulator import Simulator
+        from Operation import Begin, Read, Write, End
+        gil_enabled = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+        results = []
+        baseline_seconds = baseline_values = None
+        for threads in range(1, max_threads + 1):
+            simulator = Simulator(storage_backend=storage, num_variables=num_variables, evict_finished=True,
+                                  read_threads=threads)
+            #Transaction ids come from the number in the name, so writers and readers share one range starting at 1
+            for version in range(versions):
+                writer = f"T{version + 1}"
+                simulator.execute_batch([Begin(writer)] + [Write(writer, var_idx, version) for var_idx in range(1, num_variables + 1)]
+                                        + [End(writer)])
+            readers = [f"T{versions + i + 1}" for i in range(transactions)]
+            simulator.execute_batch([Begin(reader, read_only=True) for reader in readers])
+            #Round after round of one read per transaction, so every run of reads spans all transactions
+            reads = [Read(reader, (i * 7919 + round_index) % num_variables + 1)
+                     for round_index in range(reads_per_transaction) for i, reader in enumerate(readers)]
+            batch_results, result = self.timed("read_scaling", lambda: simulator.execute_batch(reads), threads=threads,
+                                               transactions=transactions, reads=len(reads), storage=storage,
+                                               gil_enabled=gil_enabled)
+            values = [batch_result.value for batch_result in batch_results]
+            if threads == 1:
+                baseline_seconds, baseline_values = result["seconds"], values
+            result["reads_per_second"] = round(len(reads) / result["seconds"]) if result["seconds"] else None
+            result["speedup"] = round(baseline_seconds / result["seconds"], 2) if result["seconds"] else None
+            result["consistent"] = values == baseline_values
+            results.append(result)
+            if simulator.transaction_manager.read_executor is not None:
+                simulator.transaction_manager.read_executor.shutdown()
+        return results
+
+    def interleaved_workload(self, transactions, concurrent, operations, num_variables, write_ratio, seed):
+        """
+        Returns Begin/Read/Write/End operations of transactions T1..Tn with operations accesses each to
+        uniformly drawn variables, keeping concurrent of them open and interleaving them at random.
+        """
+        from Operation import Begin, Read, Write, End
+        generator = random.Random(seed)
+        workload, open_txns, started = [], {}, 0
+        while started < transactions or open_txns:
+            while started < transactions and len(open_txns) < concurrent:
+                started += 1
+                open_txns[f"T{started}"] = operations
+                workload.append(Begin(f"T{started}"))
+            txn_name = generator.choice(list(open_txns))
+            if open_txns[txn_name] == 0:
+                del open_txns[txn_name]
+                workload.append(End(txn_name))
+                continue
+            open_txns[txn_name] -= 1
+            var_idx = generator.randint(1, num_variables)
+            if generator.random() < write_ratio:
+                workload.append(Write(txn_name, var_idx, generator.randint(0, 999)))
+            else:
+                workload.append(Read(txn_name, var_idx))
+        return workload
+
+    def concurrency(self, protocols=ConcurrencyControl.PROTOCOLS, transactions=2000, concurrent=8, operations=6,
+                    num_variables=50, write_ratio=0.5, seed=1):
+        """
+        Runs the same interleaved workload under every concurrency control protocol and reports the throughput,
+        the abort rate by reason and the commit latency in logical ticks from begin to commit, which includes
+        the ticks spent blocked. Transactions beyond the retained summaries (10000) are not counted.
+        """
+        from Simulator import Simulator
+        workload = self.interleaved_workload(transactions, concurrent, operations, num_variables, write_ratio, seed)
+        results = []
+        for protocol in protocols:
+            simulator = Simulator(num_variables=num_variables, evict_finished=True, concurrency=protocol)
+            transaction_manager = simulator.transaction_manager
+            _, result = self.timed("concurrency", lambda: simulator.execute_batch(workload), protocol=protocol,
+                                   transactions=transactions, concurrent=concurrent, operations=operations,
+                                   variables=num_variables, write_ratio=write_ratio)
+            summaries = [transaction_manager.get_transaction_summary(f"T{i}") for i in range(1, transactions + 1)]
+            latencies = sorted(summary[3] - summary[2] for summary in summaries if summary and summary[1] == "COMMITTED")
+            reasons = Counter(summary[5] for summary in summaries if summary and summary[1] == "ABORTED")
+            result["committed"] = len(latencies)
+            result["commits_per_second"] = round(len(latencies) / result["seconds"]) if result["seconds"] else None
+            result["abort_rate"] = round(sum(reasons.values()) / transactions, 4)
+            result["abort_reasons"] = dict(reasons)
+            result["latency_ticks_mean"] = round(sum(latencies) / len(latencies), 2) if latencies else None
+            result["latency_ticks_p99"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None
+            result["unfinished"] = transactions - len(latencies) - sum(reasons.values())
+            results.append(result)
+        return results
+
+    def latency(self, protocols=ConcurrencyControl.PROTOCOLS, clients=(1, 4, 16), transactions=1000, operations=6,
+                num_variables=50, write_ratio=0.5, client_link="const:0.5", link="lognormal:2:0.3", service="exp:0.2",
+                latency_model_file=None, seed=1):
+        """
+        Runs the same transactions as closed-loop clients in virtual time under every protocol and client count,
+        and reports the commit latency and throughput the latency model gives, see DiscreteEventRunner.
+        The model is the given link and service distributions unless a latency model file is given.
+        """
+        from Simulator import Simulator
+        from DiscreteEventRunner import DiscreteEventRunner
+        from LatencyModel import LatencyModel
+        scripts = {}
+        for operation in self.interleaved_workload(transactions, 1, operations, num_variables, write_ratio, seed):
+            scripts.setdefault(operation.txn_name, []).append(operation)
+        results = []
+        for protocol in protocols:
+            for client_count in clients:
+                latency_model = LatencyModel.load(latency_model_file) if latency_model_file else \
+                    LatencyModel(client_link, link, service, seed=seed)
+                simulator = Simulator(num_variables=num_variables, evict_finished=True, concurrency=protocol)
+                runner = DiscreteEventRunner(simulator.transaction_manager, latency_model, client_count)
+                summary, result = self.timed("latency", lambda: runner.run(list(scripts.values())), protocol=protocol,
+                                             clients=client_count, transactions=transactions, operations=operations,
+                                             variables=num_variables, write_ratio=write_ratio)
+                utilization = summary.pop("site_utilization")
+                result.update(summary)
+                result["max_site_utilization"] = max(utilization.values(), default=0.0)
+                results.append(result)
+        return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the replicated concurrency control simulator")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    startup_parser = subparsers.add_parser("startup", help="bulk load an initial state and build a simulator over it")
+    startup_parser.add_argument("--variables", type=int, default=1000000)
+    startup_parser.add_argument("--sites", type=int, default=10)
+    startup_parser.add_argument("--storage", choices=["objects", "columnar"], default="columnar")
+    startup_parser.add_argument("--placement", default="default")
+    startup_parser.add_argument("--replication-factor", type=int)
+    topology_parser = subparsers.add_parser("topology", help="build a simulator over many sites and variables and run one transaction")
+    topology_parser.add_argument("--variables", type=int, default=1000000)
+    topology_parser.add_argument("--sites", type=int, default=1000)
+    topology_parser.add_argument("--storage", choices=["objects", "columnar"], default="objects")
+    topology_parser.add_argument("--placement", default="default")
+    topology_parser.add_argument("--replication-factor", type=int)
+    read_scaling_parser = subparsers.add_parser("read_scaling", help="serve a batch of snapshot reads on 1 to N threads")
+    read_scaling_parser.add_argument("--max-threads", type=int, default=8)
+    read_scaling_parser.add_argument("--transactions", type=int, default=64)
+    read_scaling_parser.add_argument("--reads", type=int, default=200, help="reads per transaction")
+    read_scaling_parser.add_argument("--variables", type=int, default=200)
+    read_scaling_parser.add_argument("--versions", type=int, default=10, help="committed versions per variable")
+    read_scaling_parser.add_argument("--storage", choices=["objects", "columnar"], default="objects")
+    concurrency_parser = subparsers.add_parser("concurrency", help="run one workload under every concurrency control protocol")
+    concurrency_parser.add_argument("--protocols", nargs="+", choices=ConcurrencyControl.PROTOCOLS, default=list(ConcurrencyControl.PROTOCOLS))
+    concurrency_parser.add_argument("--transactions", type=int, default=2000)
+    concurrency_parser.add_argument("--concurrent", type=int, default=8, help="transactions open at any time")
+    concurrency_parser.add_argument("--operations", type=int, default=6, help="reads and writes per transaction")
+    concurrency_parser.add_argument("--variables", type=int, default=50)
+    concurrency_parser.add_argument("--write-ratio", type=float, default=0.5)
+    concurrency_parser.add_argument("--seed", type=int, default=1)
+    latency_parser = subparsers.add_parser("latency", help="estimate commit latency and throughput in virtual time under a latency model")
+    latency_parser.add_argument("--protocols", nargs="+", choices=ConcurrencyControl.PROTOCOLS, default=list(ConcurrencyControl.PROTOCOLS))
+    latency_parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16], help="closed-loop client counts")
+    latency_parser.add_argument("--transactions", type=int, default=1000)
+    latency_parser.add_argument("--operations", type=int, default=6, help="reads and writes per transaction")
+    latency_parser.add_argument("--variables", type=int, default=50)
+    latency_parser.add_argument("--write-ratio", type=float, default=0.5)
+    latency_parser.add_argument("--client-link", default="const:0.5", help="one-way client to transaction manager delay (ms)")
+    latency_parser.add_argument("--link", default="lognormal:2:0.3", help="one-way transaction manager to site delay (ms)")
+    latency_parser.add_argument("--service", default="exp:0.2", help="time a site serves one request (ms)")
+    latency_parser.add_argument("--latency-model", help="JSON latency model with per-site links and services, replacing the three above")
+    latency_parser.add_argument("--seed", type=int, default=1)
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    benchmark = Benchmark()
+    if arguments.benchmark == "startup":
+        results = benchmark.startup(arguments.variables, arguments.sites, arguments.storage,
+                                    arguments.placement, arguments.replication_factor)
+    elif arguments.benchmark == "topology":
+        results = benchmark.topology(arguments.variables, arguments.sites, arguments.storage,
+                                     arguments.placement, arguments.replication_factor)
+    elif arguments.benchmark == "read_scaling":
+        results = benchmark.read_scaling(arguments.max_threads, arguments.transactions, arguments.reads,
+                                         arguments.variables, arguments.versions, arguments.storage)
+    elif arguments.benchmark == "concurrency":
+        results = benchmark.concurrency(arguments.protocols, arguments.transactions, arguments.concurrent, arguments.operations,
+                                        arguments.variables, arguments.write_ratio, arguments.seed)
+    elif arguments.benchmark == "latency":
+        results = benchmark.latency(arguments.protocols, arguments.clients, arguments.transactions, arguments.operations,
+                                    arguments.variables, arguments.write_ratio, arguments.client_link, arguments.link,
+                                    arguments.service, arguments.latency_model, arguments.seed)
+    for result in results:
+        print(json.dumps(result))
@@ -0,0 +1,103 @@
+import logging
+import sys
+from array import array
+from InitialState import InitialState
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class BulkLoader:
+    """
+    Streams (variable, value) rows from a file into an InitialState.
+    Two formats are read:
+    - CSV: one "x<i>,<value>" or "<i>,<value>" row per line, with an optional header
+    - binary: the 8-byte MAGIC followed by little-endian int64 (variable id, value) pairs
+    Files are read in chunks of chunk_rows rows, so memory stays bounded by the state itself.
+    """
+    MAGIC = b"SSIDB\x00\x00\x01"
+
+    def __init__(self, chunk_rows=65536):
+        self.chunk_rows = chunk_rows
+
+    def load(self, path, state=None):
+        """Loads a CSV or binary file, telling them apart by the magic bytes. Returns the state."""
+        with open(path, "rb") as file:
+            is_binary = file.read(len(self.MAGIC)) == self.MAGIC
+        return self.load_binary(path, state) if is_binary else self.load_csv(path, state)
+
+    def load_csv(self, path, state=None):
+        """Loads "x<i>,<value>" rows into the state"""
+        state = state if state is not None else InitialState(0)
+        rows = 0
+        var_ids, values = array('q'), array('q')
+        with open(path, "r") as file:
+            for line_number, line in enumerate(file, 1):
+                variable, _, value = line.partition(",")
+                variable = variable.strip().lstrip("x")
+                try:
+                    var_idx, value = int(variable), int(value)
+                except ValueError:
+                    if line_number == 1 or not line.strip() or line.startswith("#"):
+                        continue  #Header row, blank line or comment
+                    raise ValueError(f"{path}:{line_number}: expected '<variable>,<value>'")
+                var_ids.append(var_idx)
+                values.append(value)
+                if len(var_ids) == self.chunk_rows:
+                    rows += self.scatter(state, var_ids, values)
+                    var_ids, values = array('q'), array('q')
+        rows += self.scatter(state, var_ids, values)
+        log.info(f"Loaded {rows} rows for {state.num_variables} variables from {path}")
+        return state
+
+    def load_binary(self, path, state=None):
+        """Loads (variable id, value) int64 pairs into the state"""
+        state = state if state is not None else InitialState(0)
+        rows = 0
+        with open(path, "rb") as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{path} is not a bulk load file")
+            while True:
+                chunk = file.read(16 * self.chunk_rows)
+                if not chunk:
+                    break
+                if len(chunk) % 16:
+                    raise ValueError(f"{path} ends with a partial row")
+                pairs = array('q')
+                pairs.frombytes(chunk)
+                if sys.byteorder == "big":
+                    pairs.byteswap()
+                rows += self.scatter(state, pairs[0::2], pairs[1::2])
+        log.info(f"Loaded {rows} rows for {state.num_variables} variables from {path}")
+        return state
+
+    def scatter(self, state, var_ids, values):
+        """Stores a chunk of rows into the state and returns the number of rows"""
+        if not var_ids:
+            return 0
+        if min(var_ids) < 1:
+            raise ValueError(f"Variable ids start at 1, got {min(var_ids)}")
+        state.resize(max(var_ids))
+        state_values = state.ensure_values()
+        for var_idx, value in zip(var_ids, values):
+            state_values[var_idx] = value
+        return len(var_ids)
+
+    def write_binary(self, path, var_ids, values):
+        """Writes (variable id, value) rows in the binary format, chunk by chunk"""
+        with open(path, "wb") as file:
+            file.write(self.MAGIC)
+            for start in range(0, len(var_ids), self.chunk_rows):
+                pairs = array('q', [0]) * (2 * len(var_ids[start:start + self.chunk_rows]))
+                pairs[0::2] = array('q', var_ids[start:start + self.chunk_rows])
+                pairs[1::2] = array('q', values[start:start + self.chunk_rows])
+                if sys.byteorder == "big":
+                    pairs.byteswap()
+                file.write(pairs.tobytes())
+
+    def write_csv(self, path, var_ids, values):
+        """Writes (variable id, value) rows as "x<i>,<value>" CSV with a header"""
+        with open(path, "w") as file:
+            file.write("variable,value\n")
+            file.writelines(f"x{var_idx},{value}\n" for var_idx, value in zip(var_ids, values))
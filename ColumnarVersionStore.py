@@ -0,0 +1,147 @@
+import logging
+import threading
+try:
+    import numpy as np
+except ImportError:
+    np = None
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class ColumnarVersionStore:
+    """
+    Stores the version chains of every variable of a site in three contiguous NumPy
+    columns (variable id, commit time, value), 20 bytes per version.
+
+    The columns are kept sorted by (variable id, commit time) with per-variable offsets.
+    New versions are appended to an unsorted tail that is merged into the sorted region
+    once it grows past a fraction of the store, so point lookups stay cheap while bulk
+    queries over all variables run vectorized.
+    """
+    def __init__(self, capacity=1024, compaction_ratio=0.125):
+        if np is None:
+            raise ImportError("The columnar storage backend requires numpy")
+        self.var_ids = np.empty(capacity, dtype=np.int32)
+        self.commit_times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+        self.sorted_size = 0
+        self.compaction_ratio = compaction_ratio
+        self.var_index = np.empty(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.lock = threading.Lock()
+
+    def append(self, var_id, commit_time, value):
+        """Appends a committed version. Versions of a variable arrive in commit time order."""
+        with self.lock:
+            if self.size == len(self.values):
+                self.grow(2 * len(self.values))
+            self.var_ids[self.size] = var_id
+            self.commit_times[self.size] = commit_time
+            self.values[self.size] = value
+            self.size += 1
+            if self.size - self.sorted_size > max(1024, self.compaction_ratio * self.size):
+                self.compact()
+
+    def grow(self, capacity):
+        """Reallocates the columns with the given capacity"""
+        for name in ("var_ids", "commit_times", "values"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def compact(self):
+        """Merges the unsorted tail into the sorted region and rebuilds the per-variable offsets"""
+        if self.sorted_size == self.size:
+            return
+        order = np.lexsort((self.commit_times[:self.size], self.var_ids[:self.size]))
+        self.var_ids[:self.size] = self.var_ids[:self.size][order]
+        self.commit_times[:self.size] = self.commit_times[:self.size][order]
+        self.values[:self.size] = self.values[:self.size][order]
+        self.sorted_size = self.size
+        self.var_index, starts = np.unique(self.var_ids[:self.size], return_index=True)
+        self.offsets = np.append(starts, self.size).astype(np.int64)
+
+    def segment(self, var_id):
+        """Returns the [start, end) range of a variable in the sorted region"""
+        i = int(np.searchsorted(self.var_index, var_id))
+        if i == len(self.var_index) or self.var_index[i] != var_id:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def find_version(self, var_id, timestamp, inclusive):
+        """Returns the (commit time, value) of the last version before (or at) timestamp, or None"""
+        with self.lock:
+            side = "right" if inclusive else "left"
+            tail = slice(self.sorted_size, self.size)
+            tail_times = self.commit_times[tail]
+            limit = tail_times <= timestamp if inclusive else tail_times < timestamp
+            matches = np.flatnonzero((self.var_ids[tail] == var_id) & limit)
+            if len(matches):
+                #The tail only holds versions newer than the sorted region
+                i = self.sorted_size + matches[-1]
+                return int(self.commit_times[i]), int(self.values[i])
+            start, end = self.segment(var_id)
+            k = start + int(np.searchsorted(self.commit_times[start:end], timestamp, side=side)) - 1
+            if k < start:
+                return None
+            return int(self.commit_times[k]), int(self.values[k])
+
+    def find_snapshot_before_time(self, var_id, timestamp):
+        """Returns the value of the most recent version strictly before timestamp, or None"""
+        version = self.find_version(var_id, timestamp, inclusive=False)
+        return version[1] if version else None
+
+    def find_time_of_snapshot_before(self, var_id, timestamp):
+        """Returns the commit time of the most recent version strictly before timestamp, or None"""
+        version = self.find_version(var_id, timestamp, inclusive=False)
+        return version[0] if version else None
+
+    def most_recent_snapshot_time(self, var_id):
+        """Returns the commit time of the latest version of a variable"""
+        version = self.find_version(var_id, np.iinfo(np.int64).max, inclusive=True)
+        return version[0] if version else float('-inf')
+
+    def most_recent_snapshot_value(self, var_id):
+        """Returns the value of the latest version of a variable"""
+        version = self.find_version(var_id, np.iinfo(np.int64).max, inclusive=True)
+        return version[1] if version else None
+
+    def get_snapshots(self, var_id):
+        """Returns the version chain of a variable as a list of (commit time, value) tuples"""
+        with self.lock:
+            self.compact()
+            start, end = self.segment(var_id)
+            return list(zip(self.commit_times[start:end].tolist(), self.values[start:end].tolist()))
+
+    def values_as_of(self, timestamp, inclusive=True):
+        """
+        Returns (variable ids, commit times, values) arrays holding, for every variable,
+        its last version committed before (or at) timestamp.
+        """
+        with self.lock:
+            self.compact()
+            times = self.commit_times[:self.size]
+            mask = times <= timestamp if inclusive else times < timestamp
+            idx = np.flatnonzero(mask)
+            var_ids = self.var_ids[idx]
+            last = np.ones(len(idx), dtype=bool)
+            last[:-1] = var_ids[1:] != var_ids[:-1]
+            idx = idx[last]
+            return self.var_ids[idx].copy(), self.commit_times[idx].copy(), self.values[idx].copy()
+
+    def latest_values(self):
+        """Returns (variable ids, commit times, values) arrays of the latest version of every variable"""
+        with self.lock:
+            self.compact()
+            ends = self.offsets[1:] - 1
+            return self.var_index.copy(), self.commit_times[ends].copy(), self.values[ends].copy()
+
+    def chain_lengths(self):
+        """Returns (variable ids, number of versions) arrays"""
+        with self.lock:
+            self.compact()
+            return self.var_index.copy(), np.diff(self.offsets)
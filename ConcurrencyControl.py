@@ -0,0 +1,228 @@
+import logging
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from Transaction import TransactionStatus, AbortReason
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class ConcurrencyControl:
+    """
+    The concurrency control protocol run by the TransactionManager, called at every access,
+    at validation inside the commit critical section, and once a transaction has ended.
+    Declared read-only transactions read their snapshot under every protocol, without locks or validation.
+    The TransactionManager keeps the parts common to all protocols: available copies replication,
+    site failures, the read and write sets, admission, retries and metrics.
+    """
+    PROTOCOLS = ("ssi", "2pl", "occ")
+    #Transactions that only read are validated too instead of committing right away
+    validates_reads = False
+    #Reads see the versions committed before the transaction began, which no later commit changes
+    snapshot_reads = False
+
+    @staticmethod
+    def create(protocol):
+        """Returns the concurrency control of a protocol name"""
+        if protocol == "ssi":
+            return SerializableSnapshotIsolation()
+        if protocol == "2pl":
+            return StrictTwoPhaseLocking()
+        if protocol == "occ":
+            return OptimisticConcurrencyControl()
+        raise ValueError(f"Unknown concurrency control protocol {protocol}")
+
+    def read_timestamp(self, txn_obj, current_time):
+        """Returns the time whose last committed versions a read sees, the latest ones by default"""
+        return txn_obj.get_arrival_time() if txn_obj.is_read_only() else current_time
+
+    def acquire(self, transaction_manager, txn_obj, var_idx, exclusive, retry, current_time):
+        """
+        Called before a read (exclusive False) or write (exclusive True) of a variable.
+        Returns False when the operation cannot run now, retry then being deferred until it can.
+        """
+        return True
+
+    def validate(self, transaction_manager, txn_obj, current_time):
+        """Checks inside the commit critical section if the transaction may commit, aborting it otherwise"""
+        return True
+
+    def committed(self, transaction_manager, txn_obj):
+        """Called inside the commit critical section once the writes of the transaction are installed"""
+
+    def release(self, transaction_manager, txn_obj):
+        """Called once the transaction committed or aborted, returns the names of the transactions it unblocked"""
+        return []
+
+    def snapshot(self):
+        """Returns the protocol gauges reported with the stats"""
+        return {"protocol": self.name}
+
+class SerializableSnapshotIsolation(ConcurrencyControl):
+    """
+    Reads see the snapshot as of the start of the transaction and writes are buffered.
+    At commit, first-committer-wins rejects concurrent writes and the serialization graph
+    (or the dangerous structure check) rejects rw-antidependency cycles, see
+    TransactionManager.validate_snapshot_isolation.
+    Transactions that only read are validated too, a read of an old version can close a cycle
+    through writers that committed since; only declared read-only transactions skip it.
+    """
+    name = "ssi"
+    validates_reads = True
+    snapshot_reads = True
+
+    def read_timestamp(self, txn_obj, current_time):
+        return txn_obj.get_arrival_time()
+
+    def validate(self, transaction_manager, txn_obj, current_time):
+        return transaction_manager.validate_snapshot_isolation(txn_obj, current_time)
+
+class StrictTwoPhaseLocking(ConcurrencyControl):
+    """
+    Reads take a shared lock and writes an exclusive lock on the variable, all held until the
+    transaction ends, and reads see the latest committed versions. An operation that conflicts with
+    a lock held by another transaction is deferred until the lock is released. Every new wait is
+    checked for a cycle in the wait-for graph, whose youngest transaction is aborted with DEADLOCK.
+    Waiting transactions are woken in no particular order, the first one to retry gets the lock.
+    """
+    name = "2pl"
+
+    def __init__(self):
+        self.shared = defaultdict(set)  #variable id -> names of the transactions holding a shared lock
+        self.exclusive = {}  #variable id -> name of the transaction holding the exclusive lock
+        self.held = defaultdict(set)  #transaction name -> ids of the variables it locked
+        self.waiting = {}  #transaction name -> (variable id, exclusive) of the lock it waits for
+        self.waiters = defaultdict(list)  #variable id -> names of the transactions waiting for it
+        self.deadlocks = 0
+        self.lock = threading.Lock()
+
+    def blockers(self, txn_name, var_idx, exclusive):
+        """Returns the other transactions holding a lock on the variable conflicting with the request"""
+        holder = self.exclusive.get(var_idx)
+        blockers = {holder} if holder is not None and holder != txn_name else set()
+        if exclusive:
+            blockers.update(name for name in self.shared.get(var_idx, ()) if name != txn_name)
+        return blockers
+
+    def acquire(self, transaction_manager, txn_obj, var_idx, exclusive, retry, current_time):
+        txn_name = txn_obj.get_name()
+        if txn_obj.get_transaction_status() == TransactionStatus.ABORTED:
+            return True  #Holds no locks anymore, its late operations change nothing
+        with self.lock:
+            if not self.blockers(txn_name, var_idx, exclusive):
+                if exclusive:
+                    self.exclusive[var_idx] = txn_name
+                    self.shared.get(var_idx, set()).discard(txn_name)
+                elif self.exclusive.get(var_idx) != txn_name:
+                    self.shared[var_idx].add(txn_name)
+                self.held[txn_name].add(var_idx)
+                return True
+            self.waiting[txn_name] = (var_idx, exclusive)
+            self.waiters[var_idx].append(txn_name)
+            #Deferred before the lock is dropped, so a release can never miss the operation
+            transaction_manager.defer_blocked_operation(txn_name, retry)
+            cycle = self.find_cycle(txn_name)
+        log.info(f"Transaction {txn_name} waits for the {'exclusive' if exclusive else 'shared'} lock on x{var_idx}.")
+        transaction_manager.metrics.increment("locks.waits")
+        if cycle:
+            victim = max(cycle, key=lambda name: transaction_manager.txn_map[name].get_arrival_time())
+            log.info(f"Deadlock between {', '.join(cycle)}, aborting the youngest transaction {victim}.")
+            self.deadlocks += 1
+            transaction_manager.metrics.increment("locks.deadlocks")
+            transaction_manager.abort_transaction(victim, current_time, AbortReason.DEADLOCK)
+        return False
+
+    def find_cycle(self, txn_name):
+        """Returns the transactions of a wait-for cycle through txn_name, or None. The caller holds the lock."""
+        path, on_path, done = [txn_name], {txn_name}, set()
+        stack = [iter(self.blockers(txn_name, *self.waiting[txn_name]))]
+        while stack:
+            blocker = next(stack[-1], None)
+            if blocker is None:
+                stack.pop()
+                finished = path.pop()
+                on_path.discard(finished)
+                done.add(finished)
+                continue
+            if blocker == txn_name:
+                return list(path)
+            if blocker in on_path or blocker in done or blocker not in self.waiting:
+                continue
+            path.append(blocker)
+            on_path.add(blocker)
+            stack.append(iter(self.blockers(blocker, *self.waiting[blocker])))
+        return None
+
+    def release(self, transaction_manager, txn_obj):
+        """Drops the locks of the transaction and its pending wait, waking the transactions waiting on them"""
+        txn_name = txn_obj.get_name()
+        woken = []
+        with self.lock:
+            wait = self.waiting.pop(txn_name, None)
+            if wait is not None:
+                self.waiters[wait[0]].remove(txn_name)
+                woken.append(txn_name)  #Its deferred operations now run as those of an aborted transaction
+            for var_idx in self.held.pop(txn_name, ()):
+                if self.exclusive.get(var_idx) == txn_name:
+                    del self.exclusive[var_idx]
+                self.shared.get(var_idx, set()).discard(txn_name)
+                for waiter in self.waiters.pop(var_idx, ()):
+                    del self.waiting[waiter]
+                    woken.append(waiter)
+        return woken
+
+    def snapshot(self):
+        with self.lock:
+            return {"protocol": self.name, "locked_variables": len(self.exclusive) + sum(1 for names in self.shared.values() if names),
+                    "waiting_transactions": len(self.waiting), "deadlocks": self.deadlocks}
+
+class OptimisticConcurrencyControl(ConcurrencyControl):
+    """
+    Backward validation: reads see the latest committed versions and writes are buffered.
+    At commit a transaction is aborted with VALIDATION if a transaction that committed after it
+    began wrote a variable it read, as its read would then not be the one of the serial order.
+    The write sets of committed transactions are kept in commit order until no active transaction
+    began before them.
+    """
+    name = "occ"
+    validates_reads = True
+
+    def __init__(self):
+        self.commit_times = []
+        self.write_sets = []
+        self.prune_at = 1024
+
+    def validate(self, transaction_manager, txn_obj, current_time):
+        read_set = txn_obj.read_set
+        start = bisect_right(self.commit_times, txn_obj.get_arrival_time())
+        for commit_time, write_set in zip(self.commit_times[start:], self.write_sets[start:]):
+            if write_set & read_set:
+                log.info(f"Txn {txn_obj.get_name()}: ABORTED, it read "
+                         f"{transaction_manager.format_variables(write_set & read_set)} overwritten at time {commit_time}.")
+                transaction_manager.abort_transaction(txn_obj.get_name(), current_time, AbortReason.VALIDATION)
+                return False
+        return True
+
+    def committed(self, transaction_manager, txn_obj):
+        if not txn_obj.write_set:
+            return
+        self.commit_times.append(txn_obj.get_commit_time())
+        self.write_sets.append(txn_obj.write_set)
+        if len(self.commit_times) >= self.prune_at:
+            self.prune(transaction_manager)
+
+    def prune(self, transaction_manager):
+        """Drops the write sets committed before every active transaction began"""
+        with transaction_manager.state_lock:
+            oldest_active = min((txn_obj.get_arrival_time() for txn_obj in transaction_manager.txn_map.values()
+                                 if txn_obj.get_transaction_status() in (TransactionStatus.RUNNING, TransactionStatus.WAITING)),
+                                default=float('inf'))
+        keep = bisect_right(self.commit_times, oldest_active)
+        del self.commit_times[:keep]
+        del self.write_sets[:keep]
+        self.prune_at = max(1024, 2 * len(self.commit_times))
+
+    def snapshot(self):
+        return {"protocol": self.name, "retained_write_sets": len(self.commit_times)}
@@ -1,139 +1,226 @@
 import logging
+import os
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
 from Variable import Variable
+from Placement import Placement
+from InitialState import InitialState
+from SegmentVersionStore import SegmentVersionStore
 """
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class DataManager:
-    def __init__(self,id):
+    def __init__(self,id, backend="objects", placement=None, initial_state=None, storage_dir=None):
         self.current_site=id #stores the site that the data manager is present in
-        self.committed_variables=self.populateVariables()
-        #log.debug(f"Committed variables for site {self.current_site}: {[var.getVariableName() for var in self.committed_variables]}")
-        #Create separate copies for replicated and pre-committed variables
-        self.replicated_variables = [var for var in self.committed_variables]
-        self.pre_committed_variables = [var for var in self.committed_variables]
-        #log.debug(f"Pre-committed variables for site {self.current_site}: {[var.getVariableName() for var in self.pre_committed_variables]}")
-
-
-    def populateVariables(self):
-        variables = []
-        for i in range(1, 21):  # Variable IDs from x1 to x19
-            key = f"x{i}"
-            value = 10 * i
-            if i % 2 == 0:  # Even-indexed variables are replicated across all sites
-                variables.append(Variable(key, self.current_site, value))
-                #log.debug(f"Variable {key} initialized at site {self.current_site} with value {value} (Even-indexed).")
-            else:  # Odd-indexed variables are hosted at one site
-                if self.current_site == (i % 10 + 1):  # Ensure only the designated site hosts the variable
-                    variables.append(Variable(key, self.current_site, value))
-                    #log.debug(f"Variable {key} initialized at site {self.current_site} with value {value} (Odd-indexed).")
-                #else:
-                    #log.debug(f"Variable {key} skipped initialization at site {self.current_site} (Odd-indexed).")
-        return variables
+        self.placement = placement if placement is not None else Placement()
+        self.initial_state = initial_state if initial_state is not None else InitialState(self.placement.num_variables)
+        #"objects" keeps each version chain as a list on its Variable, "columnar" keeps all of them in NumPy columns,
+        #"segments" keeps the newest versions in memory and spills older ones to files under storage_dir
+        self.backend = backend
+        self.temporary_dir = None
+        if backend == "columnar":
+            from ColumnarVersionStore import ColumnarVersionStore  #Imports numpy, so only when it is used
+            self.version_store = ColumnarVersionStore()
+        elif backend == "segments":
+            #Without a storage_dir the segment files go to a temporary directory removed by close
+            self.temporary_dir = tempfile.TemporaryDirectory(prefix="ssi-segments-") if storage_dir is None else None
+            storage_dir = storage_dir if storage_dir is not None else self.temporary_dir.name
+            self.version_store = SegmentVersionStore(os.path.join(storage_dir, f"site{id}"))
+        elif backend == "objects":
+            self.version_store = None
+        else:
+            raise ValueError(f"Unknown storage backend {backend}")
+        #Variables held by the site are created on first access from the initial state, keyed by id.
+        #A variable that was never accessed still holds its initial value committed at time 0.
+        self.variables = {}
+        self.materialize_lock = threading.Lock()
+        #Readability of the copies after a recovery: replicated variables may have missed commits while the
+        #site was down, so they are unreadable until the first commit after the recovery, whose time is kept
+        #in readable_since. Unreplicated variables are always readable, nobody else could commit them.
+        self.recovered = False
+        self.readable_since = {}
+        #Ids of the held variables in increasing order, built on the first range lookup
+        self.variable_index = None
+
+    def mark_recovered(self):
+        """Makes every replicated variable unreadable until its next commit at this site"""
+        self.recovered = True
+        self.readable_since = {}
+
+    def mark_committed(self, var_idx, commit_time):
+        """Makes a variable readable from its first commit after the last recovery on"""
+        if self.recovered:
+            self.readable_since.setdefault(var_idx, commit_time)
+
+    def is_readable(self, var_idx, txn_start_time):
+        """Checks if the copy holds every version committed before txn_start_time"""
+        if not self.recovered or not self.placement.is_replicated(var_idx):
+            return True
+        readable_since = self.readable_since.get(var_idx)
+        return readable_since is not None and readable_since < txn_start_time
+
+    def variable(self, var_idx):
+        """Returns the variable with the given id, creating it on first access, or None if the site does not hold it"""
+        variable = self.variables.get(var_idx)
+        if variable is not None:
+            return variable
+        if not self.placement.holds(self.current_site, var_idx):
+            return None
+        with self.materialize_lock:
+            if var_idx not in self.variables:
+                self.variables[var_idx] = Variable(f"x{var_idx}", self.current_site, self.initial_state.value(var_idx),
+                                                   version_store=self.version_store)
+            return self.variables[var_idx]
+
+    def held_variables(self):
+        """Returns the ids of the variables held by the site, in increasing order"""
+        return self.placement.variables_at(self.current_site)
+
+    def variables_in_range(self, low, high):
+        """Returns the ids of the held variables between low and high included, in increasing order"""
+        if self.variable_index is None:
+            self.variable_index = self.held_variables()
+        return self.variable_index[bisect_left(self.variable_index, low):bisect_right(self.variable_index, high)]
+
+    def read_snapshot(self, var_indices, txn_start_time):
+        """
+        Returns the values of the most recent versions before txn_start_time of several held variables, in one pass.
+        Variables never accessed still hold their initial value, so they are not created.
+        """
+        values = []
+        for var_idx in var_indices:
+            variable = self.variables.get(var_idx)
+            if variable is None:
+                values.append(self.initial_state.value(var_idx) if txn_start_time > 0 else None)
+            else:
+                values.append(variable.find_snapshot_before_time(txn_start_time))
+        return values
 
     def getVariableList(self):
-        return self.committed_variables
+        """Returns every variable held by the site, creating the ones not accessed yet"""
+        return [self.variable(var_idx) for var_idx in self.held_variables()]
     
+    def latest_values(self):
+        """Returns (variable name, value) pairs of the latest committed version of every variable, in id order"""
+        if self.version_store is not None:
+            var_ids, _, values = self.version_store.latest_values()
+            stored = dict(zip(var_ids.tolist(), values.tolist()))
+        latest = []
+        for var_idx in self.held_variables():
+            variable = self.variables.get(var_idx)
+            if variable is None:
+                value = self.initial_state.value(var_idx)
+            elif self.version_store is not None:
+                value = stored[var_idx]
+            else:
+                value = variable.most_recent_snapshot_value()
+            latest.append((f"x{var_idx}", value))
+        return latest
+
+    def versions_as_of(self, timestamp):
+        """
+        Returns (variable name, commit time, value) of the last version of every variable
+        committed at or before timestamp, in id order
+        """
+        if self.version_store is not None:
+            var_ids, commit_times, values = self.version_store.values_as_of(timestamp)
+            stored = {var_id: (commit_time, value)
+                      for var_id, commit_time, value in zip(var_ids.tolist(), commit_times.tolist(), values.tolist())}
+        versions = []
+        for var_idx in self.held_variables():
+            variable = self.variables.get(var_idx)
+            if variable is None:
+                version = (0, self.initial_state.value(var_idx)) if timestamp >= 0 else None
+            elif self.version_store is not None:
+                version = stored.get(var_idx)
+            else:
+                version = variable.find_snapshot_as_of(timestamp)
+            if version is not None:
+                versions.append((f"x{var_idx}", version[0], version[1]))
+        return versions
+
+    def chain_lengths(self):
+        """Returns the number of committed versions of every accessed variable, the others hold only their initial one"""
+        if self.version_store is not None:
+            return self.version_store.chain_lengths()[1].tolist()
+        return [len(variable.snapshots) for variable in self.variables.values()]
+
     def getPreCommittedVariablesList(self):
-        return self.pre_committed_variables
+        """Returns the variables holding tentative writes, which are the accessed ones"""
+        return list(self.variables.values())
     
     def updateVariableValue(self,var_name,value):
-        for variable in self.committed_variables:
-            if var_name==variable.getVariableName():
-                variable.setVariableValue(value)
+        variable = self.variable(int(var_name[1:]))
+        if variable is not None:
+            variable.setVariableValue(value)
 
     
     def findRecentSnapshot(self, txn_start_time, var_idx):
         """Finds the most recent snapshot of a variable before a given transaction start time."""
         recent_snapshot = None
-        for variable in self.committed_variables:
-            if int(variable.getVariableName()[1:]) == var_idx:
-                # recent_snapshot_list=variable.get_snapshots_list()
-                recent_snapshot_value=variable.find_snapshot_before_time(txn_start_time)
-                recent_snapshot_time=variable.most_recent_snapshot_time()
-                # commit_time = variable.getCommitTime()
-                # if commit_time is None or commit_time < txn_start_time:
-                    # return variable
-                    # if recent_snapshot is None or (commit_time and recent_snapshot.getCommitTime() < commit_time):
-                    #     recent_snapshot = variable
-                if recent_snapshot_value:
-                    log.debug(f"Found recent snapshot for x{var_idx} with value {recent_snapshot_value} and commit time {recent_snapshot_time}.")
-                else:
-                    log.warning(f"No valid snapshot found for x{var_idx}.")
-
-                return recent_snapshot_value
+        variable = self.variable(var_idx)
+        if variable is not None:
+            # recent_snapshot_list=variable.get_snapshots_list()
+            recent_snapshot_value=variable.find_snapshot_before_time(txn_start_time)
+            recent_snapshot_time=variable.most_recent_snapshot_time()
+            # commit_time = variable.getCommitTime()
+            # if commit_time is None or commit_time < txn_start_time:
+                # return variable
+                # if recent_snapshot is None or (commit_time and recent_snapshot.getCommitTime() < commit_time):
+                #     recent_snapshot = variable
+            if recent_snapshot_value:
+                log.debug(f"Found recent snapshot for x{var_idx} with value {recent_snapshot_value} and commit time {recent_snapshot_time}.")
+            else:
+                log.warning(f"No valid snapshot found for x{var_idx}.")
+
+            return recent_snapshot_value
 
     def update_local_copy(self, var_idx, value, txn_obj):
         log.debug(f"Attempting update local copy for x{var_idx} at site {self.current_site}.")
-        log.debug(f"Pre-committed variables at site {self.current_site}: {[var.getVariableName() for var in self.pre_committed_variables]}")
+        log.debug("Pre-committed variables at site %s: %s", self.current_site, self.variables.keys())
         """Tentatively writes a value to the pre-commit buffer."""
         log.debug(f"Attempting update local copy for x{var_idx} at site {self.current_site}.")
 
         txn_obj.add_precommit_variables(var_idx, value)
-        for variable in self.pre_committed_variables:
-            if variable.getVariableID() == var_idx:
-                variable.value = value
-                # variable.setCommitTime(txn_obj.get_arrival_time())
-                log.debug(f"Update local copy succeeded for x{var_idx} with value {value} at site {self.current_site}.")
-                return True
+        variable = self.variable(var_idx)
+        if variable is not None:
+            variable.value = value
+            # variable.setCommitTime(txn_obj.get_arrival_time())
+            log.debug(f"Update local copy succeeded for x{var_idx} with value {value} at site {self.current_site}.")
+            return True
         log.warning(f"update local copy failed: x{var_idx} not found in pre-committed variables at site {self.current_site}.")
         return False
  
     def abort_transaction(self, txn_obj):
-        """Removes all updated local copies for a transaction."""
-        self.pre_committed_variables = [
-            v for v in self.pre_committed_variables if (not v.getCommitTime()) or (v.getCommitTime() < txn_obj.get_arrival_time())
-        ]
-        # temp_variables = []
-        # for v in self.pre_committed_variables:
-        #     if (v.getCommitTime()):
-        #         if(v.getCommitTime() < txn_obj.get_arrival_time()):
-        #             temp_variables.append(v)
-        # self.pre_committed_variables = temp_variables
+        """Discards the updated local copies of a transaction by restoring the last committed value."""
+        for var_key in txn_obj.get_precommit_variables():
+            variable = self.variables.get(int(var_key))
+            if variable is not None:
+                variable.value = variable.most_recent_snapshot_value()
         log.debug(f"Cleaned up update local copys for transaction {txn_obj.get_name()}.")
 
-    def checkCommitBtwTimeRange(self,recovery_time, txn_arrival_time, var_id):
-        """
-        Checks the commit between the time range
-        """
-        for variable in self.committed_variables:
-            if variable.getVariableName()[1:]==str(var_id):
-                variable_snapshots = variable.get_snapshots_list()
-
-                if len(variable_snapshots)==1:
-                    return True
-                else:
-                    for time,val in variable_snapshots:
-                        if time > recovery_time and time < txn_arrival_time:
-                            return True
+    def close(self):
+        """Releases the version store, unmapping its segment files and removing them if they were temporary"""
+        if self.backend == "segments":
+            self.version_store.close()
+        if self.temporary_dir is not None:
+            self.temporary_dir.cleanup()
+            self.temporary_dir = None
 
-        return False
-    
     def has_variable(self, variable_index):
         """
         Checks if the variable with the given index is stored in this data manager.
-        Iterates through the list of committed variables to find a match.
+        Asks the placement, so the variable does not need to be created.
         """
-        var_name = f"x{variable_index}"
-        for variable in self.committed_variables:
-            if variable.getVariableName() == var_name:
-                return True
-        return False
+        return self.placement.holds(self.current_site, variable_index)
     
     def getVariable(self, var_name):
         """ Retrieves a variable object by its name. """
-        for variable in self.committed_variables:
-            if variable.getVariableName() == var_name:
-                return variable
-        return None
+        return self.variable(int(var_name[1:]))
 
     
     def commit_variable(self, var_name, commit_time, txn_obj):
@@ -143,18 +230,16 @@ class DataManager:
             var_name (str): The name of the variable to commit.
             commit_time (datetime): The time at which the commit is made.
         """
-        # Find the variable in pre-committed and update it in committed variables
-        for variable in self.pre_committed_variables:
-            if variable.getVariableName() == var_name:
-                # Assuming Variable class has setCommitTime method
-                variable.setCommitTime(commit_time)
-                if(var_name[1:] in txn_obj.pre_commit_vars):
-                    variable.setVariableValue(txn_obj.pre_commit_vars[var_name[1:]])
-                # Move the variable from pre-committed to committed
-                index = self.committed_variables.index(variable)
-                self.committed_variables[index] = variable
-                log.debug(f"Committed {var_name} at time {commit_time} in site {self.current_site}")
-                return True
+        # Find the variable and commit its tentative value
+        variable = self.variable(int(var_name[1:]))
+        if variable is not None:
+            # Assuming Variable class has setCommitTime method
+            variable.setCommitTime(commit_time)
+            self.mark_committed(int(var_name[1:]), commit_time)
+            if(var_name[1:] in txn_obj.pre_commit_vars):
+                variable.setVariableValue(txn_obj.pre_commit_vars[var_name[1:]])
+            log.debug(f"Committed {var_name} at time {commit_time} in site {self.current_site}")
+            return True
         
         log.warning(f"Variable {var_name} not found in pre-committed for committing at site {self.current_site}.")
         return False
@@ -0,0 +1,204 @@
+import logging
+from collections import Counter, deque
+from EventScheduler import EventScheduler
+from Site import SiteStatus
+from Transaction import Transaction, TransactionStatus
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class VirtualClient:
+    """A closed-loop client running one transaction script at a time"""
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self.script = None
+        self.position = 0
+        self.started_at = None
+        self.sites_before = 0  #Length of the sites accessed by the transaction when its current operation ran
+        self.commit_sites = ()  #Sites holding a copy of what the transaction wrote, when the current operation is its end
+
+    def operation(self):
+        return self.script[self.position]
+
+class DiscreteEventRunner:
+    """
+    Runs transaction scripts on a TransactionManager in virtual time, to estimate the commit latency and
+    throughput of a topology under the delays of a LatencyModel.
+
+    Every client sends the operations of its transaction one after the other, each once the previous one
+    was answered, and takes the next script once its transaction ended (after an optional think time).
+    An operation crosses the client link to the transaction manager, which applies it to the engine on arrival,
+    then sends one request per site it involved, the site serving the copy a read was routed to, every copy
+    a write updated, and at commit every up site holding a copy of a written variable. Every site serves its
+    requests one at a time in arrival order. The answer goes back to the client once all sites replied.
+    Operations blocked by admission control, locks or a failed site are answered once the engine ran them.
+    The engine still orders operations by their arrival, so the delays change the interleaving, not the protocol.
+    Site failures and recoveries of the workload run once every transaction before them was handed out.
+    """
+    def __init__(self, transaction_manager, latency_model, clients=8, think_time=None):
+        if transaction_manager.retry_policy is not None:
+            raise ValueError("The retries of the transaction manager run on the logical clock, disable them for virtual time runs")
+        if clients < 1:
+            raise ValueError("At least one client is needed")
+        self.transaction_manager = transaction_manager
+        self.site_manager = transaction_manager.site_manager
+        self.latency_model = latency_model
+        self.clients = [VirtualClient(client_id) for client_id in range(clients)]
+        self.think_time = think_time  #LatencyDistribution between the end of a transaction and the begin of the next
+        self.scheduler = EventScheduler()
+        self.workload = deque()
+        self.blocked = {}  #client id -> client whose operation the engine queued
+        self.site_busy_until = {}
+        self.site_busy_time = Counter()
+        self.commit_latencies = []
+        self.abort_reasons = Counter()
+        self.transactions = 0
+
+    def run(self, workload):
+        """
+        Runs a workload, a list of transaction scripts (lists of Begin, Read, Write and End operations)
+        and of single Fail and Recover operations, and returns a summary of the run.
+        """
+        self.workload.extend(workload)
+        self.transactions += sum(1 for item in workload if isinstance(item, list))
+        for client in self.clients:
+            self.next_transaction(client)
+        self.scheduler.run(after_event=self.check_blocked)
+        return self.summary()
+
+    def next_transaction(self, client):
+        """Hands the next script of the workload to an idle client, running the site operations before it"""
+        client.script = None
+        while self.workload and not isinstance(self.workload[0], list):
+            operation = self.workload.popleft()
+            log.info(f"Virtual time {self.scheduler.now:.3f}: {operation}")
+            operation.run(self.transaction_manager, self.transaction_manager.tick())
+        if not self.workload:
+            return
+        client.script, client.position, client.started_at = self.workload.popleft(), 0, self.scheduler.now
+        self.scheduler.schedule(self.latency_model.client_delay(), self.arrive, client)
+
+    def arrive(self, client):
+        """Applies the operation of a client once it reached the transaction manager"""
+        operation = client.operation()
+        txn_obj = self.transaction_manager.txn_map.get(operation.txn_name)
+        client.sites_before = len(txn_obj.get_sites_accessed()) if txn_obj is not None else 0
+        client.commit_sites = ()
+        if operation.timestamped_on_commit and txn_obj is not None:
+            client.commit_sites = {site_id for var_idx in Transaction.variables_in(txn_obj.write_set)
+                                   for site_id in self.site_manager.placement.sites_for(var_idx)}
+        operation.run(self.transaction_manager, None if operation.timestamped_on_commit else self.transaction_manager.tick())
+        if self.is_blocked(operation.txn_name):
+            self.blocked[client.client_id] = client
+        else:
+            self.fan_out(client)
+
+    def is_blocked(self, txn_name):
+        """Checks if the engine queued the last operation of a transaction or made it wait for a site"""
+        if self.transaction_manager.is_queued(txn_name):
+            return True
+        txn_obj = self.transaction_manager.txn_map.get(txn_name)
+        return txn_obj is not None and txn_obj.get_transaction_status() == TransactionStatus.WAITING
+
+    def check_blocked(self):
+        """Answers the blocked operations the engine ran since, called after every event"""
+        if not self.blocked:
+            return
+        for client_id, client in list(self.blocked.items()):
+            if not self.is_blocked(client.operation().txn_name):
+                del self.blocked[client_id]
+                self.fan_out(client)
+
+    def fan_out(self, client):
+        """Sends the site requests of the operation a client is waiting on, answering the client once all sites replied"""
+        operation = client.operation()
+        if operation.timestamped_on_commit:
+            #An aborted transaction only drops its tentative writes, which the transaction manager does locally
+            committed = self.status(operation.txn_name) == TransactionStatus.COMMITTED
+            sites = [site_id for site_id in sorted(client.commit_sites)
+                     if committed and self.site_manager.getSiteStatus(site_id - 1) != SiteStatus.FAILED]
+        else:
+            txn_obj = self.transaction_manager.txn_map.get(operation.txn_name)
+            sites = txn_obj.get_sites_accessed()[client.sites_before:] if txn_obj is not None else []
+        if not sites:
+            self.reply(client)
+            return
+        remaining = [len(sites)]
+        def site_replied():
+            remaining[0] -= 1
+            if not remaining[0]:
+                self.reply(client)
+        for site_id in sites:
+            self.scheduler.schedule(self.latency_model.link_delay(site_id), self.site_request, site_id, site_replied)
+
+    def site_request(self, site_id, callback):
+        """Queues a request at a site, which replies once it served the requests that arrived before it"""
+        start = max(self.scheduler.now, self.site_busy_until.get(site_id, 0.0))
+        finish = start + self.latency_model.service_time(site_id)
+        self.site_busy_until[site_id] = finish
+        self.site_busy_time[site_id] += finish - start
+        self.scheduler.schedule_at(finish + self.latency_model.link_delay(site_id), callback)
+
+    def reply(self, client):
+        """Sends the answer of the transaction manager back to the client"""
+        self.scheduler.schedule(self.latency_model.client_delay(), self.answered, client)
+
+    def answered(self, client):
+        """Sends the next operation of the client, skipping to the end of an aborted transaction"""
+        operation = client.operation()
+        if operation.timestamped_on_commit:
+            self.finish_transaction(client)
+            return
+        client.position += 1
+        if self.status(operation.txn_name) == TransactionStatus.ABORTED and client.script[-1].timestamped_on_commit:
+            client.position = len(client.script) - 1
+        if client.position == len(client.script):
+            log.warning(f"Transaction {operation.txn_name} has no end, its client moves on")
+            self.finish_transaction(client)
+            return
+        self.scheduler.schedule(self.latency_model.client_delay(), self.arrive, client)
+
+    def finish_transaction(self, client):
+        """Records the outcome of the transaction of a client and lets it take the next one"""
+        txn_name = client.script[0].txn_name
+        status = self.status(txn_name)
+        if status == TransactionStatus.COMMITTED:
+            self.commit_latencies.append(self.scheduler.now - client.started_at)
+        elif status == TransactionStatus.ABORTED:
+            self.abort_reasons[self.transaction_manager.get_transaction_summary(txn_name)[5]] += 1
+        if self.think_time is None:
+            self.next_transaction(client)
+        else:
+            client.script = None
+            self.scheduler.schedule(self.think_time.sample(self.latency_model.generator), self.next_transaction, client)
+
+    def status(self, txn_name):
+        """Returns the status of a transaction, retained or evicted, or None if it is unknown"""
+        summary = self.transaction_manager.get_transaction_summary(txn_name)
+        return TransactionStatus(summary[1]) if summary else None
+
+    def summary(self):
+        """Returns the outcome counts, the throughput and commit latency in virtual time, and the site utilizations"""
+        elapsed = self.scheduler.now
+        latencies = sorted(self.commit_latencies)
+        committed, aborted = len(latencies), sum(self.abort_reasons.values())
+        def percentile(p):
+            return round(latencies[min(committed - 1, int(committed * p / 100))], 3)
+        return {
+            "virtual_ms": round(elapsed, 3),
+            "events": self.scheduler.processed,
+            "clients": len(self.clients),
+            "transactions": self.transactions,
+            "committed": committed,
+            "aborted": aborted,
+            "abort_reasons": dict(self.abort_reasons),
+            "unfinished": self.transactions - committed - aborted,
+            "commits_per_second": round(committed / elapsed * 1000, 2) if elapsed else None,
+            "commit_latency_ms": {"mean": round(sum(latencies) / committed, 3), "p50": percentile(50), "p90": percentile(90),
+                                  "p99": percentile(99), "max": round(latencies[-1], 3)} if latencies else {},
+            "site_utilization": {site_id: round(busy / elapsed, 4) for site_id, busy in sorted(self.site_busy_time.items())}
+            if elapsed else {},
+            "latency_model": self.latency_model.snapshot(),
+        }
@@ -0,0 +1,47 @@
+import heapq
+import logging
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class EventScheduler:
+    """
+    Discrete-event scheduler over a virtual clock. Events are callbacks kept in a heap by the virtual
+    time they are due at and run in that order, events due at the same time in the order they were scheduled.
+    The clock jumps from one event to the next, so the virtual time a run covers costs nothing to wait out.
+    """
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []
+        self.sequence = 0  #Breaks ties between events due at the same time, callbacks are never compared
+        self.processed = 0
+
+    def schedule(self, delay, callback, *args):
+        """Runs callback(*args) delay virtual time units from now"""
+        if delay < 0:
+            raise ValueError(f"Cannot schedule an event {-delay} in the past")
+        self.schedule_at(self.now + delay, callback, *args)
+
+    def schedule_at(self, due_time, callback, *args):
+        """Runs callback(*args) at the virtual time due_time, which is not before now"""
+        self.sequence += 1
+        heapq.heappush(self.queue, (max(due_time, self.now), self.sequence, callback, args))
+
+    def run(self, until=None, after_event=None):
+        """
+        Runs the events in time order until none is left or the next one is due after until,
+        calling after_event() once each event has run. Returns the virtual time reached.
+        """
+        while self.queue and (until is None or self.queue[0][0] <= until):
+            due_time, _, callback, args = heapq.heappop(self.queue)
+            self.now = due_time
+            callback(*args)
+            self.processed += 1
+            if after_event is not None:
+                after_event()
+        if until is not None:
+            self.now = max(self.now, until)
+        log.debug(f"Ran {self.processed} events up to virtual time {self.now}, {len(self.queue)} pending")
+        return self.now
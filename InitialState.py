@@ -0,0 +1,41 @@
+import logging
+from array import array
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class InitialState:
+    """
+    The value every variable holds at time 0. Variables that were not loaded keep the default value 10 * i,
+    so the state costs nothing until a value is loaded; from then on all values live in one compact
+    int64 array indexed by variable id (slot 0 is unused).
+    """
+    def __init__(self, num_variables=20):
+        self.size = num_variables
+        self.values = None
+
+    @property
+    def num_variables(self):
+        """The highest variable id"""
+        return self.size
+
+    def resize(self, num_variables):
+        """Grows the state to num_variables, the new variables taking the default value"""
+        if num_variables > self.size:
+            if self.values is not None:
+                self.values.extend(range(10 * len(self.values), 10 * (num_variables + 1), 10))
+            self.size = num_variables
+
+    def ensure_values(self):
+        """Returns the value array, filling it with the default values on first use"""
+        if self.values is None:
+            self.values = array('q', range(0, 10 * (self.size + 1), 10))
+        return self.values
+
+    def value(self, var_idx):
+        """Returns the initial value of a variable"""
+        if self.values is None:
+            return 10 * var_idx
+        return self.values[var_idx]
@@ -0,0 +1,103 @@
+import json
+import logging
+import math
+import random
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class LatencyDistribution:
+    """
+    Distribution of a delay in virtual milliseconds, written as "kind:parameters":
+    - "const:D" (or just "D"): always D
+    - "uniform:LOW:HIGH": uniformly between LOW and HIGH
+    - "exp:MEAN": exponential with mean MEAN
+    - "normal:MEAN:STDDEV": normal, negative samples count as 0
+    - "lognormal:MEDIAN:SIGMA": log-normal with median MEDIAN and log standard deviation SIGMA, the long tail of RTTs
+    """
+    KINDS = {"const": 1, "uniform": 2, "exp": 1, "normal": 2, "lognormal": 2}
+
+    def __init__(self, kind, *parameters):
+        if self.KINDS.get(kind) != len(parameters):
+            raise ValueError(f"Invalid latency distribution {kind}{parameters}")
+        if any(parameter < 0 for parameter in parameters) or (kind == "uniform" and parameters[0] > parameters[1]):
+            raise ValueError(f"Invalid latency distribution {kind}{parameters}")
+        self.kind = kind
+        self.parameters = parameters
+
+    @staticmethod
+    def parse(spec):
+        """Returns the distribution of a "kind:parameters" string, or a constant one for a number"""
+        if isinstance(spec, (int, float)):
+            return LatencyDistribution("const", float(spec))
+        kind, *parameters = str(spec).split(":")
+        if not parameters:
+            kind, parameters = "const", [kind]
+        try:
+            return LatencyDistribution(kind, *(float(parameter) for parameter in parameters))
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution {spec!r}") from None
+
+    def sample(self, generator):
+        """Draws one delay from the given random.Random"""
+        kind, parameters = self.kind, self.parameters
+        if kind == "const":
+            return parameters[0]
+        if kind == "uniform":
+            return generator.uniform(*parameters)
+        if kind == "exp":
+            return generator.expovariate(1 / parameters[0]) if parameters[0] else 0.0
+        if kind == "normal":
+            return max(0.0, generator.gauss(*parameters))
+        return generator.lognormvariate(math.log(parameters[0]), parameters[1]) if parameters[0] else 0.0
+
+    def __repr__(self):
+        return ":".join([self.kind] + [f"{parameter:g}" for parameter in self.parameters])
+
+class LatencyModel:
+    """
+    Delays of the simulated topology, in virtual milliseconds: the one-way delay of the link between
+    the clients and the transaction manager, the one-way delay of the link between the transaction manager
+    and every site, and the time a site takes to serve one request. Links and services default to
+    link and service, and can be set per site. All delays are drawn from one seeded generator.
+    """
+    def __init__(self, client_link=0.0, link=1.0, service=0.0, links=None, services=None, seed=1):
+        self.client_link = LatencyDistribution.parse(client_link)
+        self.link = LatencyDistribution.parse(link)
+        self.service = LatencyDistribution.parse(service)
+        self.links = {int(site_id): LatencyDistribution.parse(spec) for site_id, spec in (links or {}).items()}
+        self.services = {int(site_id): LatencyDistribution.parse(spec) for site_id, spec in (services or {}).items()}
+        self.generator = random.Random(seed)
+
+    @staticmethod
+    def load(path):
+        """
+        Reads a model from a JSON file with the keys of the constructor, for instance
+        {"client_link": "const:0.2", "link": "lognormal:2:0.4", "service": "exp:0.3", "links": {"7": "uniform:40:60"}}
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            options = json.load(file)
+        unknown = set(options) - {"client_link", "link", "service", "links", "services", "seed"}
+        if unknown:
+            raise ValueError(f"{path}: unknown latency model keys {', '.join(sorted(unknown))}")
+        return LatencyModel(**options)
+
+    def client_delay(self):
+        """Draws the one-way delay between a client and the transaction manager"""
+        return self.client_link.sample(self.generator)
+
+    def link_delay(self, site_id):
+        """Draws the one-way delay between the transaction manager and a site"""
+        return self.links.get(site_id, self.link).sample(self.generator)
+
+    def service_time(self, site_id):
+        """Draws the time a site spends serving one request"""
+        return self.services.get(site_id, self.service).sample(self.generator)
+
+    def snapshot(self):
+        """Returns the distributions as a JSON-serializable dict"""
+        return {"client_link": repr(self.client_link), "link": repr(self.link), "service": repr(self.service),
+                "links": {site_id: repr(spec) for site_id, spec in sorted(self.links.items())},
+                "services": {site_id: repr(spec) for site_id, spec in sorted(self.services.items())}}
@@ -0,0 +1,93 @@
+import logging
+import threading
+from collections import defaultdict
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class Histogram:
+    """
+    Latency histogram with power-of-two microsecond buckets.
+    Percentiles are reported as the upper bound of the bucket holding the rank.
+    """
+    def __init__(self):
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Records one observation in seconds"""
+        self.buckets[int(seconds * 1e6).bit_length()] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Returns the upper bound in seconds of the bucket holding the p-th percentile"""
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def snapshot(self):
+        """Returns the histogram as a JSON-serializable dict"""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets_us": {f"le_{1 << bucket}": n for bucket, n in sorted(self.buckets.items())},
+        }
+
+class Metrics:
+    """
+    Counters and latency histograms of the engine.
+    Callers check `enabled` before measuring, so a disabled instance costs one attribute test.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = defaultdict(int)
+        self.histograms = defaultdict(Histogram)
+        self.lock = threading.Lock()
+
+    def increment(self, name, amount=1):
+        """Adds amount to a counter"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += amount
+
+    def observe(self, name, seconds):
+        """Records a duration in a histogram"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.histograms[name].observe(seconds)
+
+    def get_counter(self, name):
+        """Returns the current value of a counter"""
+        return self.counters.get(name, 0)
+
+    def snapshot(self, gauges=None):
+        """Returns counters, histograms and the given gauges as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "counters": dict(sorted(self.counters.items())),
+                "histograms": {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())},
+                "gauges": gauges or {},
+            }
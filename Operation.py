@@ -0,0 +1,116 @@
+import logging
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class Operation:
+    """
+    One typed operation of a batch run by TransactionManager.execute_batch,
+    the parsed counterpart of an instruction line.
+    """
+    #Operations drawing their timestamp inside the commit critical section
+    timestamped_on_commit = False
+    #Single reads, which a read executor may serve in parallel when they read a snapshot,
+    #see TransactionManager.is_snapshot_read
+    snapshot_read = False
+
+    def run(self, transaction_manager, current_time):
+        """Applies the operation at the given time and returns its raw result"""
+        raise NotImplementedError
+
+    def variable_name(self, variable):
+        """Accepts a variable as its name "x<i>" or its id"""
+        return variable if isinstance(variable, str) else f"x{variable}"
+
+class Begin(Operation):
+    def __init__(self, txn_name, read_only=False):
+        self.txn_name = txn_name
+        self.read_only = read_only
+
+    def run(self, transaction_manager, current_time):
+        transaction_manager.begin_transaction(self.txn_name, current_time, read_only=self.read_only)
+
+    def __repr__(self):
+        return f"{'beginRO' if self.read_only else 'begin'}({self.txn_name})"
+
+class Read(Operation):
+    snapshot_read = True
+
+    def __init__(self, txn_name, variable):
+        self.txn_name = txn_name
+        self.variable = self.variable_name(variable)
+
+    def run(self, transaction_manager, current_time):
+        return transaction_manager.read_request(self.txn_name, self.variable, current_time)
+
+    def __repr__(self):
+        return f"R({self.txn_name},{self.variable})"
+
+class MultiRead(Operation):
+    def __init__(self, txn_name, variables):
+        self.txn_name = txn_name
+        self.variables = [self.variable_name(variable) for variable in variables]
+
+    def run(self, transaction_manager, current_time):
+        return transaction_manager.multi_read_request(self.txn_name, self.variables, current_time)
+
+    def __repr__(self):
+        return f"MR({self.txn_name},{','.join(self.variables)})"
+
+class Scan(Operation):
+    def __init__(self, txn_name, low, high):
+        self.txn_name = txn_name
+        self.low = self.variable_name(low)
+        self.high = self.variable_name(high)
+
+    def run(self, transaction_manager, current_time):
+        return transaction_manager.scan_request(self.txn_name, self.low, self.high, current_time)
+
+    def __repr__(self):
+        return f"SCAN({self.txn_name},{self.low},{self.high})"
+
+class Write(Operation):
+    def __init__(self, txn_name, variable, value):
+        self.txn_name = txn_name
+        self.variable = self.variable_name(variable)
+        self.value = int(value)
+
+    def run(self, transaction_manager, current_time):
+        transaction_manager.write_request(self.txn_name, self.variable, self.value, current_time)
+
+    def __repr__(self):
+        return f"W({self.txn_name},{self.variable},{self.value})"
+
+class End(Operation):
+    timestamped_on_commit = True
+
+    def __init__(self, txn_name):
+        self.txn_name = txn_name
+
+    def run(self, transaction_manager, current_time):
+        return transaction_manager.end_transaction(self.txn_name, current_time)
+
+    def __repr__(self):
+        return f"end({self.txn_name})"
+
+class Fail(Operation):
+    def __init__(self, site_id):
+        self.site_id = int(site_id)
+
+    def run(self, transaction_manager, current_time):
+        transaction_manager.handle_site_failure(self.site_id)
+
+    def __repr__(self):
+        return f"fail({self.site_id})"
+
+class Recover(Operation):
+    def __init__(self, site_id):
+        self.site_id = int(site_id)
+
+    def run(self, transaction_manager, current_time):
+        transaction_manager.handle_site_recovery(self.site_id, current_time)
+
+    def __repr__(self):
+        return f"recover({self.site_id})"
@@ -0,0 +1,45 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class ParallelReadExecutor:
+    """
+    Runs a run of snapshot reads issued by distinct transactions on a thread pool and returns
+    their values in instruction order. Each read sees the versions committed before its
+    transaction began, which later commits do not change, so it reads the same values whichever
+    thread serves it. TransactionManager.is_snapshot_read keeps reads of the latest versions serial.
+    The run is split into one contiguous chunk per thread to keep the dispatch cost per
+    read low. Reads are order independent except for the waitlist order of reads that
+    must wait and the site choice of the round_robin, least_loaded and random routers.
+    Threads only overlap on free-threaded builds or in the NumPy paths that release the GIL.
+    """
+    def __init__(self, num_threads=4, min_run=2):
+        if num_threads < 1:
+            raise ValueError("A read executor needs at least one thread")
+        self.num_threads = num_threads
+        self.min_run = min_run  #Shorter runs are served inline, the pool would only add latency
+        self.pool = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="read") if num_threads > 1 else None
+
+    def run_reads(self, transaction_manager, reads):
+        """Serves (Read operation, time) pairs and returns their values in the same order"""
+        if self.pool is None or len(reads) < self.min_run:
+            return self.run_chunk(transaction_manager, reads)
+        chunk_size = -(-len(reads) // self.num_threads)
+        chunks = [reads[start:start + chunk_size] for start in range(0, len(reads), chunk_size)]
+        values = []
+        for chunk_values in self.pool.map(lambda chunk: self.run_chunk(transaction_manager, chunk), chunks):
+            values.extend(chunk_values)
+        return values
+
+    def run_chunk(self, transaction_manager, reads):
+        """Serves reads one after the other on the calling thread"""
+        return [operation.run(transaction_manager, current_time) for operation, current_time in reads]
+
+    def shutdown(self):
+        """Stops the worker threads"""
+        if self.pool is not None:
+            self.pool.shutdown()
@@ -0,0 +1,155 @@
+import bisect
+import hashlib
+import logging
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class Placement:
+    """
+    Decides which sites hold a copy of every variable.
+    Policies:
+    - default: even-indexed variables on every site, odd-indexed ones on site i % num_sites + 1
+    - full: every variable on every site
+    - kway: replication_factor copies per variable on consecutive sites of a consistent hash ring
+    - explicit: the sites listed for every variable in a placement file, one "x<i>: <site> <site> ..." per line
+    A variable with more than one copy is replicated: after a site recovers, its copy cannot be
+    read until a new commit, and writes go to every available copy.
+    """
+    POLICIES = ("default", "full", "kway", "explicit")
+
+    def __init__(self, num_variables=20, num_sites=10, policy="default", replication_factor=None,
+                 placement_file=None, virtual_nodes=64):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown placement policy {policy}")
+        self.num_variables = num_variables
+        self.num_sites = num_sites
+        self.policy = policy
+        self.site_variables = None
+        #The default and full policies are rules computed per lookup, so they cost nothing to build.
+        #Fully replicated variables share one tuple of site ids.
+        self.all_sites = tuple(range(1, num_sites + 1))
+        self.site_map = None
+        if policy == "kway":
+            if not replication_factor or not 1 <= replication_factor <= num_sites:
+                raise ValueError(f"k-way placement needs a replication factor between 1 and {num_sites}")
+            self.site_map = self.consistent_hash_placement(replication_factor, virtual_nodes)
+        elif policy == "explicit":
+            if placement_file is None:
+                raise ValueError("Explicit placement needs a placement file")
+            self.site_map = self.load_placement_file(placement_file)
+        if self.site_map is not None and num_variables <= 100:
+            log.debug(f"Placement {policy}: {self.site_map}")
+
+    def consistent_hash_placement(self, replication_factor, virtual_nodes):
+        """
+        Places every variable on the first replication_factor distinct sites met walking
+        clockwise from its hash on a ring holding virtual_nodes points per site.
+        Adding or removing a site only moves the variables next to its points.
+        """
+        ring = sorted((self.ring_hash(f"site{site_id}#{point}"), site_id)
+                      for site_id in range(1, self.num_sites + 1) for point in range(virtual_nodes))
+        positions = [position for position, _ in ring]
+        site_map = {}
+        for i in range(1, self.num_variables + 1):
+            start = bisect.bisect(positions, self.ring_hash(f"x{i}"))
+            sites = []
+            for offset in range(len(ring)):
+                site_id = ring[(start + offset) % len(ring)][1]
+                if site_id not in sites:
+                    sites.append(site_id)
+                    if len(sites) == replication_factor:
+                        break
+            site_map[i] = tuple(sorted(sites))
+        return site_map
+
+    def ring_hash(self, key):
+        """Returns a stable 64-bit position on the hash ring"""
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def load_placement_file(self, placement_file):
+        """Reads "x<i>: <site> <site> ..." lines, ignoring blank lines and # comments. Every variable must be listed."""
+        site_map = {}
+        with open(placement_file, "r") as file:
+            for line_number, line in enumerate(file, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                variable, _, sites = line.partition(":")
+                try:
+                    var_idx = int(variable.strip()[1:])
+                    site_ids = tuple(sorted({int(site_id) for site_id in sites.replace(",", " ").split()}))
+                except ValueError:
+                    raise ValueError(f"{placement_file}:{line_number}: expected 'x<i>: <site> <site> ...'")
+                if not 1 <= var_idx <= self.num_variables or not site_ids \
+                        or not all(1 <= site_id <= self.num_sites for site_id in site_ids):
+                    raise ValueError(f"{placement_file}:{line_number}: variable or site out of range")
+                site_map[var_idx] = site_ids
+        missing = [f"x{i}" for i in range(1, self.num_variables + 1) if i not in site_map]
+        if missing:
+            raise ValueError(f"{placement_file}: no sites listed for {', '.join(missing)}")
+        return dict(sorted(site_map.items()))
+
+    def sites_for(self, var_idx):
+        """Returns the ids of the sites holding a copy of the variable, in increasing order"""
+        if self.site_map is not None:
+            return self.site_map[var_idx]
+        if not 1 <= var_idx <= self.num_variables:
+            raise KeyError(var_idx)
+        if self.policy == "full" or var_idx % 2 == 0:
+            return self.all_sites
+        return (var_idx % self.num_sites + 1,)
+
+    def primary_site(self, var_idx):
+        """Returns the id of the lowest site holding the variable, the only one for an unreplicated variable"""
+        return self.sites_for(var_idx)[0]
+
+    def is_replicated(self, var_idx):
+        """Checks if the variable has copies on more than one site"""
+        return len(self.sites_for(var_idx)) > 1
+
+    def variables_at(self, site_id):
+        """Returns the ids of the variables a site holds, in increasing order"""
+        if self.site_map is None:
+            if self.policy == "full" or self.num_sites == 1:
+                return range(1, self.num_variables + 1)
+            #Even variables everywhere, plus the odd ones i with i % num_sites + 1 == site_id
+            odd = [i for i in range(site_id - 1 or self.num_sites, self.num_variables + 1, self.num_sites) if i % 2]
+            return sorted(list(range(2, self.num_variables + 1, 2)) + odd)
+        if self.site_variables is None:
+            #Inverted once, in a single pass over all copies
+            site_variables = {i: [] for i in range(1, self.num_sites + 1)}
+            for var_idx, site_ids in self.site_map.items():
+                for held_at in site_ids:
+                    site_variables[held_at].append(var_idx)
+            self.site_variables = site_variables
+        return self.site_variables[site_id]
+
+    def holds(self, site_id, var_idx):
+        """Checks if a site holds a copy of the variable"""
+        if self.site_map is None:
+            return 1 <= var_idx <= self.num_variables and (self.policy == "full" or var_idx % 2 == 0
+                                                           or var_idx % self.num_sites + 1 == site_id)
+        return site_id in self.site_map[var_idx]
+
+    def snapshot(self):
+        """Returns the policy and the copies per variable as a JSON-serializable dict"""
+        if self.site_map is None:
+            replicated = self.num_variables if self.policy == "full" else self.num_variables // 2
+            replicated = replicated if self.num_sites > 1 else 0
+            total = replicated * self.num_sites + (self.num_variables - replicated)
+            return {
+                "policy": self.policy,
+                "copies": total,
+                "mean_replication_factor": total / self.num_variables if self.num_variables else 0,
+                "replicated_variables": replicated,
+            }
+        copies = [len(sites) for sites in self.site_map.values()]
+        return {
+            "policy": self.policy,
+            "copies": sum(copies),
+            "mean_replication_factor": sum(copies) / len(copies) if copies else 0,
+            "replicated_variables": sum(1 for count in copies if count > 1),
+        }
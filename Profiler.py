@@ -0,0 +1,123 @@
+import logging
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class Profiler:
+    """
+    Deterministic profiler for Simulator runs. Every Python and C call is traced through
+    sys.setprofile and its self time is charged to the full call stack, which gives both a
+    per-function hot list and collapsed stacks for flame graphs. tracemalloc records the
+    allocation sites at the same time.
+    """
+    def __init__(self, top=30, traceback_frames=1):
+        self.top = top
+        self.traceback_frames = traceback_frames
+        self.stack = []
+        self.stack_self_ns = defaultdict(int)
+        self.function_stats = defaultdict(lambda: [0, 0, 0])  #calls, self ns, cumulative ns
+        self.allocation_snapshot = None
+        self.peak_allocated = 0
+        self.last_ns = 0
+
+    def frame_label(self, event, frame, arg):
+        """Returns the function label of a call event"""
+        if event.startswith("c_"):
+            module = getattr(arg, "__module__", None) or "builtins"
+            return f"{module}.{getattr(arg, '__qualname__', getattr(arg, '__name__', repr(arg)))}"
+        code = frame.f_code
+        return f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno}:{getattr(code, 'co_qualname', code.co_name)}"
+
+    def trace(self, frame, event, arg):
+        """Profile hook: charges elapsed time to the top of the stack and pushes or pops frames"""
+        now = time.perf_counter_ns()
+        if self.stack:
+            self.stack_self_ns[tuple(label for label, _ in self.stack)] += now - self.last_ns
+        if event in ("call", "c_call"):
+            label = self.frame_label(event, frame, arg)
+            self.stack.append((label, now))
+            self.function_stats[label][0] += 1
+        elif self.stack:
+            stack_key = tuple(label for label, _ in self.stack)
+            label, started = self.stack.pop()
+            #Recursive calls are only charged cumulative time once, at the outermost frame
+            if label not in stack_key[:-1]:
+                self.function_stats[label][2] += now - started
+        self.last_ns = time.perf_counter_ns()
+
+    def start(self):
+        """Starts tracing calls and allocations"""
+        tracemalloc.start(self.traceback_frames)
+        self.last_ns = time.perf_counter_ns()
+        sys.setprofile(self.trace)
+
+    def stop(self):
+        """Stops tracing and keeps the allocation snapshot"""
+        sys.setprofile(None)
+        self.allocation_snapshot = tracemalloc.take_snapshot()
+        self.peak_allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        #Drop the frames of the profiler itself that were traced while stopping
+        for stack_key in [key for key in self.stack_self_ns if key[0].startswith("Profiler.py:")]:
+            del self.stack_self_ns[stack_key]
+        self.function_stats = defaultdict(lambda: [0, 0, 0], {label: stats for label, stats in self.function_stats.items()
+                                                               if not label.startswith("Profiler.py:")})
+        for stack_key, self_ns in self.stack_self_ns.items():
+            self.function_stats[stack_key[-1]][1] += self_ns
+
+    def run(self, function, *args):
+        """Profiles a call and returns its result"""
+        self.start()
+        try:
+            return function(*args)
+        finally:
+            self.stop()
+
+    def hot_list(self):
+        """Returns the hot list, one line per function sorted by self time"""
+        lines = [f"{'calls':>10} {'self ms':>12} {'cumulative ms':>14}  function"]
+        ranked = sorted(self.function_stats.items(), key=lambda item: item[1][1], reverse=True)
+        for label, (calls, self_ns, cumulative_ns) in ranked[:self.top]:
+            lines.append(f"{calls:>10} {self_ns / 1e6:>12.3f} {cumulative_ns / 1e6:>14.3f}  {label}")
+        return "\n".join(lines) + "\n"
+
+    def collapsed_stacks(self):
+        """Returns the stacks in collapsed format ("a;b;c microseconds") for flamegraph.pl or speedscope"""
+        lines = []
+        for stack_key, self_ns in sorted(self.stack_self_ns.items()):
+            if self_ns >= 1000:
+                lines.append(f"{';'.join(stack_key)} {self_ns // 1000}")
+        return "\n".join(lines) + "\n"
+
+    def top_allocations(self):
+        """Returns the allocation sites still holding the most memory at the end of the run"""
+        stats = self.allocation_snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]).statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        lines = [f"Peak traced: {self.peak_allocated / 1024:.1f} KiB",
+                 f"Live at end: {total / 1024:.1f} KiB in {sum(stat.count for stat in stats)} blocks"]
+        for stat in stats[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {frame.filename.rsplit('/', 1)[-1]}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, trace_file):
+        """Writes the hot list, collapsed stacks and allocation sites next to the trace file"""
+        reports = {
+            f"{trace_file}.hotlist.txt": self.hot_list(),
+            f"{trace_file}.collapsed": self.collapsed_stacks(),
+            f"{trace_file}.alloc.txt": self.top_allocations(),
+        }
+        for path, content in reports.items():
+            with open(path, "w") as file:
+                file.write(content)
+        log.info(f"Profile written to {', '.join(reports)}")
+        return list(reports)
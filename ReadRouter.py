@@ -0,0 +1,73 @@
+import logging
+import random
+import threading
+from collections import defaultdict
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class ReadRouter:
+    """
+    Chooses the order in which the replicas of a replicated variable are tried for a read.
+    Policies:
+    - first: site order, the first eligible site serves every read
+    - round_robin: start one site further on every read
+    - least_loaded: fewest reads in flight, then fewest reads served
+    - random: a seeded shuffle
+    - affinity: sites the transaction already read from, then a site derived from its id,
+      so each transaction sticks to one replica while it stays available
+    Also counts the reads served by every site to show how balanced the load is.
+    """
+    POLICIES = ("first", "round_robin", "least_loaded", "random", "affinity")
+
+    def __init__(self, policy="first", seed=0):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown read routing policy {policy}")
+        self.policy = policy
+        self.random = random.Random(seed)
+        self.next_start = 0
+        self.in_flight = defaultdict(int)
+        self.reads_served = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def order_sites(self, sites, txn_obj):
+        """Returns the candidate sites in the order they should be tried"""
+        if self.policy == "first" or not sites:
+            return sites
+        with self.lock:
+            if self.policy == "round_robin":
+                start = self.next_start % len(sites)
+                self.next_start += 1
+                return sites[start:] + sites[:start]
+            if self.policy == "least_loaded":
+                return sorted(sites, key=lambda site: (self.in_flight[site.get_id()], self.reads_served[site.get_id()]))
+            if self.policy == "random":
+                return self.random.sample(sites, len(sites))
+        start = txn_obj.get_id() % len(sites)
+        rotated = sites[start:] + sites[:start]
+        accessed = set(txn_obj.get_sites_accessed())
+        return [site for site in rotated if site.get_id() in accessed] + [site for site in rotated if site.get_id() not in accessed]
+
+    def start_read(self, site_id):
+        """Marks a read in flight at a site"""
+        with self.lock:
+            self.in_flight[site_id] += 1
+
+    def finish_read(self, site_id):
+        """Marks a read at a site as served"""
+        with self.lock:
+            self.in_flight[site_id] -= 1
+            self.reads_served[site_id] += 1
+
+    def snapshot(self):
+        """Returns the policy and the reads served per site as a JSON-serializable dict"""
+        with self.lock:
+            served = dict(sorted(self.reads_served.items()))
+        mean = sum(served.values()) / len(served) if served else 0
+        return {
+            "policy": self.policy,
+            "reads_per_site": served,
+            "max_to_mean": max(served.values()) / mean if mean else 0,
+        }
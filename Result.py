@@ -0,0 +1,44 @@
+import logging
+from enum import Enum
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class ResultStatus(Enum):
+    OK = "OK"
+    COMMITTED = "COMMITTED"
+    ABORTED = "ABORTED"
+    WAITING = "WAITING"
+    QUEUED = "QUEUED"
+    ERROR = "ERROR"
+
+class Result:
+    """
+    The outcome of one operation of a batch: its status, the value of a read,
+    the reason of an abort and the logical time the operation ran at.
+    """
+    def __init__(self, operation, status, value=None, abort_reason=None, time=None):
+        self.operation = operation
+        self.status = status
+        self.value = value
+        self.abort_reason = abort_reason
+        self.time = time
+
+    def ok(self):
+        """Checks if the operation went through: a read served, a write applied or a commit"""
+        return self.status in (ResultStatus.OK, ResultStatus.COMMITTED)
+
+    def as_dict(self):
+        """Returns the result as a JSON-serializable dict"""
+        return {
+            "operation": repr(self.operation),
+            "status": self.status.value,
+            "value": self.value,
+            "abort_reason": self.abort_reason.value if self.abort_reason else None,
+            "time": self.time,
+        }
+
+    def __repr__(self):
+        return f"Result({self.operation!r}, {self.status.value}, value={self.value}, abort_reason={self.abort_reason})"
@@ -0,0 +1,57 @@
+import json
+import logging
+import sys
+import threading
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class ResultSink:
+    """
+    Writes the outcomes of a run as JSON Lines, one record per outcome, apart from the diagnostic log.
+    Every record has a "type" and the logical "time" it happened at:
+    - read: txn, variable, value and the site that served it (None for the transaction's own cache)
+    - commit: txn and whether it was read_only
+    - abort: txn and the AbortReason
+    - site: site and its new status
+    - dump: the status and committed values of every site
+    - asof, stats, timing and error: the instruction and virtual time run results the command line otherwise prints
+    Records are buffered and written buffer_records at a time, to a file or to stdout for "-".
+    """
+    def __init__(self, target="-", buffer_records=1024):
+        self.target = target
+        self.file = sys.stdout if target == "-" else open(target, "w", encoding="utf-8")
+        self.buffer_records = buffer_records
+        self.pending = []
+        self.records = 0
+        self.lock = threading.Lock()  #Reads of a batch may be served on several threads
+
+    def emit(self, record_type, time, **fields):
+        """Buffers one record, writing the buffer out once it holds buffer_records records"""
+        line = json.dumps({"type": record_type, "time": time, **fields}, separators=(",", ":"), default=str)
+        with self.lock:
+            self.pending.append(line)
+            self.records += 1
+            if len(self.pending) >= self.buffer_records:
+                self.write_pending()
+
+    def write_pending(self):
+        """Writes the buffered records, the caller holds the lock"""
+        if self.pending:
+            self.file.write("\n".join(self.pending) + "\n")
+            self.pending = []
+
+    def flush(self):
+        """Writes the buffered records and flushes the file"""
+        with self.lock:
+            self.write_pending()
+            self.file.flush()
+
+    def close(self):
+        """Flushes the records and closes the file, stdout stays open"""
+        self.flush()
+        if self.file is not sys.stdout:
+            self.file.close()
+        log.debug(f"Wrote {self.records} result records to {self.target}")
@@ -0,0 +1,27 @@
+import logging
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class RetryPolicy:
+    """
+    Exponential backoff, in logical ticks, for re-executing aborted transactions.
+    Retry n waits base_backoff * 2^(n-1) ticks, at most max_backoff, and a transaction
+    is given up after max_retries retries.
+    """
+    def __init__(self, max_retries=3, base_backoff=1, max_backoff=64):
+        if max_retries < 0 or base_backoff < 1 or max_backoff < base_backoff:
+            raise ValueError("Invalid retry policy")
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    def should_retry(self, attempt):
+        """Checks if the given retry number is still allowed"""
+        return attempt <= self.max_retries
+
+    def backoff(self, attempt):
+        """Returns the ticks to wait before the given retry number"""
+        return min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
@@ -0,0 +1,164 @@
+import logging
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain as chain_iterables
+from operator import itemgetter
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class SegmentVersionStore:
+    """
+    Stores the version chains of every variable of a site with the newest versions in memory
+    and older ones spilled to append-only segment files that are memory-mapped for reads.
+
+    Versions are appended to per-variable lists in memory. Once more than memory_versions of them
+    are held, all but the newest keep_recent versions of every variable are written to a new segment
+    file as (commit time, value) int64 records, grouped by variable and ordered by commit time.
+    The index maps every variable to its (segment, first record, count, first commit time) runs,
+    oldest first, so a lookup bisects the memory list and then at most one run of one segment.
+    Offers the same methods as ColumnarVersionStore, without needing numpy.
+    """
+    def __init__(self, directory, memory_versions=65536, keep_recent=1):
+        if keep_recent < 1:
+            raise ValueError("The newest version of every variable must stay in memory")
+        self.directory = directory
+        self.memory_versions = memory_versions
+        self.keep_recent = keep_recent
+        self.recent = {}
+        self.in_memory = 0
+        self.spill_at = memory_versions
+        self.index = {}
+        self.segments = []  #(mmap, int64 view) of every segment file
+        self.spilled = 0
+        self.lock = threading.Lock()
+
+    def append(self, var_id, commit_time, value):
+        """Appends a committed version. Versions of a variable arrive in commit time order."""
+        with self.lock:
+            self.recent.setdefault(var_id, []).append((commit_time, value))
+            self.in_memory += 1
+            if self.in_memory > self.spill_at:
+                self.spill()
+
+    def spill(self):
+        """
+        Writes all but the newest keep_recent versions of every variable to a new segment file.
+        The next spill comes after memory_versions more appends, whatever stayed in memory.
+        """
+        records = array('q')
+        runs = []
+        for var_id in sorted(self.recent):
+            chain = self.recent[var_id]
+            if len(chain) <= self.keep_recent:
+                continue
+            spilled = chain[:-self.keep_recent]
+            runs.append((var_id, len(records) // 2, len(spilled), spilled[0][0]))
+            records.extend(chain_iterables.from_iterable(spilled))
+            self.recent[var_id] = chain[-self.keep_recent:]
+        self.in_memory -= len(records) // 2
+        self.spill_at = self.in_memory + self.memory_versions
+        if not runs:
+            return
+        segment_no = len(self.segments)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"segment-{segment_no:06d}.bin")
+        with open(path, "wb") as file:
+            records.tofile(file)
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.segments.append((mapped, memoryview(mapped).cast('q')))
+        for var_id, first_record, count, first_time in runs:
+            self.index.setdefault(var_id, []).append((segment_no, first_record, count, first_time))
+        count = len(records) // 2
+        self.spilled += count
+        log.debug(f"Spilled {count} versions of {len(runs)} variables to {path}")
+
+    def find_version(self, var_id, timestamp, inclusive):
+        """Returns the (commit time, value) of the last version before (or at) timestamp, or None"""
+        search = bisect_right if inclusive else bisect_left
+        with self.lock:
+            chain = self.recent.get(var_id, ())
+            i = search(chain, timestamp, key=itemgetter(0))
+            if i:
+                return chain[i - 1]
+            #Older versions are on disk, in the last run starting before the timestamp
+            for segment_no, first_record, count, first_time in reversed(self.index.get(var_id, ())):
+                if first_time < timestamp or (inclusive and first_time == timestamp):
+                    view = self.segments[segment_no][1]
+                    k = search(range(count), timestamp, key=lambda record: view[2 * (first_record + record)]) - 1
+                    position = 2 * (first_record + k)
+                    return view[position], view[position + 1]
+            return None
+
+    def find_snapshot_before_time(self, var_id, timestamp):
+        """Returns the value of the most recent version strictly before timestamp, or None"""
+        version = self.find_version(var_id, timestamp, inclusive=False)
+        return version[1] if version else None
+
+    def find_time_of_snapshot_before(self, var_id, timestamp):
+        """Returns the commit time of the most recent version strictly before timestamp, or None"""
+        version = self.find_version(var_id, timestamp, inclusive=False)
+        return version[0] if version else None
+
+    def most_recent_snapshot_time(self, var_id):
+        """Returns the commit time of the latest version of a variable"""
+        chain = self.recent.get(var_id)
+        return chain[-1][0] if chain else float('-inf')
+
+    def most_recent_snapshot_value(self, var_id):
+        """Returns the value of the latest version of a variable"""
+        chain = self.recent.get(var_id)
+        return chain[-1][1] if chain else None
+
+    def get_snapshots(self, var_id):
+        """Returns the version chain of a variable as a list of (commit time, value) tuples"""
+        with self.lock:
+            snapshots = []
+            for segment_no, first_record, count, _ in self.index.get(var_id, ()):
+                view = self.segments[segment_no][1]
+                records = view[2 * first_record:2 * (first_record + count)].tolist()
+                snapshots.extend(zip(records[0::2], records[1::2]))
+            snapshots.extend(self.recent.get(var_id, ()))
+            return snapshots
+
+    def values_as_of(self, timestamp, inclusive=True):
+        """
+        Returns (variable ids, commit times, values) arrays holding, for every variable,
+        its last version committed before (or at) timestamp.
+        """
+        var_ids, commit_times, values = array('q'), array('q'), array('q')
+        for var_id in sorted(self.recent):
+            version = self.find_version(var_id, timestamp, inclusive)
+            if version is not None:
+                var_ids.append(var_id)
+                commit_times.append(version[0])
+                values.append(version[1])
+        return var_ids, commit_times, values
+
+    def latest_values(self):
+        """Returns (variable ids, commit times, values) arrays of the latest version of every variable"""
+        with self.lock:
+            var_ids = array('q', sorted(self.recent))
+            return (var_ids, array('q', (self.recent[var_id][-1][0] for var_id in var_ids)),
+                    array('q', (self.recent[var_id][-1][1] for var_id in var_ids)))
+
+    def chain_lengths(self):
+        """Returns (variable ids, number of versions) arrays"""
+        with self.lock:
+            var_ids = array('q', sorted(self.recent))
+            return var_ids, array('q', (len(self.recent[var_id]) + sum(run[2] for run in self.index.get(var_id, ()))
+                                        for var_id in var_ids))
+
+    def close(self):
+        """Unmaps the segment files, the store cannot be read afterwards"""
+        with self.lock:
+            for mapped, view in self.segments:
+                view.release()
+                mapped.close()
+            self.segments = []
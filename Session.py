@@ -0,0 +1,42 @@
+import logging
+from Transaction import TransactionStatus
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class Session:
+    """
+    A client session driving its own transactions against a shared TransactionManager.
+    Every session is meant to be used from a single thread, while many sessions may
+    run concurrently. Each operation takes a fresh timestamp from the shared clock.
+    """
+    def __init__(self, transaction_manager):
+        self.transaction_manager = transaction_manager
+        self.txn_name = None
+
+    def begin(self, txn_name):
+        """Starts a new transaction on this session"""
+        if self.txn_name is not None:
+            log.warning(f"Session is still running transaction {self.txn_name}, cannot begin {txn_name}")
+            return False
+        self.txn_name = txn_name
+        #The start timestamp is drawn inside the commit critical section
+        self.transaction_manager.begin_transaction(txn_name, None)
+        return True
+
+    def read(self, variable):
+        """Reads a variable from the transaction snapshot and returns its value"""
+        return self.transaction_manager.read_request(self.txn_name, variable, self.transaction_manager.tick())
+
+    def write(self, variable, value):
+        """Writes a value to all available copies of a variable"""
+        self.transaction_manager.write_request(self.txn_name, variable, value, self.transaction_manager.tick())
+
+    def end(self):
+        """Ends the running transaction and returns whether it committed"""
+        #The commit timestamp is drawn inside the commit critical section
+        status = self.transaction_manager.end_transaction(self.txn_name, None)
+        self.txn_name = None
+        return status == TransactionStatus.COMMITTED
@@ -1,27 +1,72 @@
+import argparse
+import json
+import os
 import re
 import sys
+import time
 from TransactionManager import TransactionManager
 from SiteManager import SiteManager
+from Metrics import Metrics
+from AdmissionController import AdmissionController
+from RetryPolicy import RetryPolicy
+from ReadRouter import ReadRouter
+from ConcurrencyControl import ConcurrencyControl
+from ParallelReadExecutor import ParallelReadExecutor
+from Placement import Placement
+from BulkLoader import BulkLoader
+from ResultSink import ResultSink
+from Operation import Begin, Read, MultiRead, Scan, Write, End, Fail, Recover
 import logging
 """
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class Simulator:
-    def __init__(self):
+    def __init__(self, storage_backend="objects", metrics_enabled=False, stats_file=None, stats_interval=10.0,
+                 validation_mode="cycle", max_active=None, adaptive_admission=False, target_abort_rate=0.2,
+                 retry_policy=None, evict_finished=False, read_policy="first", num_variables=20, num_sites=10,
+                 placement_policy="default", replication_factor=None, placement_file=None, initial_state_file=None,
+                 read_threads=1, storage_dir=None, results_file=None, concurrency="ssi"):
         self.current_time = 0
-        self.num_variables = 20  #Set the number of variables
-        self.num_sites = 10  #Set the number of sites
-        self.site_manager = SiteManager(self.num_sites)  #Create a SiteManager instance
-        self.transaction_manager = TransactionManager(self.num_variables, self.num_sites, self.site_manager)
+        #Initial values default to 10 * i unless bulk loaded, the file may add variables
+        self.initial_state = BulkLoader().load(initial_state_file) if initial_state_file else None
+        if self.initial_state is not None:
+            num_variables = max(num_variables, self.initial_state.num_variables)
+            self.initial_state.resize(num_variables)
+        self.num_variables = num_variables  #Set the number of variables
+        self.num_sites = num_sites  #Set the number of sites
+        self.placement = Placement(num_variables, num_sites, placement_policy, replication_factor, placement_file)
+        #A periodic snapshot file needs the metrics to be collected
+        self.metrics = Metrics(metrics_enabled or stats_file is not None)
+        self.stats_file = stats_file
+        self.stats_interval = stats_interval
+        self.last_stats_write = time.monotonic()
+        #Outcomes go to a JSON Lines file (or stdout for "-") when one is given, otherwise only to the log
+        self.result_sink = ResultSink(results_file) if results_file else None
+        self.site_manager = SiteManager(self.num_sites, storage_backend, self.placement, self.initial_state,
+                                        storage_dir, self.result_sink)  #Create a SiteManager instance
+        #Admission control is off unless a cap on active transactions is given
+        self.admission = AdmissionController(max_active, adaptive_admission, target_abort_rate) if max_active else None
+        self.transaction_manager = TransactionManager(self.num_variables, self.num_sites, self.site_manager, self.metrics,
+                                                      validation_mode, self.admission, retry_policy, evict_finished,
+                                                      read_router=ReadRouter(read_policy),
+                                                      read_executor=ParallelReadExecutor(read_threads) if read_threads > 1 else None,
+                                                      result_sink=self.result_sink,
+                                                      concurrency_control=ConcurrencyControl.create(concurrency))
+        self.instruction_patterns = {
+            "BEGIN": r"begin\((\w+)\)",
+            "BEGIN_RO": r"beginRO\((\w+)\)",
+            "READ": r"R\((\w+),\s*(\w+)\)",
+            "WRITE": r"W\((\w+),\s*(\w+),\s*(\d+)\)",
+            "MULTI_READ": r"MR\((\w+),\s*(\w+(?:\s*,\s*\w+)*)\)",
+            "SCAN": r"SCAN\((\w+),\s*(\w+),\s*(\w+)\)",
+            "END": r"end\((\w+)\)",
+            "FAIL": r"fail\((\d+)\)",
+            "RECOVER": r"recover\((\d+)\)",
+            "ASOF": r"asof\((\d+)\)",
+        }
 
     def trim(self, string):
         """Utility function to trim whitespace"""
@@ -35,10 +80,16 @@ class Simulator:
         """Classify instruction type based on its prefix"""
         if line.startswith("begin("):
             return "BEGIN"
+        if line.startswith("beginRO("):
+            return "BEGIN_RO"
         if line.startswith("R("):
             return "READ"
         if line.startswith("W("):
             return "WRITE"
+        if line.startswith("MR("):
+            return "MULTI_READ"
+        if line.startswith("SCAN("):
+            return "SCAN"
         if line.startswith("end("):
             return "END"
         if line.startswith("fail("):
@@ -47,73 +98,318 @@ class Simulator:
             return "RECOVER"
         if line == "dump()":
             return "DUMP"
+        if line.startswith("asof("):
+            return "ASOF"
+        if line == "stats()":
+            return "STATS"
         return "UNKNOWN"
 
-    def process_instruction(self, line):
-        """Process a single instruction."""
+    def parse_instruction(self, line):
+        """
+        Parses one instruction line into its type and arguments.
+        Returns None for empty lines and comments, and ("UNKNOWN", line) when it cannot be parsed.
+        """
         trimmed_line = self.trim(line)
 
         #Skip empty lines and comments
         if not trimmed_line or trimmed_line.startswith("/"):
-            return
-
-        #Increment current time with each instruction
-        self.current_time += 1
-        log.debug(f"Processing instruction at time {self.current_time}: {trimmed_line}")
+            return None
 
         instruction_type = self.get_instruction_type(trimmed_line)
+        pattern = self.instruction_patterns.get(instruction_type)
+        if pattern is None:
+            return (instruction_type, ()) if instruction_type in ("DUMP", "STATS") else ("UNKNOWN", (trimmed_line,))
+        match = self.match_instruction(trimmed_line, pattern)
+        if not match:
+            return ("UNKNOWN", (trimmed_line,))
+        return (instruction_type, match.groups())
+
+    def execute_instruction(self, instruction_type, args, current_time):
+        """
+        Executes a parsed instruction at the given time and returns its result:
+        the value for a read, {variable: value} for a multi-read or scan, the final status for an end, the point-in-time view
+        for an asof, the metrics for stats, otherwise None.
+        When metrics are enabled, counts and times the instruction by type.
+        """
+        if not self.metrics.enabled:
+            return self.dispatch_instruction(instruction_type, args, current_time)
 
+        start = time.perf_counter()
+        result = self.dispatch_instruction(instruction_type, args, current_time)
+        self.metrics.observe(f"instruction_seconds.{instruction_type}", time.perf_counter() - start)
+        self.metrics.increment(f"instructions.{instruction_type}")
+        if self.stats_file and time.monotonic() - self.last_stats_write >= self.stats_interval:
+            self.write_stats_snapshot()
+        return result
+
+    def dispatch_instruction(self, instruction_type, args, current_time):
+        """Runs a parsed instruction against the transaction and site managers"""
         if instruction_type == "BEGIN":
-            match = self.match_instruction(trimmed_line, r"begin\((\w+)\)")
-            if match:
-                self.transaction_manager.begin_transaction(match.group(1), self.current_time)
+            self.transaction_manager.begin_transaction(args[0], current_time)
+
+        elif instruction_type == "BEGIN_RO":
+            self.transaction_manager.begin_transaction(args[0], current_time, read_only=True)
 
         elif instruction_type == "READ":
-            match = self.match_instruction(trimmed_line, r"R\((\w+),\s*(\w+)\)")
-            if match:
-                self.transaction_manager.read_request(match.group(1), match.group(2), self.current_time)
+            return self.transaction_manager.read_request(args[0], args[1], current_time)
+
+        elif instruction_type == "MULTI_READ":
+            return self.transaction_manager.multi_read_request(args[0], re.split(r"\s*,\s*", args[1]), current_time)
+
+        elif instruction_type == "SCAN":
+            return self.transaction_manager.scan_request(args[0], args[1], args[2], current_time)
 
         elif instruction_type == "WRITE":
-            match = self.match_instruction(trimmed_line, r"W\((\w+),\s*(\w+),\s*(\d+)\)")
-            if match:
-                self.transaction_manager.write_request(match.group(1), match.group(2), int(match.group(3)), self.current_time)
+            self.transaction_manager.write_request(args[0], args[1], int(args[2]), current_time)
 
         elif instruction_type == "END":
-            match = self.match_instruction(trimmed_line, r"end\((\w+)\)")
-            if match:
-                self.transaction_manager.end_transaction(match.group(1), self.current_time)
+            return self.transaction_manager.end_transaction(args[0], current_time)
 
         elif instruction_type == "FAIL": #To fail a site with a specific id
-            match = self.match_instruction(trimmed_line, r"fail\((\d+)\)")
-            if match:
-                log.info(f"Site {match.group(1)} failed")
-                self.transaction_manager.handle_site_failure(match.group(1))
+            log.info(f"Site {args[0]} failed")
+            self.transaction_manager.handle_site_failure(args[0])
         elif instruction_type == "RECOVER": #To recover a site with a specific id
-            match = self.match_instruction(trimmed_line, r"recover\((\d+)\)")
-            if match:
-                log.info(f"Site {match.group(1)} recovered")
-                self.transaction_manager.handle_site_recovery(match.group(1),self.current_time)
+            log.info(f"Site {args[0]} recovered")
+            self.transaction_manager.handle_site_recovery(args[0],current_time)
 
         elif instruction_type == "DUMP":
             log.info("Executing DUMP command...")
-            self.site_manager.dump() 
+            self.site_manager.dump(current_time)
+
+        elif instruction_type == "ASOF":
+            return self.as_of(int(args[0]))
+
+        elif instruction_type == "STATS":
+            return self.stats()
+        elif self.result_sink is not None:
+            self.result_sink.emit("error", current_time, instruction=args[0], error="unknown instruction")
         else:
-            print(f"Unknown instruction: {trimmed_line}")
+            print(f"Unknown instruction: {args[0]}")
+        return None
+
+    def execute_batch(self, operations):
+        """
+        Runs typed operations without parsing, see TransactionManager.execute_batch.
+        Logs the operations that did not go through.
+        """
+        results = self.transaction_manager.execute_batch(operations)
+        self.current_time = self.transaction_manager.current_time
+        for result in results:
+            if not result.ok():
+                log.info(f"Batch operation not applied: {json.dumps(result.as_dict())}")
+        return results
+
+    def as_of(self, timestamp):
+        """Returns the values of all variables as of logical time timestamp"""
+        return {"asof": timestamp, "values": self.site_manager.as_of(timestamp)}
+
+    def stats(self):
+        """Returns the engine counters, latency histograms and gauges"""
+        return self.metrics.snapshot(self.transaction_manager.collect_gauges())
+
+    def write_stats_snapshot(self):
+        """Atomically replaces the stats file with the current stats as JSON"""
+        self.last_stats_write = time.monotonic()
+        temp_file = f"{self.stats_file}.tmp"
+        with open(temp_file, "w") as file:
+            json.dump(self.stats(), file, indent=2)
+        os.replace(temp_file, self.stats_file)
+
+    def process_instruction(self, line):
+        """Process a single instruction."""
+        parsed = self.parse_instruction(line)
+        if parsed is None:
+            return None
+
+        #Increment current time with each instruction on the clock shared with concurrent sessions
+        self.current_time = self.transaction_manager.tick()
+        log.debug(f"Processing instruction at time {self.current_time}: {self.trim(line)}")
+
+        instruction_type, args = parsed
+        result = self.execute_instruction(instruction_type, args, self.current_time)
+        if self.transaction_manager.retry_policy is not None:
+            self.transaction_manager.process_due_retries(self.current_time)
+        if instruction_type in ("ASOF", "STATS"):
+            if self.result_sink is not None:
+                self.result_sink.emit(instruction_type.lower(), self.current_time, result=result)
+            else:
+                print(json.dumps(result))
+        return result
 
     def run(self, input_file):
         """Run the simulator by processing instructions from the input file."""
         try:
+            read_executor = self.transaction_manager.read_executor
+            reads = []  #Consecutive reads, run as one batch so the read executor can serve them in parallel
             with open(input_file, "r") as file:
                 for line in file:
+                    if read_executor is not None:
+                        parsed = self.parse_instruction(line)
+                        if parsed is not None and parsed[0] == "READ":
+                            reads.append(Read(*parsed[1]))
+                            continue
+                        if reads:
+                            self.execute_batch(reads)
+                            reads = []
                     self.process_instruction(line)
+            if reads:
+                self.execute_batch(reads)
+            #Let the retries still backing off run to completion
+            self.current_time = self.transaction_manager.drain_retries()
+            if self.admission is not None:
+                admission = self.admission.snapshot()
+                log.info(f"Admission: {admission['committed']} committed, {admission['aborted']} aborted, "
+                         f"goodput {admission['goodput_ops_per_second']:.1f} committed ops/s, final cap {admission['cap']}")
+            if self.stats_file:
+                self.write_stats_snapshot()
         except FileNotFoundError:
             print(f"Error: File {input_file} not found")
         except Exception as e:
             print(f"An error occurred: {e}")         
+        finally:
+            if self.result_sink is not None:
+                self.result_sink.flush()
+
+    def load_timed_workload(self, input_file):
+        """
+        Reads an instruction file as the workload of a virtual time run: the operations of every transaction,
+        in file order, form its script, placed where it begins, and fail and recover stay where they are.
+        Other instructions need a point in the logical order and are skipped.
+        """
+        workload, scripts = [], {}
+        with open(input_file, "r") as file:
+            for line in file:
+                parsed = self.parse_instruction(line)
+                if parsed is None:
+                    continue
+                instruction_type, args = parsed
+                if instruction_type in ("BEGIN", "BEGIN_RO"):
+                    scripts[args[0]] = [Begin(args[0], read_only=instruction_type == "BEGIN_RO")]
+                    workload.append(scripts[args[0]])
+                elif instruction_type in ("READ", "MULTI_READ", "SCAN", "WRITE", "END") and args[0] in scripts:
+                    if instruction_type == "READ":
+                        operation = Read(*args)
+                    elif instruction_type == "MULTI_READ":
+                        operation = MultiRead(args[0], re.split(r"\s*,\s*", args[1]))
+                    elif instruction_type == "SCAN":
+                        operation = Scan(*args)
+                    else:
+                        operation = Write(*args) if instruction_type == "WRITE" else End(*args)
+                    scripts[args[0]].append(operation)
+                elif instruction_type in ("FAIL", "RECOVER"):
+                    workload.append(Fail(args[0]) if instruction_type == "FAIL" else Recover(args[0]))
+                else:
+                    log.warning(f"Skipping {self.trim(line)} in the virtual time run")
+        return workload
+
+    def run_timed(self, input_file, latency_model, clients=8, think_time=None):
+        """
+        Runs an instruction file as closed-loop clients in virtual time under the delays of latency_model,
+        see DiscreteEventRunner, and returns the summary of the run, also written to the result sink or printed.
+        """
+        from DiscreteEventRunner import DiscreteEventRunner
+        runner = DiscreteEventRunner(self.transaction_manager, latency_model, clients, think_time)
+        try:
+            summary = runner.run(self.load_timed_workload(input_file))
+        finally:
+            if self.result_sink is not None:
+                self.result_sink.flush()
+        self.current_time = self.transaction_manager.current_time
+        if self.result_sink is not None:
+            self.result_sink.emit("timing", self.current_time, result=summary)
+            self.result_sink.flush()
+        else:
+            print(json.dumps(summary))
+        return summary
+
+    def close(self):
+        """Writes out and closes the result sink, stops the read threads and releases the version stores of the sites"""
+        if self.result_sink is not None:
+            self.result_sink.close()
+        if self.transaction_manager.read_executor is not None:
+            self.transaction_manager.read_executor.shutdown()
+        self.site_manager.close()
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    #Only the command line configures logging, importing the modules leaves it to the embedding program
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("app.log"), logging.StreamHandler()]
+    )
+    parser = argparse.ArgumentParser(description="Replicated concurrency control simulator")
+    parser.add_argument("input_file", nargs="?", help="file of instructions to run")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="serve the instruction language on tcp:HOST:PORT or unix:PATH instead of running a file")
+    parser.add_argument("--storage", choices=["objects", "columnar", "segments"], default="objects",
+                        help="version store of each data manager (columnar requires numpy, segments spills old versions to disk)")
+    parser.add_argument("--storage-dir", help="directory of the segment files of the segments storage (a temporary one by default)")
+    parser.add_argument("--results", metavar="FILE",
+                        help="write every read, commit, abort, site change and dump as a JSON line to FILE ('-' for stdout)")
+    parser.add_argument("--metrics", action="store_true", help="collect engine counters and latency histograms")
+    parser.add_argument("--stats-file", help="periodically write the stats as JSON to this file (enables metrics)")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="seconds between stats file snapshots")
+    parser.add_argument("--concurrency", choices=ConcurrencyControl.PROTOCOLS, default="ssi",
+                        help="concurrency control: serializable snapshot isolation, strict two-phase locking "
+                             "with deadlock detection, or optimistic backward validation")
+    parser.add_argument("--validation", choices=["cycle", "dangerous_structure"], default="cycle",
+                        help="SSI check at commit: any cycle in the serialization graph, or the rw-antidependency pivot pattern")
+    parser.add_argument("--max-active", type=int, help="admit at most this many active transactions, queueing the rest")
+    parser.add_argument("--adaptive-admission", action="store_true",
+                        help="lower the admission cap when the abort rate rises above --target-abort-rate")
+    parser.add_argument("--target-abort-rate", type=float, default=0.2, help="abort rate the adaptive admission cap aims for")
+    parser.add_argument("--retry", type=int, metavar="MAX_RETRIES",
+                        help="re-execute aborted transactions up to MAX_RETRIES times with exponential backoff")
+    parser.add_argument("--retry-backoff", type=int, default=1, help="ticks to wait before the first retry, doubled on each retry")
+    parser.add_argument("--retry-max-backoff", type=int, default=64, help="upper bound on the ticks waited between retries")
+    parser.add_argument("--evict-finished", action="store_true",
+                        help="drop ended transactions no active transaction can conflict with, keeping compact summaries")
+    parser.add_argument("--read-threads", type=int, default=1,
+                        help="serve runs of consecutive snapshot reads of distinct transactions on this many threads")
+    parser.add_argument("--read-policy", choices=ReadRouter.POLICIES, default="first",
+                        help="order in which the replicas of replicated variables are tried for reads")
+    parser.add_argument("--sites", type=int, default=10, help="number of sites")
+    parser.add_argument("--variables", type=int, default=20, help="number of variables")
+    parser.add_argument("--placement", choices=Placement.POLICIES, default="default",
+                        help="which sites hold a copy of every variable")
+    parser.add_argument("--replication-factor", type=int, help="copies per variable for --placement kway")
+    parser.add_argument("--placement-file", help="'x<i>: <site> <site> ...' lines for --placement explicit")
+    parser.add_argument("--initial-state", help="bulk load the initial values from a CSV or binary file of (variable, value) rows")
+    parser.add_argument("--latency-model", metavar="FILE",
+                        help="run the file as concurrent clients in virtual time under the link and site delays of this JSON "
+                             "latency model, reporting the commit latency and throughput")
+    parser.add_argument("--clients", type=int, default=8, help="closed-loop clients of a --latency-model run")
+    parser.add_argument("--think-time", help="delay distribution between the transactions of a client, e.g. exp:5 (ms)")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the trace under a deterministic profiler and tracemalloc, writing the reports next to it")
+    arguments = parser.parse_args()
+    simulator_options = dict(storage_backend=arguments.storage, metrics_enabled=arguments.metrics,
+                             stats_file=arguments.stats_file, stats_interval=arguments.stats_interval,
+                             validation_mode=arguments.validation, max_active=arguments.max_active,
+                             adaptive_admission=arguments.adaptive_admission, target_abort_rate=arguments.target_abort_rate,
+                             retry_policy=RetryPolicy(arguments.retry, arguments.retry_backoff, arguments.retry_max_backoff)
+                             if arguments.retry is not None else None, evict_finished=arguments.evict_finished,
+                             read_policy=arguments.read_policy, read_threads=arguments.read_threads, num_variables=arguments.variables, num_sites=arguments.sites,
+                             placement_policy=arguments.placement, replication_factor=arguments.replication_factor,
+                             placement_file=arguments.placement_file, initial_state_file=arguments.initial_state,
+                             storage_dir=arguments.storage_dir, results_file=arguments.results,
+                             concurrency=arguments.concurrency)
+    if arguments.serve:
+        from SimulatorServer import SimulatorServer
+        SimulatorServer(Simulator(**simulator_options), arguments.serve).serve_forever()
+    elif not arguments.input_file:
         print(f"Usage: {sys.argv[0]} <input_file>")
     else:
-        simulator = Simulator()
-        simulator.run(sys.argv[1])
\ No newline at end of file
+        simulator = Simulator(**simulator_options)
+        if arguments.latency_model:
+            from LatencyModel import LatencyModel, LatencyDistribution
+            simulator.run_timed(arguments.input_file, LatencyModel.load(arguments.latency_model), arguments.clients,
+                                LatencyDistribution.parse(arguments.think_time) if arguments.think_time else None)
+        elif arguments.profile:
+            from Profiler import Profiler
+            profiler = Profiler()
+            profiler.run(simulator.run, arguments.input_file)
+            profiler.write_reports(arguments.input_file)
+        else:
+            simulator.run(arguments.input_file)
+        simulator.close()
@@ -0,0 +1,150 @@
+import json
+import logging
+import socketserver
+import threading
+import time
+from collections import deque
+"""
+       Authors: Krina KJS10093
+       Chynna
+"""
+log = logging.getLogger(__name__)
+
+class InstructionHandler(socketserver.BaseRequestHandler):
+    """
+    Serves one client connection. Clients may pipeline: every complete line received
+    is executed in order and the responses of a whole batch are sent back together,
+    one response line per instruction.
+    """
+    def handle(self):
+        server = self.server.simulator_server
+        pending = b""
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                break
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            responses = [self.respond(server, line) for line in lines]
+            responses = [response for response in responses if response is not None]
+            if responses:
+                self.request.sendall(("\n".join(responses) + "\n").encode())
+
+    def respond(self, server, line):
+        """Returns the response to one line, an ERROR response if it failed, so the rest of the batch is still served"""
+        try:
+            return server.handle_line(line.decode())
+        except Exception as error:
+            trimmed_line = line.decode(errors="replace").strip()
+            log.exception(f"Instruction {trimmed_line} failed")
+            return f"{trimmed_line} -> ERROR {error}"
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class SimulatorServer:
+    """
+    Exposes a Simulator on a TCP ("tcp:HOST:PORT") or Unix ("unix:PATH") socket.
+    Each connection runs on its own thread and drives the shared, thread-safe
+    TransactionManager directly; only the parser of the Simulator is reused.
+    """
+    def __init__(self, simulator, address, max_latency_samples=100000):
+        self.simulator = simulator
+        self.transaction_manager = simulator.transaction_manager
+        self.latencies = deque(maxlen=max_latency_samples)
+        self.latency_lock = threading.Lock()
+        self.server = self.create_server(address)
+        self.server.simulator_server = self
+
+    def create_server(self, address):
+        """Creates the socket server for the given address"""
+        scheme, _, location = address.partition(":")
+        if scheme == "tcp":
+            host, _, port = location.rpartition(":")
+            return ThreadingTCPServer((host or "127.0.0.1", int(port)), InstructionHandler)
+        if scheme == "unix":
+            return ThreadingUnixServer(location, InstructionHandler)
+        raise ValueError(f"Unsupported server address {address}, expected tcp:HOST:PORT or unix:PATH")
+
+    def get_address(self):
+        """Returns the address the server is bound to"""
+        return self.server.server_address
+
+    def handle_line(self, line):
+        """
+        Executes one instruction and returns its response line:
+        the value for reads ({variable: value} JSON for MR and SCAN), COMMITTED/ABORTED for end, QUEUED for operations
+        deferred until their transaction is admitted, OK otherwise.
+        """
+        trimmed_line = line.strip()
+        if trimmed_line == "latency()":
+            return f"{trimmed_line} -> {self.format_latency_percentiles()}"
+
+        parsed = self.simulator.parse_instruction(trimmed_line)
+        if parsed is None:
+            return None
+        instruction_type, args = parsed
+        if instruction_type == "UNKNOWN":
+            return f"{trimmed_line} -> ERROR unknown instruction"
+
+        start = time.perf_counter()
+        #Begin and end draw their timestamps inside the commit critical section
+        current_time = None if instruction_type in ("BEGIN", "BEGIN_RO", "END") else self.transaction_manager.tick()
+        result = self.simulator.execute_instruction(instruction_type, args, current_time)
+        if self.transaction_manager.retry_policy is not None:
+            self.transaction_manager.process_due_retries(self.transaction_manager.current_time)
+        elapsed = time.perf_counter() - start
+        with self.latency_lock:
+            self.latencies.append(elapsed)
+
+        return f"{trimmed_line} -> {self.format_result(instruction_type, args, result)}"
+
+    def format_result(self, instruction_type, args, result):
+        """Formats the result of an instruction for the response line"""
+        if instruction_type in ("READ", "MULTI_READ", "SCAN", "END") and result is None and self.transaction_manager.is_queued(args[0]):
+            return "QUEUED"
+        if instruction_type in ("READ", "MULTI_READ", "SCAN"):
+            if result is not None:
+                return json.dumps(result) if isinstance(result, dict) else str(result)
+            txn_obj = self.transaction_manager.txn_map.get(args[0])
+            return txn_obj.get_transaction_status().value if txn_obj else "ERROR unknown transaction"
+        if instruction_type == "END":
+            return result.value if result else "ERROR unknown transaction"
+        if instruction_type in ("ASOF", "STATS"):
+            return json.dumps(result)
+        return "OK"
+
+    def latency_percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        """Returns the request latency percentiles in milliseconds over the recent samples"""
+        with self.latency_lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return {}
+        return {p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000 for p in percentiles}
+
+    def format_latency_percentiles(self):
+        """Formats the latency percentiles as a single line"""
+        with self.latency_lock:
+            count = len(self.latencies)
+        values = " ".join(f"p{p:g}={ms:.3f}ms" for p, ms in self.latency_percentiles().items())
+        return f"count={count} {values}".strip()
+
+    def serve_forever(self):
+        """Serves clients until interrupted, then reports the latency percentiles"""
+        log.info(f"Serving instructions on {self.get_address()}")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Closes the socket and the result sink and logs the request latency percentiles"""
+        self.server.server_close()
+        self.simulator.close()
+        log.info(f"Request latency: {self.format_latency_percentiles()}")
@@ -1,4 +1,5 @@
 import logging
+import threading
 from enum import Enum
 from Variable import Variable
 from DataManager import DataManager
@@ -6,12 +7,6 @@ from DataManager import DataManager
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class SiteStatus(Enum):
@@ -20,11 +15,17 @@ class SiteStatus(Enum):
     RECOVERED = "RECOVERED"
 
 class Site:
-    def __init__(self, idx):
+    def __init__(self, idx, storage_backend="objects", placement=None, initial_state=None, storage_dir=None):
         self.id=idx
         self.status=SiteStatus.UP #initally the sites are all up
         self.last_failure_time=None
-        self.datamanager=DataManager(self.id)           
+        #The data manager is created on first use, so a site nobody touches costs a few attributes
+        self.storage_backend = storage_backend
+        self.storage_dir = storage_dir
+        self.placement = placement
+        self.initial_state = initial_state
+        self.datamanager=None
+        self.datamanager_lock = threading.Lock()
 
     def get_id(self):
         return self.id
@@ -62,8 +63,22 @@ class Site:
         print("site id is: " + str(self.id))
         print("site status is: " + str(self.status))
         print("The variables on this site are: ")
-        self.datamanager.getVariableList()
+        self.getDataManager().getVariableList()
     
     def getDataManager(self):
+        if self.datamanager is None:
+            with self.datamanager_lock:
+                if self.datamanager is None:
+                    self.datamanager = DataManager(self.id, self.storage_backend, self.placement, self.initial_state,
+                                                   self.storage_dir)
         return self.datamanager
+
+    def has_data_manager(self):
+        """Checks if the data manager was created, i.e. the site was accessed"""
+        return self.datamanager is not None
+
+    def close(self):
+        """Closes the data manager, if the site was accessed"""
+        if self.datamanager is not None:
+            self.datamanager.close()
     
\ No newline at end of file
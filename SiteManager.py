@@ -1,32 +1,38 @@
 import logging
+import threading
 from Site import Site
 from Site import SiteStatus
 from collections import defaultdict
+from Placement import Placement
+from InitialState import InitialState
 """
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class SiteManager:
-    def __init__(self, num_sites):
+    def __init__(self, num_sites, storage_backend="objects", placement=None, initial_state=None, storage_dir=None,
+                 result_sink=None):
         self.num_sites = num_sites
+        self.storage_backend = storage_backend
+        self.storage_dir = storage_dir
+        self.result_sink = result_sink  #Receives the dumps as single records
+        self.placement = placement if placement is not None else Placement(num_sites=num_sites)
+        #One initial state shared by all sites
+        self.initial_state = initial_state if initial_state is not None else InitialState(self.placement.num_variables)
         self.site_failure_history = {i: [0] for i in range(1, num_sites + 1)}
         self.site_recover_history = {i: [0] for i in range(1, num_sites + 1)}
         self.waitingEvenTxn = defaultdict(list)
         self.waitingOddTxn = defaultdict(list)
         self.sites = self.initializeSites()
+        self.site_locks = {i: threading.RLock() for i in range(1, num_sites + 1)}
+        self.waitlist_lock = threading.Lock()
 
     def initializeSites(self):
         sites = []
-        for i in range(1,11):
-            sites.append(Site(i))
+        for i in range(1, self.num_sites + 1):
+            sites.append(Site(i, self.storage_backend, self.placement, self.initial_state, self.storage_dir))
         return sites
     
     def getNumberSites(self):
@@ -38,6 +44,10 @@ class SiteManager:
     def getAllSites(self):
         return self.sites
     
+    def get_site_lock(self, site_id):
+        """Returns the lock serializing changes to the data manager and status of a site"""
+        return self.site_locks[int(site_id)]
+
     def getSiteStatus(self,index): 
         site = self.getSite(index)
         return site.getSiteStatus()
@@ -48,10 +58,15 @@ class SiteManager:
             # site.displaySite()
 
     def failSite(self,id):
-        self.sites[int(id)-1].setStatusOfSite(SiteStatus.FAILED)
+        with self.get_site_lock(id):
+            self.sites[int(id)-1].setStatusOfSite(SiteStatus.FAILED)
 
     def recoverSite(self,id):
-        self.sites[int(id)-1].setStatusOfSite(SiteStatus.RECOVERED)
+        with self.get_site_lock(id):
+            site = self.sites[int(id)-1]
+            site.setStatusOfSite(SiteStatus.RECOVERED)
+            #Even a site never accessed so far may have missed commits of its replicated variables
+            site.getDataManager().mark_recovered()
 
     def addRecoveredSiteToList(self,id,time):
         site_id = int(id)
@@ -61,46 +76,83 @@ class SiteManager:
         # If the site_id is not in the dictionary, initialize its history with the time
             self.site_recover_history[site_id] = [time]
     
-    def dump(self):
-        """Print the committed values of all variables at all sites."""
+    def dump(self, current_time=None):
+        """
+        Print the committed values of all variables at all sites.
+        With a result sink they are emitted as a single dump record instead.
+        """
+        if self.result_sink is not None:
+            sites = [{"site": site.id, "status": site.getSiteStatus().value,
+                      "values": dict(site.getDataManager().latest_values())} for site in self.sites]
+            self.result_sink.emit("dump", current_time, sites=sites)
+            return
         log.info("Dumping all site states...")
         for site in self.sites:
             site_id = site.id
             site_status = site.getSiteStatus()
             log.info(f"Site {site_id} (Status: {site_status}):")
             
-            #grab variables from the data manager
-            data_manager = site.getDataManager()
-            committed_variables = data_manager.getVariableList()
-            
-            # Check if committed_variables is a list or dictionary
-            if isinstance(committed_variables, dict):
-                for var_id, variable in committed_variables.items():
-                    var_name = f"x{var_id}"  # Convert variable ID to string with "x" prefix
-                    # value = variable.getVariableValue()
-                    value=variable.snapshots[-1][1]
-                    log.info(f"  {var_name}: {value}")
-            elif isinstance(committed_variables, list):
-                for variable in committed_variables:
-                    var_name = variable.getVariableName()  # Assuming a method to get variable name
-                    # value = variable.getVariableValue()  # Assuming a method to get variable value
-                    value=variable.snapshots[-1][1]
-                    log.info(f"  {var_name}: {value}")
-            else:
-                log.warning(f"Unrecognized type for committed variables at site {site_id}: {type(committed_variables)}")
+            #latest committed value of every variable held by the data manager
+            for var_name, value in site.getDataManager().latest_values():
+                log.info(f"  {var_name}: {value}")
     
+    def as_of(self, timestamp):
+        """
+        Returns a point-in-time view {variable name: value} of the whole database at logical time timestamp.
+        Each variable takes the version with the latest commit time at or before timestamp among its copies,
+        so a copy that missed commits while its site was down cannot hide them.
+        """
+        latest = {}
+        for site in self.sites:
+            for var_name, commit_time, value in site.getDataManager().versions_as_of(timestamp):
+                if var_name not in latest or commit_time > latest[var_name][0]:
+                    latest[var_name] = (commit_time, value)
+        return {var_name: latest[var_name][1] for var_name in sorted(latest, key=lambda name: int(name[1:]))}
+
     def add_waitlist_txn_even(self,site_id, txn_obj, var_index):
-        if site_id not in self.waitingEvenTxn:
-            self.waitingEvenTxn[site_id] = []
-        self.waitingEvenTxn[site_id].append((txn_obj,var_index))
+        with self.waitlist_lock:
+            if site_id not in self.waitingEvenTxn:
+                self.waitingEvenTxn[site_id] = []
+            self.waitingEvenTxn[site_id].append((txn_obj,var_index))
         log.debug(f"Added transaction {txn_obj.get_id()} to even waitlist at site {site_id} for variable {var_index}")
 
     def add_waitlist_txn_odd(self,site_id, txn_obj, var_index):
-        if site_id not in self.waitingOddTxn:
-            self.waitingOddTxn[site_id] = []
-        self.waitingOddTxn[site_id].append((txn_obj,var_index))
+        with self.waitlist_lock:
+            if site_id not in self.waitingOddTxn:
+                self.waitingOddTxn[site_id] = []
+            self.waitingOddTxn[site_id].append((txn_obj,var_index))
         log.debug(f"Added transaction {txn_obj.get_id()} to odd waitlist at site {site_id} for variable {var_index}")
 
+    def waitlist_depth(self):
+        """Returns the number of reads waiting in all waitlists"""
+        with self.waitlist_lock:
+            return (sum(len(waitlist) for waitlist in self.waitingEvenTxn.values()) +
+                    sum(len(waitlist) for waitlist in self.waitingOddTxn.values()))
+
+    def get_waitlist_even(self, site_id):
+        """Returns a copy of the even waitlist of a site that is safe to iterate while it changes"""
+        with self.waitlist_lock:
+            return list(self.waitingEvenTxn.get(site_id, []))
+
+    def get_waitlist_odd(self, site_id):
+        """Returns a copy of the odd waitlist of a site that is safe to iterate while it changes"""
+        with self.waitlist_lock:
+            return list(self.waitingOddTxn.get(site_id, []))
+
+    def remove_waitlist_txn_even(self, txn_obj, var_index):
+        """Removes a served read from the even waitlists of every site"""
+        with self.waitlist_lock:
+            for waitlist in self.waitingEvenTxn.values():
+                if (txn_obj, var_index) in waitlist:
+                    waitlist.remove((txn_obj, var_index))
+
+    def remove_waitlist_txn_odd(self, txn_obj, var_index):
+        """Removes a served read from the odd waitlists of every site"""
+        with self.waitlist_lock:
+            for waitlist in self.waitingOddTxn.values():
+                if (txn_obj, var_index) in waitlist:
+                    waitlist.remove((txn_obj, var_index))
+
     def get_site_failure_history(self, index):
         """
         Returns the number of times a site recovered
@@ -113,12 +165,13 @@ class SiteManager:
         """
         return self.site_recover_history[index]
 
+    def close(self):
+        """Closes the data managers of the sites at the end of a run"""
+        for site in self.sites:
+            site.close()
+
     def get_sites_holding_variable(self, variable_index):
         """
         Returns a list of sites that hold the specified variable.
         """
-        holding_sites = []
-        for site in self.sites:
-            if site.getDataManager().has_variable(variable_index):
-                holding_sites.append(site)
-        return holding_sites
+        return [self.sites[site_id - 1] for site_id in self.placement.sites_for(variable_index)]
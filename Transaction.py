@@ -4,12 +4,6 @@ import logging
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class TransactionStatus(Enum):
@@ -18,21 +12,44 @@ class TransactionStatus(Enum):
     COMMITTED = "COMMITTED"
     WAITING = "WAITING"
 
+class AbortReason(Enum):
+    SITE_FAILURE = "SITE_FAILURE"
+    FIRST_COMMITTER_WINS = "FIRST_COMMITTER_WINS"
+    CYCLE = "CYCLE"
+    DANGEROUS_STRUCTURE = "DANGEROUS_STRUCTURE"
+    READ_FAILURE = "READ_FAILURE"
+    WRITE_FAILURE = "WRITE_FAILURE"
+    READ_ONLY_WRITE = "READ_ONLY_WRITE"
+    DEADLOCK = "DEADLOCK"
+    VALIDATION = "VALIDATION"
+
 class TransactionType(Enum):
     READ = "READ"
     WRITE = "WRITE"
     UNDEFINED = "UNDEFINED"
 
 class Transaction:
-    def __init__(self, id, name, timestamp):
+    def __init__(self, id, name, timestamp, read_only=False):
         self.id = id
         self.name = name
         self.status = TransactionStatus.RUNNING
-        self.type = TransactionType.UNDEFINED
+        self.type = TransactionType.READ if read_only else TransactionType.UNDEFINED
+        self.read_only = read_only
         self.arrival_time = timestamp
         self.commit_time = None
+        self.end_time = None
+        self.abort_reason = None
         self.sites_accessed = []
         self.pre_commit_vars = {}
+        self.snapshot_reads = {}
+        #rw-antidependency flags: a concurrent transaction read what this one wrote (in) / wrote what this one read (out)
+        self.in_conflict = False
+        self.out_conflict = False
+        #Reads ("R", variable) and writes ("W", variable, value) in issue order, kept to re-execute the transaction
+        self.operation_log = []
+        #Read and write sets as integer bitmasks, bit i set for variable xi
+        self.read_set = 0
+        self.write_set = 0
 
     #Getter functions  
     def get_id(self):
@@ -47,6 +64,10 @@ class Transaction:
         """Retrieves the arrival time of the transaction"""
         return self.commit_time
     
+    def get_end_time(self):
+        """Retrieves the time end() was processed for the transaction, or None while it has not ended"""
+        return self.end_time
+
     def get_name(self):
         """Returns the name of the transaction"""
         return self.name
@@ -55,10 +76,18 @@ class Transaction:
         """Returns the current status of the transaction (e.g. RUNNING, COMMITTED, ABORTED)"""
         return self.status
     
+    def get_abort_reason(self):
+        """Returns why the transaction was aborted, or None"""
+        return self.abort_reason
+
     def get_transaction_type(self):
         """Returns the type of the transaction (either READ or WRITE)"""
         return self.type
     
+    def is_read_only(self):
+        """Returns whether the transaction was declared read-only and is not tracked for SSI"""
+        return self.read_only
+
     def get_sites_accessed(self):
         """Returns list of sites that transaction was accessed"""
         return self.sites_accessed
@@ -78,6 +107,10 @@ class Transaction:
         """Sets the status of the transaction to a specified state"""
         self.status = status
 
+    def set_abort_reason(self, reason):
+        """Sets why the transaction was aborted"""
+        self.abort_reason = reason
+
     def set_type(self, type):
         """Sets the type of the transaction, either read or write"""
         self.type = type
@@ -86,6 +119,15 @@ class Transaction:
         """Sets the commit time of the transaction"""
         self.commit_time = commit_time
     
+    def set_end_time(self, end_time):
+        """Sets the time end() was processed for the transaction"""
+        self.end_time = end_time
+
+    def summary(self):
+        """Returns a compact (name, status, arrival time, commit time, end time, abort reason) tuple"""
+        return (self.name, self.status.value, self.arrival_time, self.commit_time, self.end_time,
+                self.abort_reason.value if self.abort_reason else None)
+
     def add_site_accessed(self, site_id):
         """Records that a specific site was accessed by the transaction at a given time"""
         self.sites_accessed.append(int(site_id))
@@ -94,6 +136,81 @@ class Transaction:
         """Adds a var_idx:value pair for every pre-commit var"""
         self.pre_commit_vars[str(var_idx)] = value
 
+    def cache_read(self, var_idx, value):
+        """Memoizes the snapshot value resolved for a variable"""
+        self.snapshot_reads[var_idx] = value
+
+    def get_cached_read(self, var_idx):
+        """
+        Returns (True, value) if the transaction wrote the variable (its own pending write)
+        or already read it (its snapshot value), otherwise (False, None)
+        """
+        key = str(var_idx)
+        if key in self.pre_commit_vars:
+            return True, self.pre_commit_vars[key]
+        if var_idx in self.snapshot_reads:
+            return True, self.snapshot_reads[var_idx]
+        return False, None
+
+    def log_operation(self, operation):
+        """Appends a read or write to the operation log"""
+        self.operation_log.append(operation)
+
+    def get_operation_log(self):
+        """Returns the reads and writes issued by the transaction, in order"""
+        return self.operation_log
+
+    def record_read(self, var_idx):
+        """Adds a variable to the read set"""
+        self.read_set |= 1 << var_idx
+
+    def record_reads(self, var_indices):
+        """Adds several variables to the read set with a single mask update"""
+        if not var_indices:
+            return
+        bits = bytearray((max(var_indices) >> 3) + 1)
+        for var_idx in var_indices:
+            bits[var_idx >> 3] |= 1 << (var_idx & 7)
+        self.read_set |= int.from_bytes(bits, "little")
+
+    def record_range_read(self, low, high):
+        """Adds every variable between low and high included to the read set, the predicate of a scan"""
+        self.read_set |= (1 << high + 1) - (1 << low)
+
+    def record_write(self, var_idx):
+        """Adds a variable to the write set"""
+        self.write_set |= 1 << var_idx
+
+    def get_read_set(self):
+        """Returns the ids of the variables read, in increasing order"""
+        return self.variables_in(self.read_set)
+
+    def get_write_set(self):
+        """Returns the ids of the variables written, in increasing order"""
+        return self.variables_in(self.write_set)
+
+    def get_variables_accessed(self):
+        """Returns the ids of the variables read or written, in increasing order"""
+        return self.variables_in(self.read_set | self.write_set)
+
+    @staticmethod
+    def variables_in(mask):
+        """Returns the ids of the bits set in a mask, in increasing order"""
+        variables = []
+        while mask:
+            low_bit = mask & -mask
+            variables.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return variables
+
+    def set_in_conflict(self):
+        """Records an inbound rw-antidependency from a concurrent reader"""
+        self.in_conflict = True
+
+    def set_out_conflict(self):
+        """Records an outbound rw-antidependency to a concurrent writer"""
+        self.out_conflict = True
+
     def display(self):
         """Helper function to display transaction details"""
         print(f"Transaction ID: {self.id}")
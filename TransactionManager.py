@@ -2,55 +2,161 @@ import logging
 from Transaction import Transaction
 from SiteManager import SiteManager
 from DataManager import DataManager
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 from Site import SiteStatus
 from Transaction import TransactionStatus
 from Transaction import TransactionType
-import copy
+from Transaction import AbortReason
+from Metrics import Metrics
+from ReadRouter import ReadRouter
+from ConcurrencyControl import ConcurrencyControl
+from Result import Result, ResultStatus
+from contextlib import ExitStack
+import heapq
+import threading
+import time
 """
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class TransactionManager:
-    def __init__(self, num_variables, num_sites, site_manager):
+    def __init__(self, num_variables, num_sites, site_manager, metrics=None, validation_mode="cycle", admission=None,
+                 retry_policy=None, evict_finished=False, max_summaries=10000, read_router=None,
+                 read_executor=None, result_sink=None, concurrency_control=None):
         """
         Initializes the TransactionManager with:
         - Active transactions map (`txn_map`).
         - Serialization graph (`serialization_graph`) for conflict tracking.
-        - Access history (`txn_access_hist`) to track read/write operations.
+        - Read and write sets of every transaction, kept as bitmasks on the Transaction.
         - SiteManager instance to manage site-related operations.
+        - Metrics collecting abort causes and cycle-check durations (disabled unless given).
+        - The ConcurrencyControl protocol, serializable snapshot isolation by default, and
+          the SSI validation mode: "cycle" searches the serialization graph for any cycle,
+          "dangerous_structure" only aborts on two consecutive rw-antidependencies.
+          Operations blocked by the protocol are deferred like those of queued transactions
+          and resumed once a transaction ending releases what they wait for.
+        - Readers and writers of every variable, used to find rw-antidependencies.
+        - An optional AdmissionController capping the active transactions, with the
+          operations of queued transactions deferred until they are admitted.
+        - An optional RetryPolicy re-executing aborted transactions from their operation
+          log after a backoff in logical ticks (`retry_schedule` holds the pending retries).
+        - An optional retention policy evicting ended transactions that no active transaction
+          can conflict with from the hot structures, keeping the last `max_summaries` of them
+          as compact summaries for reporting.
+        - A ReadRouter ordering the replicas tried for reads of replicated variables
+          (site order by default) and counting the reads served per site.
+        - An optional ParallelReadExecutor serving the reads of distinct transactions
+          in a batch on a thread pool.
+        - An optional ResultSink receiving a record for every read value, commit, abort and site change.
+        - Locks so that concurrent sessions can drive their own transactions:
+          one per variable, a state lock for the shared maps and graph, and a
+          commit lock for the short validation critical section.
         """
         self.txn_map = {}
         self.serialization_graph = defaultdict(list)
-        self.txn_access_hist = defaultdict(lambda: defaultdict(list))
+        if validation_mode not in ("cycle", "dangerous_structure"):
+            raise ValueError(f"Unknown validation mode {validation_mode}")
+        self.validation_mode = validation_mode
+        self.concurrency_control = concurrency_control if concurrency_control is not None else ConcurrencyControl.create("ssi")
+        self.resume_queue = deque()
+        self.resuming = False
+        self.var_readers = defaultdict(set)
+        self.var_writers = defaultdict(set)
+        self.admission = admission
+        self.deferred_ops = {}
+        self.admission_queue = deque()  #Transactions admitted but not replayed yet
+        self.admitting = False
+        self.retry_policy = retry_policy
+        self.retry_schedule = []
+        self.retry_attempts = {}
+        self.retry_started = {}
+        self.evict_finished = evict_finished
+        self.max_summaries = max_summaries
+        self.finished_summaries = OrderedDict()
+        self.evicted_count = 0
+        self.read_router = read_router if read_router is not None else ReadRouter()
+        self.read_executor = read_executor
+        self.result_sink = result_sink
         self.site_manager = site_manager
+        self.metrics = metrics if metrics is not None else Metrics()
         self.num_variables = num_variables
         self.num_sites = num_sites
         self.current_time = 0
         self.V = 0
+        self.clock_lock = threading.Lock()
+        self.state_lock = threading.RLock()
+        self.commit_lock = threading.Lock()
+        #Created on first use, see variable_lock
+        self.variable_locks = {}
+
+    def tick(self):
+        """Advances the shared logical clock and returns the new time"""
+        with self.clock_lock:
+            self.current_time += 1
+            return self.current_time
+
+    def variable_lock(self, var_idx):
+        """Returns the lock of a variable, creating it the first time the variable is accessed"""
+        lock = self.variable_locks.get(var_idx)
+        if lock is None:
+            lock = self.variable_locks.setdefault(var_idx, threading.RLock())
+        return lock
+
+    def lock_variables(self, var_indices):
+        """
+        Acquires the locks of the given variables in index order so that two
+        committers can never deadlock. Returns an ExitStack releasing them.
+        """
+        stack = ExitStack()
+        for var_idx in sorted(set(var_indices)):
+            stack.enter_context(self.variable_lock(var_idx))
+        return stack
+
+    def begin_transaction(self, txn_name, current_time, read_only=False):
+        """
+        Starts a new transaction, or queues it when the admission controller is at its cap.
+        The operations of a queued transaction are deferred and replayed once it is admitted.
+        """
+        if self.admission is not None and txn_name not in self.txn_map and txn_name not in self.deferred_ops:
+            with self.state_lock:
+                if not self.admission.admit(txn_name):
+                    self.deferred_ops[txn_name] = deque([lambda time: self.start_transaction(txn_name, time, read_only)])
+                    self.metrics.increment("admission.queued")
+                    return
+        self.start_transaction(txn_name, current_time, read_only)
 
-    def begin_transaction(self, txn_name, current_time):
+    def start_transaction(self, txn_name, current_time, read_only=False):
         """
         Starts a new transaction, initializing its metadata and adding it to the active map.
+        Read-only transactions read from their snapshot without any conflict tracking,
+        so they get neither an access history nor a node in the serialization graph.
+        They give up serializability in the read-only anomaly: a snapshot taken after a writer
+        committed but before a concurrent reader of its write did is still committed.
+        When current_time is None the start timestamp is drawn inside the commit critical section,
+        so no commit with an earlier timestamp is still installing its versions when the snapshot is read,
+        and the transaction joins the active map with it, so no eviction runs in between.
         Logs a warning if the transaction already exists.
         """
-        if txn_name in self.txn_map:
-            log.warning(f"Transaction {txn_name} already exists!")
-            return
-
-        txn_id = int(txn_name[1:])
-        transaction = Transaction(txn_id, txn_name, current_time)
-        self.txn_map[txn_name] = transaction
-        self.add_node(txn_id)
-        log.debug(f"Transaction {txn_name} begins at time {current_time}:")
+        with ExitStack() as stack:
+            if current_time is None:
+                stack.enter_context(self.commit_lock)
+            stack.enter_context(self.state_lock)
+            if current_time is None:
+                current_time = self.tick()
+            if txn_name in self.txn_map:
+                log.warning(f"Transaction {txn_name} already exists!")
+                return
+
+            txn_id = int(txn_name[1:])
+            transaction = Transaction(txn_id, txn_name, current_time, read_only)
+            self.txn_map[txn_name] = transaction
+            if self.retry_policy is not None:
+                self.retry_started.setdefault(txn_name, time.perf_counter())
+            if not read_only:
+                self.add_node(txn_id)
+        log.debug(f"Transaction {txn_name} begins at time {current_time}{' (read-only)' if read_only else ''}:")
 
     def read_request(self, txn_name, variable, current_time):
         """
@@ -58,28 +164,196 @@ class TransactionManager:
         1. Checking for read-write (rw) conflicts and adding edges.
         2. Detecting cycles in the serialization graph.
         3. Attempting to read the variable based on its index (even/odd).
+        Returns the value read, or None if the read could not be served.
         """
-        if txn_name not in self.txn_map:
-            log.error("Read request denied: Transaction %s does not exist at time %s.", txn_name, current_time)
-            return
+        if self.defer_operation(txn_name, lambda time: self.read_request(txn_name, variable, time)):
+            return None
 
-        txn_obj = self.txn_map[txn_name]
+        txn_obj = self.txn_map.get(txn_name)
+        if txn_obj is None:
+            log.error("Read request denied: Transaction %s does not exist at time %s.", txn_name, current_time)
+            return None
         var_idx = int(variable[1:])
+        if not 1 <= var_idx <= self.num_variables:
+            log.error(f"Read request denied: Variable {variable} does not exist.")
+            return None
+        if not txn_obj.is_read_only() and not self.concurrency_control.acquire(
+                self, txn_obj, var_idx, False, lambda time: self.read_request(txn_name, variable, time), current_time):
+            self.resume_unblocked_transactions()
+            return None
+        if self.admission is not None:
+            self.admission.record_operation(txn_name)
+        if self.retry_policy is not None:
+            txn_obj.log_operation(("R", variable))
+
         log.info("Processing read request for transaction %s and variable %s at time %s.", txn_name, variable, current_time)
 
         if txn_obj.get_transaction_type() == TransactionType.UNDEFINED:
             txn_obj.set_type(TransactionType.READ)
 
-        #Add the read operation to the transaction's access history
-        self.txn_access_hist[txn_obj.get_id()][var_idx].append("R")
-        log.debug(f"Updated access history for T{txn_obj.get_id()} on x{var_idx}: Read")
-        log.debug(f"Current access history after {txn_name}: {dict(self.txn_access_hist)}")
+        #Serve reads of the transaction's own writes and repeat reads of its snapshot without routing.
+        #The read set already holds the first access, so nothing new is recorded.
+        found, value = txn_obj.get_cached_read(var_idx)
+        if found:
+            log.debug(f"Transaction {txn_name} read {variable} = {value} from its own write set or snapshot cache.")
+            if self.result_sink is not None:
+                self.result_sink.emit("read", current_time, txn=txn_name, variable=variable, value=value, site=None)
+            return value
+
+        #Add the variable to the transaction's read set, read-only transactions are not tracked
+        if not txn_obj.is_read_only():
+            with self.state_lock:
+                txn_obj.record_read(var_idx)
+                self.var_readers[var_idx].add(txn_name)
+                log.debug(f"Added x{var_idx} to the read set of T{txn_obj.get_id()}")
 
         #Delegate to appropriate handler
-        if self.is_even_index(var_idx):
-            self.handle_even_indexed_variable(txn_obj, variable, var_idx,current_time)
-        else:
-            self.handle_odd_indexed_variable(txn_obj, variable, var_idx,current_time)
+        with self.variable_lock(var_idx):
+            if self.is_replicated(var_idx):
+                value = self.handle_even_indexed_variable(txn_obj, variable, var_idx,current_time)
+            else:
+                value = self.handle_odd_indexed_variable(txn_obj, variable, var_idx,current_time)
+        self.resume_unblocked_transactions()
+        return value
+
+    def multi_read_request(self, txn_name, variables, current_time):
+        """
+        Reads several variables in one pass, see read_variables.
+        Returns {variable name: value}, or None if the transaction is unknown or the read was deferred.
+        """
+        var_indices = sorted({int(variable[1:]) for variable in variables})
+        unknown = [f"x{var_idx}" for var_idx in var_indices if not 1 <= var_idx <= self.num_variables]
+        if unknown:
+            log.error(f"Multi-read of transaction {txn_name} skips unknown variables {', '.join(unknown)}.")
+            var_indices = [var_idx for var_idx in var_indices if 1 <= var_idx <= self.num_variables]
+        return self.read_variables(txn_name, var_indices, current_time,
+                                   lambda time: self.multi_read_request(txn_name, variables, time))
+
+    def scan_request(self, txn_name, low, high, current_time):
+        """
+        Reads every variable whose id is between those of low and high included, see read_variables.
+        The range is recorded as a predicate read: it joins the read set as a whole, so any concurrent
+        write inside it is a conflict, and the variable ids are fixed, so no write can add one to it.
+        Returns {variable name: value}, or None if the transaction is unknown or the read was deferred.
+        """
+        low_idx, high_idx = max(int(low[1:]), 1), min(int(high[1:]), self.num_variables)
+        return self.read_variables(txn_name, range(low_idx, high_idx + 1), current_time,
+                                   lambda time: self.scan_request(txn_name, low, high, time),
+                                   predicate=(low_idx, high_idx) if low_idx <= high_idx else None)
+
+    def read_variables(self, txn_name, var_indices, current_time, retry, predicate=None):
+        """
+        Reads a set of variables (ids in increasing order) for a transaction in one pass:
+        1. Locks them all through the concurrency control, the whole operation being deferred if one is taken.
+        2. Serves the reads of its own writes and repeated reads from its cache.
+        3. Records the rest in the read set, or the (low, high) predicate of a scan.
+        4. Assigns each variable to a site able to serve it, see plan_site_reads, and reads the
+        variables of every site at once, inside the commit critical section so that no commit
+        is installed halfway: all values come from the same snapshot.
+        5. Reads the variables no site can serve now one by one, which may make the transaction wait or abort.
+        """
+        if self.defer_operation(txn_name, retry):
+            return None
+
+        txn_obj = self.txn_map.get(txn_name)
+        if txn_obj is None:
+            log.error("Read request denied: Transaction %s does not exist at time %s.", txn_name, current_time)
+            return None
+        if not txn_obj.is_read_only():
+            for var_idx in var_indices:
+                if not self.concurrency_control.acquire(self, txn_obj, var_idx, False, retry, current_time):
+                    self.resume_unblocked_transactions()
+                    return None
+        if self.admission is not None:
+            self.admission.record_operation(txn_name)
+        if self.retry_policy is not None:
+            for var_idx in var_indices:
+                txn_obj.log_operation(("R", f"x{var_idx}"))
+
+        log.info("Processing read request for transaction %s and %s variables at time %s.", txn_name, len(var_indices), current_time)
+        if txn_obj.get_transaction_type() == TransactionType.UNDEFINED:
+            txn_obj.set_type(TransactionType.READ)
+
+        values, pending = {}, []
+        for var_idx in var_indices:
+            found, value = txn_obj.get_cached_read(var_idx)
+            if found:
+                values[var_idx] = value
+                if self.result_sink is not None:
+                    self.result_sink.emit("read", current_time, txn=txn_name, variable=f"x{var_idx}", value=value, site=None)
+            else:
+                pending.append(var_idx)
+
+        if not txn_obj.is_read_only():
+            with self.state_lock:
+                if predicate is not None:
+                    txn_obj.record_range_read(*predicate)
+                else:
+                    txn_obj.record_reads(pending)
+                for var_idx in pending:
+                    self.var_readers[var_idx].add(txn_name)
+
+        with self.commit_lock:
+            read_time = self.concurrency_control.read_timestamp(txn_obj, current_time)
+            plan, unserved = self.plan_site_reads(txn_obj, pending, read_time)
+            for site, site_vars in plan.items():
+                values.update(self.process_site_reads(site, txn_obj, site_vars, read_time, current_time))
+        self.metrics.increment("reads.multi")
+        self.metrics.increment("reads.multi_sites", len(plan))
+
+        for var_idx in unserved:
+            with self.variable_lock(var_idx):
+                if self.is_replicated(var_idx):
+                    values[var_idx] = self.handle_even_indexed_variable(txn_obj, f"x{var_idx}", var_idx, current_time)
+                else:
+                    values[var_idx] = self.handle_odd_indexed_variable(txn_obj, f"x{var_idx}", var_idx, current_time)
+            if txn_obj.get_transaction_status() == TransactionStatus.ABORTED:
+                break
+        self.resume_unblocked_transactions()
+        return {f"x{var_idx}": values[var_idx] for var_idx in var_indices if var_idx in values}
+
+    def plan_site_reads(self, txn_obj, var_indices, read_time):
+        """
+        Assigns every variable to the first site, in the order of the read router, holding a copy readable
+        at read_time, taking the candidates of each site from the range of its ordered variable index.
+        Returns {site: [variable ids]} and the ids no site can serve now.
+        """
+        remaining = set(var_indices)
+        plan = {}
+        if not remaining:
+            return plan, []
+        low, high = min(remaining), max(remaining)
+        for site in self.read_router.order_sites(self.site_manager.getAllSites(), txn_obj):
+            if not remaining:
+                break
+            if site.getSiteStatus() == SiteStatus.FAILED:
+                continue
+            data_manager = site.getDataManager()
+            served = [var_idx for var_idx in data_manager.variables_in_range(low, high)
+                      if var_idx in remaining and data_manager.is_readable(var_idx, read_time)]
+            if served:
+                plan[site] = served
+                remaining.difference_update(served)
+        return plan, sorted(remaining)
+
+    def process_site_reads(self, site, txn_obj, var_indices, read_time, current_time):
+        """Reads several variables from one site at read_time, memoizing them, and returns {variable id: value}"""
+        log.info("Transaction %s read %s variables from site %s", txn_obj.get_name(), len(var_indices), site.get_id())
+        txn_obj.add_site_accessed(site.get_id())
+        self.read_router.start_read(site.get_id())
+        try:
+            site_values = site.getDataManager().read_snapshot(var_indices, read_time)
+        finally:
+            self.read_router.finish_read(site.get_id())
+        values = {}
+        for var_idx, value in zip(var_indices, site_values):
+            txn_obj.cache_read(var_idx, value)
+            self.flag_skipped_versions(txn_obj, var_idx)
+            values[var_idx] = value
+            if self.result_sink is not None:
+                self.result_sink.emit("read", current_time, txn=txn_obj.get_name(), variable=f"x{var_idx}", value=value,
+                                      site=site.get_id())
+        return values
 
     def write_request(self, txn_name, variable, value, current_time):
         """
@@ -89,140 +363,598 @@ class TransactionManager:
         3. Attempting a update to local copy to the appropriate sites.
         4. Aborting or logging success based on the write outcome.
         """
-        if txn_name not in self.txn_map:
+        if self.defer_operation(txn_name, lambda time: self.write_request(txn_name, variable, value, time)):
+            return
+
+        txn_obj = self.txn_map.get(txn_name)
+        if txn_obj is None:
             log.error(f"Write request denied: Transaction {txn_name} does not exist.")
             return
+        var_idx = int(variable[1:])
+        if not 1 <= var_idx <= self.num_variables:
+            log.error(f"Write request denied: Variable {variable} does not exist.")
+            return
+        if not txn_obj.is_read_only() and not self.concurrency_control.acquire(
+                self, txn_obj, var_idx, True, lambda time: self.write_request(txn_name, variable, value, time), current_time):
+            self.resume_unblocked_transactions()
+            return
+        if self.admission is not None:
+            self.admission.record_operation(txn_name)
+        if self.retry_policy is not None:
+            txn_obj.log_operation(("W", variable, value))
 
-        txn_obj = self.txn_map[txn_name]
         txn_id = txn_obj.get_id()
-        var_idx = int(variable[1:])
         log.info(f"Processing write request for transaction {txn_name}, variable {variable} with value {value} at time {current_time}")
 
+        if txn_obj.is_read_only():
+            log.error(f"Transaction {txn_name} is read-only and cannot write variable {variable}. Aborting transaction.")
+            self.abort_transaction(txn_name, current_time, AbortReason.READ_ONLY_WRITE)
+            self.resume_unblocked_transactions()
+            return
+
         if txn_obj.get_transaction_type() == TransactionType.UNDEFINED:
             txn_obj.set_type(TransactionType.WRITE)
 
-        self.txn_access_hist[txn_id][var_idx].append("W")
-        log.debug(f"Updated access history for T{txn_obj.get_id()} on x{var_idx}: Write")
-        log.debug(f"Current access history after {txn_name}: {dict(self.txn_access_hist)}")
+        with self.state_lock:
+            txn_obj.record_write(var_idx)
+            self.var_writers[var_idx].add(txn_name)
+            log.debug(f"Added x{var_idx} to the write set of T{txn_obj.get_id()}")
 
         #Attempt update local copy
-        if self.attempt_write(txn_obj, var_idx, value):
+        with self.variable_lock(var_idx):
+            written = self.attempt_write(txn_obj, var_idx, value)
+        if written:
             log.info(f"Transaction {txn_name} successfully attempted a write on variable {variable}.")
         else:
             log.error(f"Transaction {txn_name} failed to update for variable {variable}. Aborting transaction.")
-            self.abort_transaction(txn_name, current_time)
+            self.abort_transaction(txn_name, current_time, AbortReason.WRITE_FAILURE)
+        self.resume_unblocked_transactions()
 
     def end_transaction(self, txn_name, current_time):
         """
-        Completes a transaction by committing if no cycles are detected.
-        Aborts if a cycle is detected before cleanup or other conditions for abort are met.
+        Ends a transaction and returns its final status, or None if it is unknown or still
+        queued for admission. Its admission slot is then handed to the queued transactions,
+        and with a retry policy an aborted transaction is scheduled for re-execution.
+        """
+        if self.defer_operation(txn_name, lambda time: self.end_transaction(txn_name, time)):
+            return None
+
+        status = self.complete_transaction(txn_name, current_time)
+        if status is not None:
+            txn_obj = self.txn_map[txn_name]
+            txn_obj.set_end_time(self.current_time if current_time is None else current_time)
+            if status == TransactionStatus.COMMITTED:
+                self.release_locks(txn_obj)  #An aborted transaction released them when it aborted
+                if self.result_sink is not None:
+                    self.result_sink.emit("commit", txn_obj.get_commit_time(), txn=txn_name, read_only=txn_obj.is_read_only())
+        if self.admission is not None and status is not None:
+            self.admit_queued_transactions(txn_name, status)
+        if self.retry_policy is not None and status is not None:
+            self.finish_attempt(txn_name, status, current_time)
+        if self.evict_finished and status is not None:
+            self.evict_finished_transactions()
+        self.resume_unblocked_transactions()
+        return status
+
+    def complete_transaction(self, txn_name, current_time):
+        """
+        Completes a transaction by committing if the concurrency control validates it.
+        Aborts if a site it wrote failed since, or on the validation failures of the protocol.
+        Validation and commit run inside the commit critical section while holding
+        the locks of the variables written by the transaction. When current_time is
+        None the commit timestamp is drawn from the shared clock inside that critical
+        section, so no transaction can start after it without seeing the commit.
+        Returns the final status of the transaction.
         """
         log.info("Txn %s: END. Checking whether to COMMIT/ABORT...", txn_name)
 
-        if txn_name not in self.txn_map:
+        txn_obj = self.txn_map.get(txn_name)
+        if txn_obj is None:
             log.warning(f"Transaction {txn_name} does not exist.")
-            return
+            return None
 
-        txn_obj = self.txn_map[txn_name]
         txn_id = txn_obj.get_id()
         txn_start_time = txn_obj.get_arrival_time()
         log.info("Txn %s: Transaction status is %s", txn_name, txn_obj.get_transaction_status())
 
         if txn_obj.get_transaction_status() == TransactionStatus.WAITING:
             log.info("Txn %s: is waiting on some read. Must be ABORTED", txn_name)
-            self.abort_transaction(txn_name, current_time)
-            return
-
-        #Case 1: Check for site failure after write
-        log.debug("Accessed Sites: %s", txn_obj.get_sites_accessed())
-        accessed_sites = txn_obj.get_sites_accessed() 
-        for site_id in accessed_sites:
-            operation = txn_obj.get_transaction_type() 
-            timestamp = txn_obj.get_arrival_time()
-
-            if operation == TransactionType.WRITE:
-                failure_history = self.site_manager.get_site_failure_history(site_id)
-                for fail_time in failure_history:
-                    if fail_time > timestamp:
-                        log.info("Txn %s: ABORTED due to site failure after write.", txn_name)
-                        self.abort_transaction(txn_name, current_time)
-                        return
-                    
-        if txn_obj.get_transaction_status() != TransactionStatus.ABORTED:
-            #Case 2: Check for Snapshot Isolation violations
-            variables_accessed = self.txn_access_hist[txn_id]
-            log.debug(f"Checking SSI violations for Txn {txn_name} on accessed variables: {variables_accessed}")
-            for var_idx, operations in variables_accessed.items():
-                if 'W' in operations:
-                    log.debug(f"Txn {txn_name} has a write operation on variable x{var_idx}, checking against other transactions...")
-                    target_sites = self.site_manager.get_sites_holding_variable(var_idx)
-
-                    for site in target_sites:
-                        data_manager = site.getDataManager()
-                        variable = data_manager.getVariable(f"x{var_idx}") 
-                        last_committed_time = variable.getCommitTime() if variable else None
-                        if last_committed_time and last_committed_time > txn_start_time:
-                            log.info(f"Txn {txn_name}: ABORTED due to a later write from another transaction on variable x{var_idx} at site {site.get_id()}.")
-                            self.abort_transaction(txn_name, current_time)
-                            return
-
-            #Case 3: Check for cycles in the serialization graph
-            # Backup the current serialization graph
-            backup_graph = copy.deepcopy(self.serialization_graph)
-            
-            # Add relevant edges
-            self.add_edges_based_on_access(txn_id, variables_accessed)
-
-            culprit_txn_id = self.is_cyclic()
-            if culprit_txn_id:
-                log.info(f"Txn T{culprit_txn_id}: ABORTED due to a cycle in the serialization graph.")
-                self.abort_transaction(f"T{culprit_txn_id}", current_time)
-            
-            if txn_obj.get_transaction_status() != TransactionStatus.ABORTED:
+            self.abort_transaction(txn_name, self.current_time if current_time is None else current_time, AbortReason.READ_FAILURE)
+            return txn_obj.get_transaction_status()
+
+        if txn_obj.get_transaction_status() == TransactionStatus.ABORTED:
+            log.info("Txn %s: was already ABORTED", txn_name)
+            return txn_obj.get_transaction_status()
+
+        if txn_obj.is_read_only():
+            return self.commit_read_only_transaction(txn_obj, current_time)
+
+        written_vars = txn_obj.get_write_set()
+        if not written_vars and not self.concurrency_control.validates_reads:
+            #Never wrote: reads came under locks, there is nothing to validate or install
+            return self.commit_read_only_transaction(txn_obj, current_time)
+
+        with self.commit_lock, self.lock_variables(written_vars):
+            if current_time is None:
+                current_time = self.tick()
+            #Case 1: Check for site failure after write
+            log.debug("Accessed Sites: %s", txn_obj.get_sites_accessed())
+            accessed_sites = txn_obj.get_sites_accessed() 
+            for site_id in accessed_sites:
+                operation = txn_obj.get_transaction_type() 
+                timestamp = txn_obj.get_arrival_time()
+
+                if operation == TransactionType.WRITE:
+                    failure_history = self.site_manager.get_site_failure_history(site_id)
+                    for fail_time in failure_history:
+                        if fail_time > timestamp:
+                            log.info("Txn %s: ABORTED due to site failure after write.", txn_name)
+                            self.abort_transaction(txn_name, current_time, AbortReason.SITE_FAILURE)
+                            return txn_obj.get_transaction_status()
+                        
+            if txn_obj.get_transaction_status() != TransactionStatus.ABORTED \
+                    and self.concurrency_control.validate(self, txn_obj, current_time):
                 self.commit_transaction(txn_obj, current_time)
                 txn_obj.set_commit_time(current_time)
+                txn_obj.set_status(TransactionStatus.COMMITTED)
+                self.concurrency_control.committed(self, txn_obj)
+                self.metrics.increment("commits")
                 log.info(f"Txn {txn_name}: COMMITTED SUCCESSFULLY.")
+        return txn_obj.get_transaction_status()
+
+    def validate_snapshot_isolation(self, txn_obj, current_time):
+        """
+        The commit checks of serializable snapshot isolation, run in the commit critical section:
+        - first-committer-wins: no other transaction committed a variable it wrote since it began
+        - no two consecutive rw-antidependencies ("dangerous_structure" mode), or
+          no cycle in the serialization graph ("cycle" mode), whose culprit is aborted
+        Returns whether the transaction may commit.
+        """
+        txn_name = txn_obj.get_name()
+        txn_start_time = txn_obj.get_arrival_time()
+        #Case 2: Check for Snapshot Isolation violations
+        log.debug(f"Checking SSI violations for Txn {txn_name} on accessed variables: {txn_obj.get_variables_accessed()}")
+        for var_idx in txn_obj.get_write_set():
+            log.debug(f"Txn {txn_name} has a write operation on variable x{var_idx}, checking against other transactions...")
+            target_sites = self.site_manager.get_sites_holding_variable(var_idx)
+
+            for site in target_sites:
+                data_manager = site.getDataManager()
+                variable = data_manager.getVariable(f"x{var_idx}") 
+                last_committed_time = variable.getCommitTime() if variable else None
+                if last_committed_time and last_committed_time > txn_start_time:
+                    log.info(f"Txn {txn_name}: ABORTED due to a later write from another transaction on variable x{var_idx} at site {site.get_id()}.")
+                    self.abort_transaction(txn_name, current_time, AbortReason.FIRST_COMMITTER_WINS)
+                    return False
+
+        #Case 3: Check for two consecutive rw-antidependencies
+        if self.validation_mode == "dangerous_structure":
+            if self.has_dangerous_structure(txn_obj):
+                log.info(f"Txn {txn_name}: ABORTED due to a dangerous structure of rw-antidependencies.")
+                self.abort_transaction(txn_name, current_time, AbortReason.DANGEROUS_STRUCTURE)
+                return False
+            return True
 
-    def add_edges_based_on_access(self, txn_id, variables_accessed):
-        """
-        Adds edges to the serialization graph based on transaction accesses and timing.
-        This updated function includes edges for active transactions to accurately reflect potential conflicts.
-        """
-        log.debug(f"Adding edges for Transaction {txn_id} based on accessed variables: {variables_accessed}")
-
-        for var_idx, operations in variables_accessed.items():
-            w_flag = "W" in operations
-            r_flag = "R" in operations
-            for other_txn_name, other_txn_obj in self.txn_map.items():
-                other_txn_id = int(other_txn_name[1:])
-                if other_txn_id == txn_id:
-                    continue  # Skip self-edges
-
-                other_vars_accessed = self.txn_access_hist[other_txn_id]
-                log.debug(f"Access history for {txn_id}: {self.txn_access_hist[txn_id]} before adding edges")
-                log.debug(f"Access history for {other_txn_id}: {self.txn_access_hist[other_txn_id]} before adding edges")
-                other_w_flag = "W" in other_vars_accessed.get(var_idx, [])
-                log.debug(f"Evaluating other_w_flag for {other_txn_id} on x{var_idx}: {other_vars_accessed.get(var_idx, [])} -> {other_w_flag}")
-                other_r_flag = "R" in other_vars_accessed.get(var_idx, [])
-                log.debug(f"Evaluating other_r_flag for {other_txn_id} on x{var_idx}: {other_vars_accessed.get(var_idx, [])} -> {other_r_flag}")
-
-                # Log other transaction details
-                log.debug(f"Comparing with {other_txn_id}: {'Write' if other_w_flag else ''} {'Read' if other_r_flag else ''} on x{var_idx}")
-
-                # Consider all potential conflicts, not just with committed transactions
-                if other_w_flag and w_flag:
-                    log.info(f"Conflict detected: {other_txn_id} writes to x{var_idx} and {txn_id} also writes. Adding ww edge.")
-                    self.add_edge(txn_id, other_txn_id, 'ww')
-                if other_w_flag and r_flag:
-                    log.info(f"Conflict detected: {other_txn_id} writes to x{var_idx} and {txn_id} reads. Adding wr edge.")
-                    self.add_edge(other_txn_id, txn_id, 'wr')
-                if other_r_flag and w_flag:
-                    log.info(f"Conflict detected: {other_txn_id} reads x{var_idx} and {txn_id} writes. Adding rw edge.")
-                    self.add_edge(txn_id, other_txn_id, 'rw')
-
-        # Log the serialization graph after adding edges
-        log.debug("Serialization graph after adding edges:")
-        self.print_serialization_graph()
+        #Case 3: Check for cycles in the serialization graph
+        with self.state_lock:
+            self.add_edges_based_on_access(txn_obj)
+        while True:
+            with self.state_lock:
+                cycle_check_start = time.perf_counter() if self.metrics.enabled else None
+                cycle_path = self.is_cyclic(txn_obj.get_id())
+                if cycle_check_start is not None:
+                    self.metrics.observe("cycle_check_seconds", time.perf_counter() - cycle_check_start)
+            if not cycle_path:
+                return True
+            #Committed transactions cannot give way, the latest to arrive of the others is the culprit
+            culprit = max((self.txn_map[f"T{node}"] for node in set(cycle_path)
+                           if self.txn_map[f"T{node}"].get_transaction_status() != TransactionStatus.COMMITTED),
+                          key=lambda other_txn_obj: other_txn_obj.get_arrival_time())
+            log.info(f"Txn {culprit.get_name()}: ABORTED due to a cycle in the serialization graph: "
+                     f"{' -> '.join(f'T{node}' for node in cycle_path)}.")
+            self.abort_transaction(culprit.get_name(), current_time, AbortReason.CYCLE)
+            if culprit is txn_obj:
+                return False
+
+    def defer_operation(self, txn_name, operation):
+        """Buffers an operation of a transaction queued for admission. Returns whether it was deferred."""
+        with self.state_lock:
+            operations = self.deferred_ops.get(txn_name)
+            if operations is None:
+                return False
+            operations.append(operation)
+        log.debug(f"Transaction {txn_name} is queued for admission, operation deferred.")
+        return True
+
+    def defer_blocked_operation(self, txn_name, operation):
+        """Defers an operation the concurrency control blocked, the later operations of the transaction queue behind it"""
+        with self.state_lock:
+            self.deferred_ops[txn_name] = deque([operation])
+
+    def release_locks(self, txn_obj):
+        """Lets the concurrency control release what an ended transaction held, queueing the transactions it unblocked"""
+        woken = self.concurrency_control.release(self, txn_obj)
+        if woken:
+            with self.state_lock:
+                self.resume_queue.extend(woken)
+
+    def resume_unblocked_transactions(self):
+        """
+        Replays the deferred operations of the unblocked transactions, each at a fresh time from the shared clock.
+        Called once an operation is done, outside the commit critical section; replays that unblock more
+        transactions extend the loop of the outermost call rather than nesting.
+        """
+        with self.state_lock:
+            if self.resuming or not self.resume_queue:
+                return
+            self.resuming = True
+        try:
+            while True:
+                with self.state_lock:
+                    if not self.resume_queue:
+                        self.resuming = False
+                        return
+                    txn_name = self.resume_queue.popleft()
+                    operations = self.deferred_ops.pop(txn_name, ())
+                log.info(f"Transaction {txn_name} unblocked, replaying {len(operations)} deferred operations.")
+                for operation in operations:
+                    operation(self.tick())
+        except BaseException:
+            self.resuming = False
+            raise
+
+    def admit_queued_transactions(self, txn_name, status):
+        """
+        Releases the admission slot of an ended transaction and replays the deferred operations
+        of the transactions admitted in its place. Each replayed operation gets a fresh time
+        from the shared clock, so an admitted transaction begins after the commits it waited on.
+        A replayed end admits the next transactions, which extend the loop of the outermost call rather than nesting.
+        """
+        admitted = self.admission.release(txn_name, status == TransactionStatus.COMMITTED)
+        with self.state_lock:
+            self.admission_queue.extend(admitted)
+            if self.admitting or not self.admission_queue:
+                return
+            self.admitting = True
+        try:
+            while True:
+                with self.state_lock:
+                    if not self.admission_queue:
+                        self.admitting = False
+                        return
+                    admitted_txn = self.admission_queue.popleft()
+                    operations = self.deferred_ops.pop(admitted_txn)
+                log.info(f"Transaction {admitted_txn} admitted, replaying {len(operations) - 1} deferred operations.")
+                self.metrics.increment("admission.admitted_from_queue")
+                for operation in operations:
+                    operation(self.tick())
+        except BaseException:
+            self.admitting = False
+            raise
+
+    def finish_attempt(self, txn_name, status, current_time):
+        """
+        Records the end-to-end commit latency of a committed transaction, or schedules the
+        retry of an aborted one. Read-only transactions that wrote would abort again and are not retried.
+        """
+        with self.state_lock:
+            txn_obj = self.txn_map[txn_name]
+            attempt = self.retry_attempts.get(txn_name, 0) + 1
+            if status == TransactionStatus.COMMITTED or txn_obj.get_abort_reason() == AbortReason.READ_ONLY_WRITE \
+                    or not self.retry_policy.should_retry(attempt):
+                started = self.retry_started.pop(txn_name, None)
+                self.retry_attempts.pop(txn_name, None)
+                if status == TransactionStatus.COMMITTED:
+                    self.metrics.increment("retries.before_commit", attempt - 1)
+                    if started is not None:
+                        self.metrics.observe("commit_latency_seconds", time.perf_counter() - started)
+                else:
+                    log.info(f"Transaction {txn_name} is not retried after {attempt - 1} retries.")
+                    self.metrics.increment("retries.given_up")
+                return
+
+            self.retry_attempts[txn_name] = attempt
+            due_time = (self.current_time if current_time is None else current_time) + self.retry_policy.backoff(attempt)
+            heapq.heappush(self.retry_schedule, (due_time, txn_name, list(txn_obj.get_operation_log()), txn_obj.is_read_only()))
+        log.info(f"Transaction {txn_name} aborted, retry {attempt} scheduled at time {due_time}.")
+
+    def process_due_retries(self, current_time):
+        """
+        Re-executes the aborted transactions whose backoff has elapsed at current_time.
+        Each retry starts from a clean slate under a fresh timestamp and replays the operation
+        log, one tick per operation, then ends, which may schedule the next retry.
+        """
+        while True:
+            with self.state_lock:
+                if not self.retry_schedule or self.retry_schedule[0][0] > current_time:
+                    return
+                _, txn_name, operations, read_only = heapq.heappop(self.retry_schedule)
+                self.reset_transaction(txn_name)
+            log.info(f"Retrying transaction {txn_name} (retry {self.retry_attempts.get(txn_name)}).")
+            self.metrics.increment("retries")
+            self.begin_transaction(txn_name, self.tick(), read_only)
+            for operation in operations:
+                if operation[0] == "R":
+                    self.read_request(txn_name, operation[1], self.tick())
+                else:
+                    self.write_request(txn_name, operation[1], operation[2], self.tick())
+            self.end_transaction(txn_name, self.tick())
+
+    def drain_retries(self):
+        """Advances the clock until every scheduled retry has run, returning the final time"""
+        while self.retry_schedule:
+            self.process_due_retries(self.tick())
+        return self.current_time
+
+    def reset_transaction(self, txn_name):
+        """Forgets an aborted transaction so that it can begin again under the same name"""
+        txn_obj = self.txn_map.pop(txn_name)
+        txn_id = txn_obj.get_id()
+        self.serialization_graph.pop(txn_id, None)
+        for node, neighbors in self.serialization_graph.items():
+            self.serialization_graph[node] = {edge for edge in neighbors if edge[0] != txn_id}
+        for readers in self.var_readers.values():
+            readers.discard(txn_name)
+        for writers in self.var_writers.values():
+            writers.discard(txn_name)
+
+    def evict_finished_transactions(self):
+        """
+        Moves ended transactions out of the transaction map, serialization
+        graph and reader/writer indexes once no active transaction can conflict with them:
+        - aborted transactions, whose writes were never visible, unless a retry is pending
+        - committed transactions that committed before every active transaction began,
+          and that no retained transaction precedes in the serialization graph
+        Their summaries are kept, oldest dropped first beyond max_summaries.
+        Returns the number of evicted transactions.
+        """
+        with self.state_lock:
+            active_arrivals = [txn_obj.get_arrival_time() for txn_obj in self.txn_map.values()
+                               if txn_obj.get_transaction_status() in (TransactionStatus.RUNNING, TransactionStatus.WAITING)]
+            oldest_active = min(active_arrivals, default=float('inf'))
+            evicted = [txn_obj for txn_name, txn_obj in self.txn_map.items()
+                       if txn_obj.get_end_time() is not None and txn_name not in self.retry_attempts
+                       and (txn_obj.get_transaction_status() == TransactionStatus.ABORTED
+                            or txn_obj.get_commit_time() < oldest_active)]
+            #A committed transaction stays while a retained one precedes it in the serialization graph,
+            #a cycle through a transaction still active can pass through both
+            evictable = {txn_obj.get_id(): txn_obj for txn_obj in evicted}
+            frontier = [txn_obj.get_id() for txn_obj in self.txn_map.values() if txn_obj.get_id() not in evictable
+                        and txn_obj.get_transaction_status() != TransactionStatus.ABORTED]
+            while frontier:
+                for neighbor, _ in self.serialization_graph.get(frontier.pop(), ()):
+                    successor = evictable.get(neighbor)
+                    if successor is not None and successor.get_transaction_status() == TransactionStatus.COMMITTED:
+                        del evictable[neighbor]
+                        frontier.append(neighbor)
+            evicted = list(evictable.values())
+            if not evicted:
+                return 0
+
+            evicted_ids = {txn_obj.get_id() for txn_obj in evicted}
+            evicted_names = {txn_obj.get_name() for txn_obj in evicted}
+            for txn_obj in evicted:
+                del self.txn_map[txn_obj.get_name()]
+                self.serialization_graph.pop(txn_obj.get_id(), None)
+                self.finished_summaries[txn_obj.get_name()] = txn_obj.summary()
+            for node, neighbors in self.serialization_graph.items():
+                self.serialization_graph[node] = {edge for edge in neighbors if edge[0] not in evicted_ids}
+            for var_idx in list(self.var_readers):
+                self.var_readers[var_idx] -= evicted_names
+            for var_idx in list(self.var_writers):
+                self.var_writers[var_idx] -= evicted_names
+            while len(self.finished_summaries) > self.max_summaries:
+                self.finished_summaries.popitem(last=False)
+            self.evicted_count += len(evicted)
+        log.debug(f"Evicted {len(evicted)} finished transactions, {len(self.txn_map)} retained.")
+        return len(evicted)
+
+    def get_transaction_summary(self, txn_name):
+        """Returns the summary tuple of a transaction, retained or evicted, or None if it is unknown"""
+        with self.state_lock:
+            txn_obj = self.txn_map.get(txn_name)
+            return txn_obj.summary() if txn_obj is not None else self.finished_summaries.get(txn_name)
+
+    def is_queued(self, txn_name):
+        """Checks if a transaction is waiting for admission or blocked by the concurrency control"""
+        with self.state_lock:
+            return txn_name in self.deferred_ops
+
+    def execute_batch(self, operations):
+        """
+        Runs typed operations (Begin, Read, Write, End, Fail, Recover) in order, each at a
+        fresh time of the shared clock, and returns one Result per operation.
+        Skips instruction parsing, and checks due retries and records metrics once per batch.
+        With a read executor, consecutive snapshot reads of distinct transactions are served in parallel.
+        """
+        start = time.perf_counter()
+        results = []
+        read_run, run_txns = [], set()
+        for operation in operations:
+            if self.read_executor is not None and self.is_snapshot_read(operation):
+                if operation.txn_name in run_txns:
+                    self.run_parallel_reads(read_run, results)
+                    read_run, run_txns = [], set()
+                read_run.append((operation, self.tick()))
+                run_txns.add(operation.txn_name)
+                continue
+            if read_run:
+                self.run_parallel_reads(read_run, results)
+                read_run, run_txns = [], set()
+            current_time = None if operation.timestamped_on_commit else self.tick()
+            value = operation.run(self, current_time)
+            results.append(self.operation_result(operation, value, self.current_time if current_time is None else current_time))
+        if read_run:
+            self.run_parallel_reads(read_run, results)
+        if self.retry_policy is not None:
+            self.process_due_retries(self.current_time)
+        self.metrics.increment("batches")
+        self.metrics.increment("batch_operations", len(results))
+        self.metrics.observe("batch_seconds", time.perf_counter() - start)
+        return results
+
+    def is_snapshot_read(self, operation):
+        """
+        Checks if an operation is a read of a snapshot: the protocol reads snapshots or the transaction is read-only.
+        Other reads see the latest versions and may take locks, whose release by a deadlock victim can replay
+        a deferred end, so a commit could happen in the middle of a parallel run.
+        """
+        if not operation.snapshot_read:
+            return False
+        if self.concurrency_control.snapshot_reads:
+            return True
+        txn_obj = self.txn_map.get(operation.txn_name)
+        return txn_obj is not None and txn_obj.is_read_only()
+
+    def run_parallel_reads(self, read_run, results):
+        """Serves a run of (Read operation, time) pairs on the read executor and appends their results in order"""
+        values = self.read_executor.run_reads(self, read_run)
+        for (operation, current_time), value in zip(read_run, values):
+            results.append(self.operation_result(operation, value, current_time))
+        self.metrics.increment("parallel_read_runs")
+
+    def operation_result(self, operation, value, current_time):
+        """Builds the Result of an operation from its raw value and the state of its transaction"""
+        txn_name = getattr(operation, "txn_name", None)
+        if txn_name is None:
+            return Result(operation, ResultStatus.OK, time=current_time)
+        if self.deferred_ops and self.is_queued(txn_name):
+            return Result(operation, ResultStatus.QUEUED, time=current_time)
+        txn_obj = self.txn_map.get(txn_name)
+        if txn_obj is not None:
+            status, abort_reason = txn_obj.get_transaction_status(), txn_obj.get_abort_reason()
+        else:
+            #Evicted once finished, only its summary is left
+            summary = self.get_transaction_summary(txn_name)
+            if summary is None:
+                return Result(operation, ResultStatus.ERROR, time=current_time)
+            status, abort_reason = TransactionStatus(summary[1]), AbortReason(summary[5]) if summary[5] else None
+        if status == TransactionStatus.ABORTED:
+            return Result(operation, ResultStatus.ABORTED, abort_reason=abort_reason, time=current_time)
+        if status == TransactionStatus.COMMITTED:
+            return Result(operation, ResultStatus.COMMITTED, time=current_time)
+        if status == TransactionStatus.WAITING and value is None:
+            return Result(operation, ResultStatus.WAITING, time=current_time)
+        return Result(operation, ResultStatus.OK, value=value, time=current_time)
+
+    def commit_read_only_transaction(self, txn_obj, current_time):
+        """
+        Commits a transaction that did not write without edge construction or cycle detection.
+        Its reads were served from its snapshot, so it cannot invalidate other transactions.
+        """
+        if current_time is None:
+            current_time = self.tick()
+        txn_obj.set_commit_time(current_time)
+        txn_obj.set_status(TransactionStatus.COMMITTED)
+        self.metrics.increment("commits")
+        self.metrics.increment("commits.read_only")
+        log.info(f"Txn {txn_obj.get_name()}: read-only, COMMITTED SUCCESSFULLY.")
+        return txn_obj.get_transaction_status()
+
+    def is_concurrent(self, txn_obj, other_txn_obj):
+        """Checks if another transaction overlapped txn_obj: it is still active or committed after txn_obj began"""
+        status = other_txn_obj.get_transaction_status()
+        if status == TransactionStatus.ABORTED:
+            return False
+        if status == TransactionStatus.COMMITTED:
+            return other_txn_obj.get_commit_time() > txn_obj.get_arrival_time()
+        return True
+
+    def has_dangerous_structure(self, txn_obj):
+        """
+        Checks if committing a transaction completes the pivot pattern T1 -rw-> T2 -rw-> T3:
+        - the committing transaction has both an inbound and an outbound rw-antidependency, or
+        - it would turn an already committed transaction into such a pivot.
+        The rw-antidependency flags are only recorded on the other transactions if it commits,
+        so an aborted transaction does not leave stale conflicts behind.
+        """
+        with self.state_lock:
+            #Concurrent readers did not see this write: reader -rw-> txn
+            readers = {self.txn_map[name] for var_idx in txn_obj.get_write_set()
+                       for name in self.var_readers.get(var_idx, ()) if name != txn_obj.get_name()}
+            #This read did not see a concurrent write: txn -rw-> writer
+            writers = {self.txn_map[name] for var_idx in txn_obj.get_read_set()
+                       for name in self.var_writers.get(var_idx, ()) if name != txn_obj.get_name()}
+            readers = [reader for reader in readers if self.is_concurrent(txn_obj, reader)]
+            writers = [writer for writer in writers if self.is_concurrent(txn_obj, writer)]
+
+            if (readers or txn_obj.in_conflict) and (writers or txn_obj.out_conflict):
+                log.debug(f"Txn {txn_obj.get_name()} is the pivot of a dangerous structure.")
+                return True
+            for reader in readers:
+                if reader.get_transaction_status() == TransactionStatus.COMMITTED and reader.in_conflict:
+                    log.debug(f"Txn {txn_obj.get_name()} completes a dangerous structure around committed pivot {reader.get_name()}.")
+                    return True
+            for writer in writers:
+                if writer.get_transaction_status() == TransactionStatus.COMMITTED and writer.out_conflict:
+                    log.debug(f"Txn {txn_obj.get_name()} completes a dangerous structure around committed pivot {writer.get_name()}.")
+                    return True
+
+            for reader in readers:
+                reader.set_out_conflict()
+                txn_obj.set_in_conflict()
+            for writer in writers:
+                writer.set_in_conflict()
+                txn_obj.set_out_conflict()
+        return False
+
+    def flag_skipped_versions(self, txn_obj, var_idx):
+        """
+        In dangerous structure mode, records the rw-antidependencies of a snapshot read on the transactions that
+        already committed a newer version of the variable: the reader did not see their write, reader -rw-> writer.
+        A reader that aborts later leaves its flags behind, which can only cause extra aborts.
+        """
+        if self.validation_mode != "dangerous_structure" or self.concurrency_control.name != "ssi" or txn_obj.is_read_only():
+            return
+        with self.state_lock:
+            for name in self.var_writers.get(var_idx, ()):
+                writer = self.txn_map.get(name)
+                if writer is not None and writer is not txn_obj and writer.get_transaction_status() == TransactionStatus.COMMITTED \
+                        and writer.get_commit_time() > txn_obj.get_arrival_time():
+                    writer.set_in_conflict()
+                    txn_obj.set_out_conflict()
+
+    def add_edges_based_on_access(self, txn_obj):
+        """
+        Adds the edges of the multiversion serialization graph between a committing transaction and the others.
+        A transaction that committed before it began comes first on every conflict: its writes were read or
+        overwritten, or its reads saw the versions before this write. With a concurrent transaction only the
+        rw-antidependencies remain: a read does not see the concurrent write, reader -rw-> writer. Concurrent
+        writes of a variable are left to first-committer-wins. Aborted transactions take no part.
+        The read and write sets of two transactions are intersected as bitmasks, one operation per conflict type.
+        """
+        txn_id = txn_obj.get_id()
+        read_set, write_set = txn_obj.read_set, txn_obj.write_set
+        log.debug(f"Adding edges for Transaction {txn_id} based on accessed variables: {txn_obj.get_variables_accessed()}")
+
+        for other_txn_name, other_txn_obj in self.txn_map.items():
+            other_txn_id = other_txn_obj.get_id()
+            if other_txn_id == txn_id or other_txn_obj.get_transaction_status() == TransactionStatus.ABORTED:
+                continue
+
+            if not self.is_concurrent(txn_obj, other_txn_obj):
+                conflicts = (other_txn_obj.write_set & (read_set | write_set)) | (other_txn_obj.read_set & write_set)
+                if conflicts:
+                    log.info(f"Conflict detected: {other_txn_id} committed {self.format_variables(conflicts)} before {txn_id} began. Adding edge.")
+                    self.add_edge(other_txn_id, txn_id, 'wr' if other_txn_obj.write_set & read_set else 'ww')
+                continue
+            wr_conflicts = other_txn_obj.write_set & read_set
+            rw_conflicts = other_txn_obj.read_set & write_set
+            if wr_conflicts:
+                log.info(f"Conflict detected: {other_txn_id} writes to {self.format_variables(wr_conflicts)} and {txn_id} reads the older version. Adding rw edge.")
+                self.add_edge(txn_id, other_txn_id, 'rw')
+            if rw_conflicts:
+                log.info(f"Conflict detected: {other_txn_id} reads {self.format_variables(rw_conflicts)} and {txn_id} writes. Adding rw edge.")
+                self.add_edge(other_txn_id, txn_id, 'rw')
+
+        #Dump the serialization graph once per commit, only when it is logged
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Serialization graph after adding edges:")
+            self.print_serialization_graph()
+
+    def format_variables(self, mask):
+        """Formats the variables of a read or write set mask as "x1, x4" """
+        return ", ".join(f"x{var_idx}" for var_idx in Transaction.variables_in(mask))
 
     def add_edge(self, u, v, edge_type=None):
         """
@@ -240,104 +972,71 @@ class TransactionManager:
             self.serialization_graph[u].add((v, edge_type))
             log.debug(f"Added edge T{u} -> T{v} of type {edge_type}.")
 
-        # Print updated graph
-        self.print_serialization_graph()
-
-    def is_cyclic_util(self, v, visited, rec_stack, path, cycle_path):
+    def is_cyclic(self, txn_id):
         """
-        Helper function for cycle detection in a directed graph.
-        Marks visited nodes and detects cycles using recursion.
+        Searches the serialization graph for a cycle through a transaction, skipping aborted transactions.
+        Cycles elsewhere were there before it and are not its doing. Returns the cycle path, or None.
         """
-        visited[v] = True
-        rec_stack[v] = True
-        path.append(v)
-
-        for neighbor, _ in self.serialization_graph.get(v, []):
-            if not visited[neighbor]:
-                if self.is_cyclic_util(neighbor, visited, rec_stack, path, cycle_path):
-                    return True
-            elif rec_stack[neighbor]:
-                # Cycle detected
+        path = [txn_id]
+        visited = {txn_id}
+        stack = [iter(self.serialization_graph.get(txn_id, ()))]
+        while stack:
+            for neighbor, _ in stack[-1]:
+                if neighbor == txn_id:
+                    log.warning(f"Cycle detected through transaction {txn_id}: {path}")
+                    return path + [txn_id]
+                other_txn_obj = self.txn_map.get(f"T{neighbor}")
+                if neighbor in visited or other_txn_obj is None \
+                        or other_txn_obj.get_transaction_status() == TransactionStatus.ABORTED:
+                    continue
+                visited.add(neighbor)
                 path.append(neighbor)
-                cycle_path.extend(path)
-                return True
-
-        rec_stack[v] = False
-        path.pop()
-        return False
-
-
-    def is_cyclic(self):
-        """
-        Checks if the serialization graph contains any cycles and returns the transaction causing the cycle.
-        """
-        visited = {node: False for node in self.serialization_graph}
-        rec_stack = {node: False for node in self.serialization_graph}
-        cycle_path = []
-
-        for node in self.serialization_graph:
-            if not visited[node]:
-                if self.is_cyclic_util(node, visited, rec_stack, [], cycle_path):
-                    # Sort cycle_path by transaction start time and return the latest transaction
-                    log.debug(f"Cycle path detected: {cycle_path}")
-                    latest_txn = max(cycle_path, key=lambda txn: self.txn_map[f'T{txn}'].get_arrival_time())
-                    log.warning(f"Cycle detected caused by transaction {latest_txn}.")
-                    return latest_txn
-
+                stack.append(iter(self.serialization_graph.get(neighbor, ())))
+                break
+            else:
+                stack.pop()
+                path.pop()
         return None  # No cycle detected
     
     def handle_odd_indexed_variable(self, txn_obj, var_name, var_idx, current_time):
         """
-        Handles read requests for odd-indexed variables by:
-        1. Identifying the target site based on the variable index.
-        2. Attempting to serve the read from the target site, prioritizing:
-        - Active (UP) sites.
-        - Recovered sites with valid recent snapshots.
+        Handles read requests for unreplicated (by default odd-indexed) variables by:
+        1. Identifying the only site holding the variable from the placement.
+        2. Attempting to serve the read from the target site when it is UP or RECOVERED,
+        an unreplicated variable being readable as soon as its site recovers.
         3. Processing the read failure if no valid site is available.
+        Returns the value read, or None if the read failed.
         """
-        target_site_id = 1 + var_idx % 10
-
-        #Iterate over all sites to find the target site
-        for site in self.site_manager.getAllSites():
-            if site.get_id() == target_site_id:
-                if site.getSiteStatus() == SiteStatus.UP:
-                    #Check if the site can serve the read request
-                    if self.can_site_serve_read(site, txn_obj.get_name(), var_idx):
-                        self.process_read_success(site, txn_obj, var_name, var_idx)
-                        return
-                elif site.getSiteStatus() == SiteStatus.RECOVERED:
-                    #Check for valid committed writes after recovery
-                    recovery_history = self.site_manager.get_site_recover_history(site.get_id())
-                    last_recovery_time = max(recovery_history, default=float('-inf'))
-
-                    if self.can_site_serve_read(site, txn_obj.get_name(), var_idx):
-                        if site.getDataManager().checkCommitBtwTimeRange(last_recovery_time, txn_obj.get_arrival_time(), var_idx):
-                            self.process_read_success(site, txn_obj, var_name, var_idx)
-                            return
-                        
-                    log.debug("Site %s has recovered but no valid write for variable %s.", site.get_id(), var_name)
-
-                else:
-                    #Handle unavailable site
-                    log.error("Transaction %s failed to read variable %s from site %s. Site unavailable in %s state.",
-                            txn_obj.get_name(), var_name, site.get_id(), site.getSiteStatus())
-                    break
+        target_site_id = self.site_manager.placement.primary_site(var_idx)
+
+        #The placement names the site directly
+        site = self.site_manager.getSite(target_site_id - 1)
+        if site.getSiteStatus() != SiteStatus.FAILED:
+            #Check if the site can serve the read request
+            if self.can_site_serve_read(site, txn_obj.get_name(), var_idx, current_time):
+                return self.process_read_success(site, txn_obj, var_name, var_idx, current_time)
+        else:
+            #Handle unavailable site
+            log.error("Transaction %s failed to read variable %s from site %s. Site unavailable in %s state.",
+                    txn_obj.get_name(), var_name, site.get_id(), site.getSiteStatus())
 
         #If no valid site was found, process the read failure
         log.error("Transaction %s failed to read variable %s from site %s. Site unavailable.",
                 txn_obj.get_name(), var_name, target_site_id)
         self.process_read_failure(txn_obj, var_name)
+        return None
 
     def handle_even_indexed_variable(self, txn_obj, var_name, var_idx, current_time):
         """
-        Handles read requests for even-indexed variables by:
-        1. Iterating over all sites that can serve even-indexed variables.
-        2. Attempting to serve the read from UP or RECOVERED sites.
+        Handles read requests for replicated (by default even-indexed) variables by:
+        1. Iterating over the sites holding the variable, in the order of the read routing policy.
+        2. Attempting to serve the read from UP sites, or RECOVERED sites whose copy was committed since.
         3. Adding the transaction to a waitlist if no sites can serve the read request.
+        Returns the value read, or None if the read is waiting or failed.
         """
         sites_to_wait = []
 
-        for site in self.site_manager.getAllSites():
+        for site in self.read_router.order_sites(self.site_manager.get_sites_holding_variable(var_idx), txn_obj):
             log.debug("Checking site %s in %s state for variable %s (Transaction %s)",
                     site.get_id(), site.getSiteStatus(), var_name, txn_obj.get_name())
 
@@ -346,23 +1045,13 @@ class TransactionManager:
             #    log.debug("Skipping site %s as its ID is not valid for even-indexed variable %s.", site.get_id(), var_name)
             #    continue
 
-            if site.getSiteStatus() == SiteStatus.UP:
-                #Check if the site can serve the read request
-                if self.can_site_serve_read(site, txn_obj.get_name(), var_idx):
-                    self.process_read_success(site, txn_obj, var_name, var_idx)
-                    return
-            elif site.getSiteStatus() == SiteStatus.RECOVERED:
-                #Check for valid committed writes after recovery
-                recovery_history = self.site_manager.site_recover_history.get(site.get_id(), []) 
-                last_recovery_time = max(recovery_history, default=float('-inf')) 
-                if self.can_site_serve_read(site, txn_obj.get_name(), var_idx):
-                    if site.getDataManager().check_commit_btw_time_range(last_recovery_time, txn_obj.get_arrival_time(), var_idx):
-                        self.process_read_success(site, txn_obj, var_name, var_idx)
-                        log.info("Transaction %s has read value %s from Site %s", txn_obj.get_ID(), site.getDataManager().findRecentSnapshot(txn_obj.get_arrival_time(), var_idx))
-                        return
-                    
-                log.debug("Site %s has recovered but no valid write for variable %s.", site.get_id(), var_name)
-            elif site.getSiteStatus() == SiteStatus.FAILED:
+            if site.getSiteStatus() != SiteStatus.FAILED:
+                #Check if the site can serve the read request, a recovered copy only once it was committed again
+                if self.can_site_serve_read(site, txn_obj.get_name(), var_idx, current_time):
+                    return self.process_read_success(site, txn_obj, var_name, var_idx, current_time)
+                if site.getSiteStatus() == SiteStatus.RECOVERED:
+                    log.debug("Site %s has recovered but no valid write for variable %s.", site.get_id(), var_name)
+            else:
                 #Track sites to wait for if no valid read is possible
                 sites_to_wait.append(site)
 
@@ -373,6 +1062,7 @@ class TransactionManager:
         else:
             log.error("Transaction %s failed to read variable %s. No valid sites available.", txn_obj.get_name(), var_name)
             self.process_read_failure(txn_obj, var_name)
+        return None
 
     def print_serialization_graph(self):
         """
@@ -388,68 +1078,56 @@ class TransactionManager:
         for node, edges in self.serialization_graph.items():
             log.info(f"T{node} -> {[(f'T{neighbor}', edge_type) for neighbor, edge_type in edges]}")
 
-    def can_site_serve_read(self, site, txn_name, var_index):
-        """Check if a site can service a read request"""
+    def can_site_serve_read(self, site, txn_name, var_index, current_time=None):
+        """
+        Check if a site can service a read request: it is not FAILED and its copy of the variable
+        holds every version committed before the read timestamp, see DataManager.is_readable
+        """
         txn_obj = self.txn_map[txn_name]
-        txn_start_time = txn_obj.get_arrival_time() #Get the transaction start time to search for the most recent snapshot of a variable
-        data_manager = site.getDataManager()
         site_status = site.getSiteStatus()
-
+        read_time = self.concurrency_control.read_timestamp(txn_obj, self.current_time if current_time is None else current_time)
         log.debug("Checking if site %s can serve read for transaction %s, variable x%s", site.get_id(), txn_name, var_index)
 
-        #Check if the site is up
-        if site_status == SiteStatus.UP:
-            """First check if there were any commits to the variable"""
-            #recent_snapshot
-            recent_snapshot = data_manager.findRecentSnapshot(txn_start_time, var_index)
-            if recent_snapshot:
-                log.debug("Site %s is UP. Found a valid snapshot for variable x%s", site.get_id(), var_index)
-                return True
-            else:
-                # if recent_snapshot== None and data_manager.findRecentSnapshot(txn_start_time, var_index)
-                # log.warning("Site %s is UP but has no valid snapshot for variable x%s", site.get_id(), var_index)
-                log.debug("Site %s is UP. Found a valid snapshot for variable x%s", site.get_id(), var_index)
-                return True
-        
-        if site_status == SiteStatus.RECOVERED:
-            recovery_history = self.site_manager.site_recover_history.get(site.get_id(), []) 
-            last_recovery_time = max(recovery_history, default=float('-inf'))       
-            committed_snapshot_time=None 
-            # committed_snapshot_time = data_manager.most_recent_snapshot_time()
-            recent_snapshot = data_manager.findRecentSnapshot(txn_start_time, var_index)
-            for variable in data_manager.getVariableList():
-                if variable.getVariableName()[1:]==str(var_index):
-                    # recent_snapshot = data_manager.findRecentSnapshot(txn_start_time, var_index)
-                    committed_snapshot_time=variable.most_recent_snapshot_time()
-                    if committed_snapshot_time:
-                        if last_recovery_time < committed_snapshot_time  and committed_snapshot_time < txn_start_time:
-                            return True
-                    else:
-                        return True
-
-        #Otherwise site has failed
-        log.error("Site %s cannot serve read for transaction %s, variable x%s. Site is %s", site.get_id(), txn_name, var_index, site_status)
+        if site_status != SiteStatus.FAILED and site.getDataManager().is_readable(var_index, read_time):
+            return True
+        log.debug("Site %s cannot serve read for transaction %s, variable x%s. Site is %s", site.get_id(), txn_name, var_index, site_status)
         return False
 
-    def process_read_success(self, site, txn_obj, variable_name, var_index):
+    def process_read_success(self, site, txn_obj, variable_name, var_index, current_time):
         """
-        Adds transaction object to access history
-        Adds site to site accessed
+        Adds site to site accessed (the read was already added to the access history by read_request)
+        Memoizes and returns the snapshot value the transaction read
         """
         log.info("Transaction %s successfully read variable %s from site %s", txn_obj.get_id(), variable_name, site.get_id())
 
-        self.txn_access_hist[txn_obj.get_id()][var_index].append("R")
         txn_obj.add_site_accessed(site.get_id())
+        self.read_router.start_read(site.get_id())
+        try:
+            value = site.getDataManager().findRecentSnapshot(self.concurrency_control.read_timestamp(txn_obj, current_time), var_index)
+        finally:
+            self.read_router.finish_read(site.get_id())
+        txn_obj.cache_read(var_index, value)
+        self.flag_skipped_versions(txn_obj, var_index)
+        if self.result_sink is not None:
+            self.result_sink.emit("read", current_time, txn=txn_obj.get_name(), variable=variable_name, value=value,
+                                  site=site.get_id())
+        return value
 
     def process_read_failure(self, txn_obj, var_name):
         """Handles a failed read request and marks the transaction in failed state accordingly"""
         log.error("Transaction %s failed to read variable %s: No available sites or valid snapshots", txn_obj.get_id(), var_name)
         txn_obj.set_status(TransactionStatus.ABORTED)
+        txn_obj.set_abort_reason(AbortReason.READ_FAILURE)
+        self.metrics.increment("aborts")
+        self.metrics.increment(f"aborts.{AbortReason.READ_FAILURE.value}")
+        if self.result_sink is not None:
+            self.result_sink.emit("abort", self.current_time, txn=txn_obj.get_name(), reason=AbortReason.READ_FAILURE.value)
+        self.release_locks(txn_obj)
 
     def add_pending_reads(self, sites, txn_obj, var_index):
         """Adds a read request to the wait list to let the site manager know about the transaction object"""
         for site in sites:
-            if self.is_even_index(var_index):
+            if self.is_replicated(var_index):
                 self.site_manager.add_waitlist_txn_even(site.get_id(), txn_obj, var_index)
             else:
                 self.site_manager.add_waitlist_txn_odd(site.get_id(), txn_obj, var_index)
@@ -460,33 +1138,33 @@ class TransactionManager:
         if u not in self.serialization_graph:
             self.serialization_graph[u] = set()
 
-    def is_even_index(self, variable_index):
+    def is_replicated(self, variable_index):
         """
-        Checks if the variable is even and serves as a helper function to direct the variable to the appropriate site
+        Checks if the variable has copies on several sites and serves as a helper function to direct the variable to the appropriate sites
         """
-        if(variable_index % 2 == 0):
-            return True
-        else:  
-            return False
+        return self.site_manager.placement.is_replicated(variable_index)
     
     #TO DO: Example: "W(T1, x6,v) says transaction 1 wishes to write all available copies of x6 with the value v. So, T1 can write to x6 on all sites that are up and that contain x6"
+    #Recovered sites are available copies too, the commit makes their copy readable again
     def attempt_write(self, txn_obj, var_idx, value):
         written_flag=False
         """Attempts to perform a update local copy at appropriate sites"""
-        if self.is_even_index(var_idx):
+        if self.is_replicated(var_idx):
             written_flag = False
-            for site in self.site_manager.getAllSites():
-                if site.getSiteStatus() == SiteStatus.UP:            
+            for site in self.site_manager.get_sites_holding_variable(var_idx):
+                if site.getSiteStatus() != SiteStatus.FAILED:
                     if self.perform_write_at_up_site(site, var_idx, value, txn_obj):
                         txn_obj.add_site_accessed(site.get_id()) #add to list of sites accessed
+                        self.metrics.increment("writes.copies")
                         written_flag = True #Atleast 1 site got written to we return True, else will return False
             return written_flag            
         #                
         else:
-            site = self.site_manager.getSite(var_idx % 10)
-            if site.getSiteStatus() == SiteStatus.UP:            
+            site = self.site_manager.getSite(self.site_manager.placement.primary_site(var_idx) - 1)
+            if site.getSiteStatus() != SiteStatus.FAILED:
                 self.perform_write_at_up_site(site, var_idx, value, txn_obj)
                 txn_obj.add_site_accessed(site.get_id()) #add to list of sites accessed
+                self.metrics.increment("writes.copies")
                 written_flag = True
             return written_flag
 
@@ -497,34 +1175,22 @@ class TransactionManager:
             The site is fully operational and does not require additional validation like recovery history or snapshot checking
         """
         data_manager = site.getDataManager()
-        if data_manager.update_local_copy(var_idx, value, txn_obj):
+        with self.site_manager.get_site_lock(site.get_id()):
+            updated = data_manager.update_local_copy(var_idx, value, txn_obj)
+        if updated:
             log.info(f"Write succeeded for variable x{var_idx} with value {value} at site {site.get_id()}")
             return True
         else:
             log.warning(f"Write failed for variable x{var_idx} at site {site.get_id()}")
             return False
 
-    def perform_write_at_recovered_site(self, site, var_idx, value, txn_obj):
-        """
-            Retrieves the most recent snapshot of the variable and validates its commit time against the recovery history
-        """
-        recovery_history = self.site_manager.get_site_recover_history(site.get_id())
-        last_recovery_time = max(recovery_history, default=float('-inf'))
-
-        recent_snapshot = site.getDataManager().findRecentSnapshot(txn_obj.get_arrival_time(), var_idx)
-        if recent_snapshot and recent_snapshot.getCommitTime() > last_recovery_time:
-            if site.getDataManager().update_local_copy(var_idx, value, txn_obj):
-                log.info(f"Write succeeded for variable x{var_idx} at recovered site {site.get_id()}")
-                return True
-        log.warning(f"Write failed for variable x{var_idx} at recovered site {site.get_id()}")
-        return False
-
-    def abort_transaction(self, txn_name, current_time):
+    def abort_transaction(self, txn_name, current_time, reason=None):
         """
         Aborts a transaction and cleans up associated resources. This fx should:
         - abort if there are two rw edges in conflict causing cycle
         - cleans up tentative writes across all sites
         - Updates serialization graph to remove the transaction
+        - Records the AbortReason on the transaction and in the metrics
         """
         txn_obj = self.txn_map.get(txn_name)
         if not txn_obj:
@@ -536,65 +1202,49 @@ class TransactionManager:
 
         #Mark the transaction as aborted
         txn_obj.set_status(TransactionStatus.ABORTED)
+        txn_obj.set_abort_reason(reason)
+        self.metrics.increment("aborts")
+        self.metrics.increment(f"aborts.{reason.value if reason else 'UNSPECIFIED'}")
+        if self.result_sink is not None:
+            self.result_sink.emit("abort", current_time, txn=txn_name, reason=reason.value if reason else None)
 
         #Cleanup tentative writes at all sites
         for site in self.site_manager.getAllSites():
             # if site.getSiteStatus() == SiteStatus.UP:
-            if True:
+            if site.has_data_manager():  #A site never accessed holds no tentative writes
                 data_manager = site.getDataManager()
-                data_manager.abort_transaction(txn_obj)
+                with self.site_manager.get_site_lock(site.get_id()):
+                    data_manager.abort_transaction(txn_obj)
                 log.debug(f"Transaction {txn_name} aborted writes at site {site.get_id()}")
+        self.release_locks(txn_obj)
 
         self.retry_pending_transactions()
 
     def commit_transaction(self, txn_obj, current_time):
         """Commits the transaction by updating all relevant sites"""
-        print("inside commit")
         transaction_time = txn_obj.get_arrival_time()
         txn_id = txn_obj.get_id()
-        if txn_id in self.txn_access_hist:
-            print("inside access_hist of ", {txn_id})
-            inner_dict = self.txn_access_hist[txn_id]
-            print(inner_dict)
-            for var in inner_dict.keys():
-                var_name = f"x{var}"
-                for elem in inner_dict[var]:
-                    if elem=="W":
-                        print("inside W")
-                        if var%2==0:
-                            """If the transaction was writing to an even indexed variable"""
-                            for site in self.site_manager.getAllSites():
-                                if site.getSiteStatus() == SiteStatus.UP:
-                                    data_manager=site.getDataManager()
-                                    if data_manager.commit_variable(var_name, current_time, txn_obj):
-                                        log.info(f"Variable {var_name} committed at site {site.get_id()} by transaction {txn_obj.get_name()} at time {current_time}.")
-                                    else:
-                                        log.error(f"Failed to commit variable {var_name} at site {site.get_id()}.")
-                                        
-                                    for variable in data_manager.getPreCommittedVariablesList():
-                                        if variable.getVariableName()[1:]==str(var):
-                                            if variable.getCommitTime() > transaction_time:
-                                                variable.setCommitTime(current_time)
-                                                variable.update_snapshot(current_time,variable.getVariableValue())
-                                                # data_manager.updateVariableValue(variable.getVariableName(),variable.getVariableValue())
-                                                log.info(f"Variable {variable.getVariableName()} committed at site {site.get_id()} by transaction {txn_obj.get_name()}")
-                                
+        log.debug(f"Committing the writes of T{txn_id} to {txn_obj.get_write_set()}")
+        for var in txn_obj.get_write_set():
+            var_name = f"x{var}"
+            #Commit every available copy of the variable, one site for an unreplicated variable.
+            #A recovered copy becomes readable again with this commit.
+            for site in self.site_manager.get_sites_holding_variable(var):
+                if site.getSiteStatus() != SiteStatus.FAILED:
+                    data_manager=site.getDataManager()
+                    with self.site_manager.get_site_lock(site.get_id()):
+                        if data_manager.commit_variable(var_name, current_time, txn_obj):
+                            log.info(f"Variable {var_name} committed at site {site.get_id()} by transaction {txn_obj.get_name()} at time {current_time}.")
                         else:
-                            """If the transaction was writing to an odd indexed variable, it is present only at one site"""
-                            for site in self.site_manager.getAllSites():
-                                if site.get_id()-1%10==var:
-                                    if site.getSiteStatus() == SiteStatus.UP:
-                                        data_manager=site.getDataManager()
-                                        if data_manager.commit_variable(var_name, current_time, txn_obj):
-                                            log.info(f"Variable {var_name} committed at site {site.get_id()} by transaction {txn_obj.get_name()} at time {current_time}.")
-                                        else:
-                                            log.error(f"Failed to commit variable {var_name} at site {site.get_id()}.")
-                                        for variable in data_manager.getPreCommittedVariablesList():
-                                            if variable.getVariableName()[1:]==str(var):
-                                                if variable.getCommitTime() > transaction_time:
-                                                    variable.setCommitTime(current_time)
-                                                    variable.update_snapshot(current_time,variable.getVariableValue())
-                                                    log.info(f"Variable {variable.getVariableName()} committed at site {site.get_id()} by transaction {txn_obj.get_name()}")
+                            log.error(f"Failed to commit variable {var_name} at site {site.get_id()}.")
+                                        
+                        variable = data_manager.getVariable(var_name)
+                        if variable is not None:
+                            if variable.getCommitTime() > transaction_time:
+                                variable.setCommitTime(current_time)
+                                variable.update_snapshot(current_time,variable.getVariableValue())
+                                # data_manager.updateVariableValue(variable.getVariableName(),variable.getVariableValue())
+                                log.info(f"Variable {variable.getVariableName()} committed at site {site.get_id()} by transaction {txn_obj.get_name()}")
 
 
     
@@ -606,6 +1256,8 @@ class TransactionManager:
         self.site_manager.recoverSite(site_id)
         self.site_manager.addRecoveredSiteToList(site_id,current_time)
         log.info(f"Site {site_id} recovered successfully")
+        if self.result_sink is not None:
+            self.result_sink.emit("site", current_time, site=int(site_id), status=SiteStatus.RECOVERED.value)
 
         #retry transactions waiting on the recovered site
         self.retry_pending_transactions()
@@ -620,9 +1272,14 @@ class TransactionManager:
         log.info(f"Handling failure of site {site_id}.")
         self.site_manager.failSite(site_id)  # Mark the site as failed
         log.info(f"Site {site_id} marked as FAILED.")
+        if self.result_sink is not None:
+            self.result_sink.emit("site", self.current_time, site=int(site_id), status=SiteStatus.FAILED.value)
 
         #Get the list of all active transactions
-        for txn_name, txn_obj in list(self.txn_map.items()):
+        with self.state_lock:
+            active_txns = [(txn_name, txn_obj) for txn_name, txn_obj in self.txn_map.items()
+                           if txn_obj.get_transaction_status() in (TransactionStatus.RUNNING, TransactionStatus.WAITING)]
+        for txn_name, txn_obj in active_txns:
             txn_id = txn_obj.get_id()
             site_id_idx = int(site_id)
             #check to see if the txn accessed the site
@@ -630,25 +1287,29 @@ class TransactionManager:
                 if txn_obj.get_transaction_type() == TransactionType.WRITE:
                     #abort write transactions that accessed the failed site
                     log.info(f"Aborting write transaction {txn_name} due to site failure.")
-                    self.abort_transaction(txn_name, self.current_time)
+                    self.abort_transaction(txn_name, self.current_time, AbortReason.SITE_FAILURE)
+                elif txn_obj.is_read_only():
+                    #Snapshot values already read stay valid, a declared read-only transaction never needs the site again
+                    log.info(f"Read-only transaction {txn_name} is not affected by the failure.")
                 elif txn_obj.get_transaction_type() == TransactionType.READ:
                     #check if read transactions can continue to another available site
-                    variables_accessed = self.txn_access_hist[txn_id]
+                    variables_accessed = txn_obj.get_variables_accessed()
                     can_continue = False
                     for var_idx in variables_accessed:
-                        # Check if another site can serve the variable
-                        target_site_id = var_idx % 10 + 1
-                        if target_site_id != site_id:
-                            site = self.site_manager.getSite(target_site_id)
-                            if site.getSiteStatus() == SiteStatus.UP:
+                        # Check if another site holding the variable can serve it
+                        for site in self.site_manager.get_sites_holding_variable(var_idx):
+                            if site.get_id() != site_id_idx and site.getSiteStatus() == SiteStatus.UP:
                                 can_continue = True
                                 break
+                        if can_continue:
+                            break
 
                     if not can_continue:
                         log.info(f"Aborting read transaction {txn_name} as it cannot proceed.")
-                        self.abort_transaction(txn_name, self.current_time)
+                        self.abort_transaction(txn_name, self.current_time, AbortReason.SITE_FAILURE)
                     else:
                         log.info(f"Transaction {txn_name} can proceed using other available sites.")
+        self.resume_unblocked_transactions()
 
     def retry_pending_transactions(self):
         """
@@ -669,29 +1330,82 @@ class TransactionManager:
             log.debug(f"Processing transactions waiting on site {site_id} with status {site_status}.")
 
             #handle transactions waiting for even-indexed variables
-            for txn_obj, var_index in self.site_manager.waitingEvenTxn.get(site_id, []):
+            for txn_obj, var_index in self.site_manager.get_waitlist_even(site_id):
+                if txn_obj.get_transaction_status() != TransactionStatus.WAITING:
+                    self.site_manager.remove_waitlist_txn_even(txn_obj, var_index)
+                    continue
                 if site_status == SiteStatus.UP or (
                     site_status == SiteStatus.RECOVERED and
                     self.can_site_serve_read(site, txn_obj.get_name(), var_index)
                 ):
                     log.info(f"Reattempting transaction {txn_obj.get_id()} for even-indexed variable x{var_index}.")
-                    if self.handle_even_indexed_variable(txn_obj, f"x{var_index}", var_index, self.current_time):
-                        self.site_manager.waitingEvenTxn[site_id].remove((txn_obj, var_index))
+                    with self.variable_lock(var_index):
+                        value = self.handle_even_indexed_variable(txn_obj, f"x{var_index}", var_index, self.current_time)
+                    if value is not None:
+                        self.site_manager.remove_waitlist_txn_even(txn_obj, var_index)
+                        self.resume_waiting_transaction(txn_obj)
                         log.info(f"Transaction {txn_obj.get_id()} resumed successfully for x{var_index}.")
                     else:
                         log.warning(f"Transaction {txn_obj.get_id()} failed to resume for x{var_index}.")
 
             #handle transactions waiting for odd-indexed variables
-            for txn_obj, var_index in self.site_manager.waitingOddTxn.get(site_id, []):
+            for txn_obj, var_index in self.site_manager.get_waitlist_odd(site_id):
+                if txn_obj.get_transaction_status() != TransactionStatus.WAITING:
+                    self.site_manager.remove_waitlist_txn_odd(txn_obj, var_index)
+                    continue
                 if site_status == SiteStatus.UP or (
                     site_status == SiteStatus.RECOVERED and
                     self.can_site_serve_read(site, txn_obj.get_name(), var_index)
                 ):
                     log.info(f"Reattempting transaction {txn_obj.get_id()} for odd-indexed variable x{var_index}.")
-                    if self.handle_odd_indexed_variable(txn_obj, f"x{var_index}", var_index, self.current_time):
-                        self.site_manager.waitingOddTxn[site_id].remove((txn_obj, var_index))
+                    with self.variable_lock(var_index):
+                        value = self.handle_odd_indexed_variable(txn_obj, f"x{var_index}", var_index, self.current_time)
+                    if value is not None:
+                        self.site_manager.remove_waitlist_txn_odd(txn_obj, var_index)
+                        self.resume_waiting_transaction(txn_obj)
                         log.info(f"Transaction {txn_obj.get_id()} resumed successfully for x{var_index}.")
                     else:
                         log.warning(f"Transaction {txn_obj.get_id()} failed to resume for x{var_index}.")
 
         log.info("Finished retrying pending transactions.")
+
+    def resume_waiting_transaction(self, txn_obj):
+        """Moves a transaction whose pending read was served back to the running state"""
+        if txn_obj.get_transaction_status() == TransactionStatus.WAITING:
+            txn_obj.set_status(TransactionStatus.RUNNING)
+
+    def collect_gauges(self):
+        """
+        Returns point-in-time gauges of the engine: active transactions, serialization graph size,
+        waitlist depth, version chain lengths and admission state. Computed on demand so they cost nothing between calls.
+        """
+        with self.state_lock:
+            active = sum(1 for txn_obj in self.txn_map.values()
+                         if txn_obj.get_transaction_status() in (TransactionStatus.RUNNING, TransactionStatus.WAITING))
+            nodes = len(self.serialization_graph)
+            edges = sum(len(neighbors) for neighbors in self.serialization_graph.values())
+        #Copies that were never accessed hold only their initial version
+        chain_lengths = []
+        for site in self.site_manager.getAllSites():
+            if site.has_data_manager():
+                chain_lengths.extend(site.getDataManager().chain_lengths())
+        copies = self.site_manager.placement.snapshot()["copies"]
+        versions = sum(chain_lengths) + copies - len(chain_lengths)
+        return {
+            "transactions": len(self.txn_map),
+            "evicted_transactions": self.evicted_count,
+            "access_history_entries": sum(1 for txn_obj in self.txn_map.values() if txn_obj.read_set or txn_obj.write_set),
+            "active_transactions": active,
+            "serialization_graph_nodes": nodes,
+            "serialization_graph_edges": edges,
+            "waitlist_depth": self.site_manager.waitlist_depth(),
+            "versions": versions,
+            "version_chain_max": max(chain_lengths, default=1 if copies else 0),
+            "version_chain_mean": versions / copies if copies else 0,
+            "admission": self.admission.snapshot() if self.admission is not None else None,
+            "retries_pending": len(self.retry_schedule),
+            "read_routing": self.read_router.snapshot(),
+            "placement": self.site_manager.placement.snapshot(),
+            "concurrency_control": self.concurrency_control.snapshot(),
+            "retries_per_commit": self.metrics.get_counter("retries.before_commit") / max(1, self.metrics.get_counter("commits")),
+        }
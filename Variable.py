@@ -1,24 +1,32 @@
 import logging
+from bisect import bisect_right
+from operator import itemgetter
 """
        Authors: Krina KJS10093
        Chynna
 """
-log_filename = f"app.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_filename), logging.StreamHandler()]
-)
 log = logging.getLogger(__name__)
 
 class Variable:
-    def __init__(self,name,site_idx,val, commit_time=None):
+    def __init__(self,name,site_idx,val, commit_time=None, version_store=None):
         self.name=name
         self.site_id=site_idx
         self.value=val
         self.commit_time = commit_time
-        self.snapshots = []
-        self.snapshots.append((0, self.value))
+        #Versions live in the site's version store when one is given, otherwise in a list on the variable
+        self.version_store = version_store
+        self._snapshots = []
+        if version_store is None:
+            self._snapshots.append((0, self.value))
+        else:
+            version_store.append(self.getVariableID(), 0, self.value)
+
+    @property
+    def snapshots(self):
+        """The (commit time, value) version chain of the variable, oldest first"""
+        if self.version_store is None:
+            return self._snapshots
+        return self.version_store.get_snapshots(self.getVariableID())
 
     def getVariable(self):
         return self.value, self.name
@@ -45,34 +53,61 @@ class Variable:
         """
         Update the snapshot
         """
-        self.snapshots.append((timestamp, new_value))
+        if self.version_store is not None:
+            self.version_store.append(self.getVariableID(), timestamp, new_value)
+            return
+        self._snapshots.append((timestamp, new_value))
 
     def most_recent_snapshot_time(self):
         """
         Return the timestamp of the most recent snapshot of the variable
         """
-        if len(self.snapshots) > 0 :
-            return self.snapshots[-1][0]
+        if self.version_store is not None:
+            return self.version_store.most_recent_snapshot_time(self.getVariableID())
+        if len(self._snapshots) > 0 :
+            return self._snapshots[-1][0]
 
         return float('-inf')
     
+    def most_recent_snapshot_value(self):
+        """
+        Return the value of the most recent snapshot of the variable
+        """
+        if self.version_store is not None:
+            return self.version_store.most_recent_snapshot_value(self.getVariableID())
+        return self._snapshots[-1][1]
+
     def find_snapshot_before_time(self, timestamp):
         """
         Return the most recent snapshot of the variable before the specified timestamp
         """
-        for i in range(len(self.snapshots)-1, -1, -1):
-            entry = self.snapshots[i]
+        if self.version_store is not None:
+            return self.version_store.find_snapshot_before_time(self.getVariableID(), timestamp)
+        for i in range(len(self._snapshots)-1, -1, -1):
+            entry = self._snapshots[i]
             if entry[0] < timestamp:
                 return entry[1]
 
         return None
 
+    def find_snapshot_as_of(self, timestamp):
+        """
+        Return the (commit time, value) of the last snapshot committed at or before the specified timestamp.
+        Snapshots are appended in commit order, so the list is searched by bisection.
+        """
+        if self.version_store is not None:
+            return self.version_store.find_version(self.getVariableID(), timestamp, inclusive=True)
+        i = bisect_right(self._snapshots, timestamp, key=itemgetter(0))
+        return self._snapshots[i - 1] if i else None
+
     def find_time_of_snapshot_before(self, timestamp):
         """
         Return the time of most recent snapshot of the variable before the specified timestamp
         """
-        for i in range(len(self.snapshots)-1, -1, -1):
-            entry = self.snapshots[i]
+        if self.version_store is not None:
+            return self.version_store.find_time_of_snapshot_before(self.getVariableID(), timestamp)
+        for i in range(len(self._snapshots)-1, -1, -1):
+            entry = self._snapshots[i]
             if entry[0] < timestamp:
                 return entry[0]
 
@@ -0,0 +1,29 @@
+from AdmissionController import AdmissionController
+from Simulator import Simulator
+
+def test_transactions_over_the_cap_wait_for_a_slot():
+    simulator = Simulator(max_active=2)
+    for line in ["begin(T1)", "begin(T2)", "begin(T3)", "W(T3,x2,5)", "end(T3)"]:
+        simulator.process_instruction(line)
+    transaction_manager = simulator.transaction_manager
+    assert transaction_manager.is_queued("T3") and "T3" not in transaction_manager.txn_map
+    assert simulator.admission.snapshot()["active"] == 2 and simulator.admission.snapshot()["queued"] == 1
+    #T1 ending admits T3, whose deferred write and end are replayed
+    simulator.process_instruction("end(T1)")
+    assert transaction_manager.get_transaction_summary("T3")[1] == "COMMITTED"
+    assert simulator.process_instruction("R(T2,x2)") == 20
+    simulator.process_instruction("begin(T4)")
+    assert simulator.process_instruction("R(T4,x2)") == 5
+
+def test_adaptive_cap_halves_under_aborts_and_recovers():
+    admission = AdmissionController(8, adaptive=True, window=4)
+    for i in range(8):
+        assert admission.admit(f"T{i}")
+    for i in range(4):
+        admission.release(f"T{i}", committed=False)
+    assert admission.limit == 4
+    #The four still active fill the lowered cap, T8 waits for the first of them to end
+    assert not admission.admit("T8")
+    admitted = [admission.release(f"T{i}", committed=True) for i in range(4, 8)]
+    assert admitted == [["T8"], [], [], []] and admission.limit == 5
+    assert admission.snapshot()["active"] == 1 and admission.snapshot()["aborted"] == 4
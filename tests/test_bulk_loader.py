@@ -0,0 +1,23 @@
+import pytest
+from BulkLoader import BulkLoader
+from Simulator import Simulator
+
+@pytest.mark.parametrize("file_format", ["csv", "binary"])
+def test_written_file_loads_back(tmp_path, file_format):
+    path = str(tmp_path / f"state.{file_format}")
+    loader = BulkLoader(chunk_rows=3)
+    var_ids, values = list(range(1, 26)), [7 * var_idx for var_idx in range(1, 26)]
+    getattr(loader, f"write_{file_format}")(path, var_ids, values)
+    state = loader.load(path)
+    assert state.num_variables == 25
+    assert [state.value(var_idx) for var_idx in var_ids] == values
+    #The file adds variables x21 to x25 to the database
+    simulator = Simulator(initial_state_file=path)
+    results = [simulator.process_instruction(line) for line in ["begin(T1)", "R(T1,x25)", "R(T1,x4)"]]
+    assert simulator.num_variables == 25 and results[1:] == [175, 28]
+
+def test_binary_load_rejects_a_bad_magic(tmp_path):
+    path = tmp_path / "state.bin"
+    path.write_bytes(b"NOTSSIDB" + bytes(16))
+    with pytest.raises(ValueError, match="is not a bulk load file"):
+        BulkLoader().load_binary(str(path))
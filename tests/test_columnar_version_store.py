@@ -0,0 +1,29 @@
+import pytest
+from Simulator import Simulator
+
+pytest.importorskip("numpy")
+
+#T1 commits at time 4, T2 at time 9 while site 2 is down
+LINES = ["begin(T1)", "W(T1,x2,5)", "W(T1,x3,6)", "end(T1)", "fail(2)", "begin(T2)", "W(T2,x2,7)", "R(T2,x3)",
+         "end(T2)", "recover(2)", "begin(T3)", "R(T3,x2)", "R(T3,x3)", "end(T3)"]
+
+def run(storage_backend, lines):
+    """Runs the lines on a backend and returns their results and the simulator"""
+    simulator = Simulator(storage_backend=storage_backend)
+    return [simulator.process_instruction(line) for line in lines], simulator
+
+def test_columnar_store_matches_objects_store():
+    columnar, columnar_simulator = run("columnar", LINES)
+    objects, objects_simulator = run("objects", LINES)
+    assert columnar == objects
+    assert columnar[7] == 6 and columnar[11:13] == [7, 6]
+    for columnar_site, objects_site in zip(columnar_simulator.site_manager.sites, objects_simulator.site_manager.sites):
+        assert columnar_site.getDataManager().latest_values() == objects_site.getDataManager().latest_values()
+
+def test_as_of_matches_across_stores():
+    lines = LINES + ["asof(3)", "asof(4)", "asof(9)", "asof(100)"]
+    columnar, _ = run("columnar", lines)
+    assert columnar[-4:] == run("objects", lines)[0][-4:]
+    #x2 as of before T1, at T1's commit, at T2's commit, which site 2 missed, and now
+    assert [result["values"]["x2"] for result in columnar[-4:]] == [20, 5, 7, 7]
+    assert columnar[-4]["values"]["x3"] == 30 and columnar[-3]["values"]["x3"] == 6
@@ -0,0 +1,31 @@
+import pytest
+from ConcurrencyControl import ConcurrencyControl
+from Simulator import Simulator
+
+def run(concurrency, lines):
+    """Runs the lines under a protocol and returns the simulator"""
+    simulator = Simulator(concurrency=concurrency, metrics_enabled=True)
+    for line in lines:
+        simulator.process_instruction(line)
+    return simulator
+
+def test_two_phase_locking_aborts_the_youngest_deadlocked_transaction():
+    simulator = run("2pl", ["begin(T1)", "begin(T2)", "W(T1,x2,1)", "W(T2,x4,2)", "W(T1,x4,3)", "W(T2,x2,4)",
+                            "end(T1)", "begin(T3)"])
+    transaction_manager = simulator.transaction_manager
+    assert transaction_manager.get_transaction_summary("T2")[1::4] == ("ABORTED", "DEADLOCK")
+    #T1's blocked write ran once T2 released x4
+    assert transaction_manager.get_transaction_summary("T1")[1] == "COMMITTED"
+    assert [simulator.process_instruction(line) for line in ["R(T3,x2)", "R(T3,x4)"]] == [1, 3]
+    assert simulator.metrics.get_counter("locks.deadlocks") == 1
+
+def test_optimistic_validation_aborts_a_stale_reader():
+    simulator = run("occ", ["begin(T1)", "begin(T2)", "R(T1,x2)", "W(T2,x2,5)", "end(T2)", "W(T1,x4,6)", "end(T1)"])
+    transaction_manager = simulator.transaction_manager
+    assert transaction_manager.get_transaction_summary("T2")[1] == "COMMITTED"
+    assert transaction_manager.get_transaction_summary("T1")[1::4] == ("ABORTED", "VALIDATION")
+    assert simulator.metrics.get_counter("aborts.VALIDATION") == 1
+
+def test_unknown_protocol_is_rejected():
+    with pytest.raises(ValueError):
+        ConcurrencyControl.create("mvto")
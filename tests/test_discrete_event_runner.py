@@ -0,0 +1,28 @@
+from LatencyModel import LatencyModel
+from Simulator import Simulator
+
+def run_timed(tmp_path, lines, latency_model, clients):
+    """Runs instruction lines in virtual time and returns the summary"""
+    trace_file = tmp_path / "trace.txt"
+    trace_file.write_text("\n".join(lines) + "\n")
+    return Simulator().run_timed(str(trace_file), latency_model, clients)
+
+def test_single_write_pays_every_link_and_service(tmp_path):
+    summary = run_timed(tmp_path, ["begin(T1)", "W(T1,x1,5)", "end(T1)"],
+                        LatencyModel(client_link=0.5, link=1, service=0.2), clients=1)
+    #Begin only crosses the client link, the write and the commit also reach site 2 and come back
+    assert summary["virtual_ms"] == 7.4 and summary["commit_latency_ms"]["max"] == 7.4
+    assert summary["events"] == 10 and summary["site_utilization"] == {2: round(0.4 / 7.4, 4)}
+
+def test_summary_is_deterministic_under_a_seed(tmp_path):
+    lines = []
+    for i in range(1, 25):
+        lines += [f"begin(T{i})", f"R(T{i},x{i % 6 + 1})", f"W(T{i},x{(i * 5) % 6 + 1},{i})", f"end(T{i})"]
+    lines.insert(40, "fail(3)")
+    lines.insert(70, "recover(3)")
+    summaries = [run_timed(tmp_path, lines, LatencyModel(client_link="exp:0.3", link="lognormal:2:0.5", service="exp:0.4",
+                                                          seed=seed), clients=4)
+                 for seed in (7, 7, 8)]
+    assert summaries[0] == summaries[1] and summaries[0] != summaries[2]
+    assert summaries[0]["transactions"] == 24 and summaries[0]["unfinished"] == 0
+    assert summaries[0]["committed"] + summaries[0]["aborted"] == 24 and summaries[0]["committed"] > 0
@@ -0,0 +1,99 @@
+import itertools
+import random
+import threading
+import pytest
+from Session import Session
+from SiteManager import SiteManager
+from TransactionManager import TransactionManager
+
+SESSIONS = 8
+TRANSACTIONS_PER_SESSION = 120
+NUM_VARIABLES = 8  #Of the 20 variables, to keep the sessions contending
+
+def run_sessions(transaction_manager):
+    """
+    Runs concurrent sessions, each transaction reading two variables and, three times out of four, writing one
+    of them or a third with a value no other write uses. Returns {name: (reads, writes)} of the transactions that committed.
+    """
+    names, values = itertools.count(1), itertools.count(1000)
+    counter_lock = threading.Lock()
+    committed = {}
+
+    def worker(seed):
+        generator = random.Random(seed)
+        session = Session(transaction_manager)
+        for _ in range(TRANSACTIONS_PER_SESSION):
+            with counter_lock:
+                txn_name, value = f"T{next(names)}", next(values)
+            read_vars = generator.sample(range(1, NUM_VARIABLES + 1), 2)
+            write_var = generator.choice(read_vars + [generator.randint(1, NUM_VARIABLES)]) if generator.random() < 0.75 else None
+            session.begin(txn_name)
+            reads = {var_idx: session.read(f"x{var_idx}") for var_idx in read_vars}
+            if write_var is not None:
+                session.write(f"x{write_var}", value)
+            if session.end():
+                committed[txn_name] = (reads, {write_var: value} if write_var is not None else {})
+
+    threads = [threading.Thread(target=worker, args=(seed,), daemon=True) for seed in range(SESSIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+    assert not any(thread.is_alive() for thread in threads), "sessions deadlocked"
+    return committed
+
+def serialization_cycle(transaction_manager, committed):
+    """Builds the multiversion serialization graph of the committed transactions and returns a cycle, or None"""
+    commit_time = {name: transaction_manager.get_transaction_summary(name)[3] for name in committed}
+    version_order = {}
+    for name in sorted(committed, key=commit_time.get):
+        for var_idx in committed[name][1]:
+            version_order.setdefault(var_idx, []).append(name)
+    edges = {name: set() for name in committed}
+    for chain in version_order.values():
+        for earlier, later in zip(chain, chain[1:]):
+            edges[earlier].add(later)
+    for name, (reads, _) in committed.items():
+        for var_idx, value in reads.items():
+            chain = version_order.get(var_idx, [])
+            position = -1
+            if value != 10 * var_idx:
+                writers = [writer for writer in chain if committed[writer][1][var_idx] == value]
+                assert writers, f"{name} read x{var_idx} = {value}, which no committed transaction wrote"
+                position = chain.index(writers[0])
+                edges[writers[0]].add(name)
+            edges[name].update(writer for writer in chain[position + 1:] if writer != name)
+
+    state = {}
+    for start in edges:
+        if start in state:
+            continue
+        path, stack = [start], [iter(edges[start])]
+        state[start] = "open"
+        while stack:
+            successor = next(stack[-1], None)
+            if successor is None:
+                state[path.pop()] = "done"
+                stack.pop()
+            elif state.get(successor) == "open":
+                return path[path.index(successor):]
+            elif successor not in state:
+                state[successor] = "open"
+                path.append(successor)
+                stack.append(iter(edges[successor]))
+    return None
+
+@pytest.mark.parametrize("validation_mode", ["cycle", "dangerous_structure"])
+def test_concurrent_sessions_stay_serializable(validation_mode):
+    transaction_manager = TransactionManager(20, 10, SiteManager(10), validation_mode=validation_mode,
+                                             evict_finished=True)
+    committed = run_sessions(transaction_manager)
+    assert committed
+    assert serialization_cycle(transaction_manager, committed) is None
+    #Every copy holds the value of the last committed writer
+    for var_idx in range(1, NUM_VARIABLES + 1):
+        writers = [name for name in committed if var_idx in committed[name][1]]
+        last = max(writers, key=lambda name: transaction_manager.get_transaction_summary(name)[3], default=None)
+        expected = committed[last][1][var_idx] if last else 10 * var_idx
+        for site in transaction_manager.site_manager.get_sites_holding_variable(var_idx):
+            assert site.getDataManager().getVariable(f"x{var_idx}").most_recent_snapshot_value() == expected
@@ -0,0 +1,18 @@
+from Simulator import Simulator
+
+def test_stats_counts_commits_aborts_and_instructions():
+    simulator = Simulator(metrics_enabled=True)
+    for line in ["begin(T1)", "begin(T2)", "R(T1,x2)", "R(T2,x4)", "W(T1,x4,1)", "W(T2,x2,2)", "end(T1)", "end(T2)"]:
+        simulator.process_instruction(line)
+    stats = simulator.process_instruction("stats()")
+    counters = stats["counters"]
+    assert counters["commits"] == 1 and counters["aborts"] == 1 and counters["aborts.CYCLE"] == 1
+    assert counters["instructions.READ"] == 2 and counters["writes.copies"] == 20
+    assert stats["histograms"]["instruction_seconds.END"]["count"] == 2
+    assert stats["gauges"]["transactions"] == 2 and stats["gauges"]["active_transactions"] == 0
+
+def test_disabled_metrics_count_nothing():
+    simulator = Simulator()
+    for line in ["begin(T1)", "W(T1,x2,5)", "end(T1)"]:
+        simulator.process_instruction(line)
+    assert simulator.stats()["counters"] == {} and simulator.stats()["histograms"] == {}
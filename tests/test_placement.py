@@ -0,0 +1,29 @@
+import pytest
+from Placement import Placement
+from Simulator import Simulator
+
+def test_kway_places_every_variable_on_distinct_sites():
+    placement = Placement(20, 10, "kway", replication_factor=3)
+    assert all(len(set(placement.sites_for(var_idx))) == 3 for var_idx in range(1, 21))
+    assert placement.site_map == Placement(20, 10, "kway", replication_factor=3).site_map
+    simulator = Simulator(placement_policy="kway", replication_factor=3)
+    for line in ["begin(T1)", "W(T1,x1,5)", "end(T1)"]:
+        simulator.process_instruction(line)
+    written = [site.get_id() for site in simulator.site_manager.sites
+               if site.has_data_manager() and dict(site.getDataManager().latest_values()).get("x1") == 5]
+    assert tuple(written) == placement.sites_for(1)
+
+def test_explicit_placement_serves_reads_from_the_listed_sites(tmp_path):
+    placement_file = tmp_path / "placement.txt"
+    placement_file.write_text("x1: 2 5\n" + "".join(f"x{i}: 1\n" for i in range(2, 21)))
+    simulator = Simulator(placement_policy="explicit", placement_file=str(placement_file))
+    assert simulator.placement.is_replicated(1) and not simulator.placement.is_replicated(2)
+    for line in ["begin(T1)", "R(T1,x1)", "fail(2)", "begin(T2)", "R(T2,x1)"]:
+        simulator.process_instruction(line)
+    assert dict(simulator.transaction_manager.read_router.reads_served) == {2: 1, 5: 1}
+
+def test_explicit_placement_must_list_every_variable(tmp_path):
+    placement_file = tmp_path / "placement.txt"
+    placement_file.write_text("x1: 1\n")
+    with pytest.raises(ValueError, match="no sites listed for x2"):
+        Placement(2, 2, "explicit", placement_file=str(placement_file))
@@ -0,0 +1,16 @@
+import os
+from Profiler import Profiler
+from Simulator import Simulator
+
+def test_profile_reports_name_the_engine_functions(tmp_path):
+    trace_file = tmp_path / "trace.txt"
+    trace_file.write_text("begin(T1)\nW(T1,x2,5)\nend(T1)\nbegin(T2)\nR(T2,x2)\nend(T2)\n")
+    profiler = Profiler()
+    profiler.run(Simulator().run, str(trace_file))
+    paths = profiler.write_reports(str(trace_file))
+    assert all(os.path.getsize(path) for path in paths)
+    hot_list = profiler.hot_list()
+    assert "TransactionManager.py:" in hot_list and "Profiler.py:" not in hot_list
+    assert any("Simulator.run;" in line and "TransactionManager.end_transaction" in line
+               for line in profiler.collapsed_stacks().splitlines())
+    assert profiler.top_allocations().startswith("Peak traced:")
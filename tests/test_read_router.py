@@ -0,0 +1,23 @@
+import pytest
+from ReadRouter import ReadRouter
+from Simulator import Simulator
+
+def reads_per_site(read_policy, lines):
+    """Runs the lines and returns the reads served per site"""
+    simulator = Simulator(read_policy=read_policy)
+    for line in lines:
+        simulator.process_instruction(line)
+    return dict(simulator.transaction_manager.read_router.reads_served)
+
+def test_round_robin_moves_to_the_next_replica_on_every_read():
+    assert reads_per_site("round_robin", ["begin(T1)", "R(T1,x2)", "R(T1,x4)", "R(T1,x6)"]) == {1: 1, 2: 1, 3: 1}
+    assert reads_per_site("first", ["begin(T1)", "R(T1,x2)", "R(T1,x4)", "R(T1,x6)"]) == {1: 3}
+
+def test_affinity_keeps_a_transaction_on_one_replica_while_it_is_up():
+    #T3 and T13 both start at the fourth of the ten replicas, T13 moves on as site 4 failed
+    lines = ["begin(T3)", "R(T3,x2)", "R(T3,x4)", "fail(4)", "begin(T13)", "R(T13,x6)"]
+    assert reads_per_site("affinity", lines) == {4: 2, 5: 1}
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ReadRouter("nearest")
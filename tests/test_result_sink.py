@@ -0,0 +1,34 @@
+import json
+from ResultSink import ResultSink
+from Simulator import Simulator
+
+def test_every_outcome_becomes_one_record(tmp_path):
+    results_file = tmp_path / "results.jsonl"
+    simulator = Simulator(results_file=str(results_file))
+    for line in ["begin(T1)", "begin(T2)", "R(T1,x2)", "R(T2,x4)", "W(T1,x4,1)", "W(T2,x2,2)", "R(T1,x4)",
+                 "end(T1)", "end(T2)", "fail(3)", "recover(3)", "asof(1)", "bogus(1)", "dump()"]:
+        simulator.process_instruction(line)
+    simulator.close()
+    records = [json.loads(line) for line in results_file.read_text().splitlines()]
+    assert [record["type"] for record in records] == ["read", "read", "read", "abort", "commit", "site", "site",
+                                                      "asof", "error", "dump"]
+    assert records[0] == {"type": "read", "time": 3, "txn": "T1", "variable": "x2", "value": 20, "site": 1}
+    #T1 reads its own write from its cache
+    assert records[2]["value"] == 1 and records[2]["site"] is None
+    assert records[3] == {"type": "abort", "time": 8, "txn": "T2", "reason": "CYCLE"}
+    assert records[4] == {"type": "commit", "time": 8, "txn": "T1", "read_only": False}
+    assert [record["status"] for record in records[5:7]] == ["FAILED", "RECOVERED"]
+    assert records[7]["result"]["values"]["x4"] == 40 and records[8]["instruction"] == "bogus(1)"
+    assert records[9]["sites"][0]["values"]["x4"] == 1
+
+def test_records_are_written_a_buffer_at_a_time(tmp_path):
+    results_file = tmp_path / "results.jsonl"
+    sink = ResultSink(str(results_file), buffer_records=2)
+    sink.emit("site", 1, site=1, status="FAILED")
+    assert sink.pending and results_file.read_text() == ""
+    sink.emit("site", 2, site=1, status="RECOVERED")
+    sink.emit("commit", 3, txn="T1", read_only=True)
+    sink.file.flush()
+    assert len(results_file.read_text().splitlines()) == 2
+    sink.close()
+    assert len(results_file.read_text().splitlines()) == 3 and sink.records == 3
@@ -0,0 +1,30 @@
+import pytest
+from RetryPolicy import RetryPolicy
+from Simulator import Simulator
+
+WRITE_SKEW = ["begin(T1)", "begin(T2)", "R(T1,x2)", "R(T2,x4)", "W(T1,x4,1)", "W(T2,x2,2)", "end(T1)", "end(T2)"]
+
+def test_write_skew_loser_commits_on_retry_after_backoff():
+    simulator = Simulator(metrics_enabled=True, retry_policy=RetryPolicy(max_retries=2, base_backoff=3))
+    for line in WRITE_SKEW:
+        simulator.process_instruction(line)
+    transaction_manager = simulator.transaction_manager
+    #T2 aborted at time 8, its retry is due 3 ticks later
+    assert transaction_manager.get_transaction_summary("T2")[1] == "ABORTED"
+    assert transaction_manager.retry_schedule[0][0] == 11
+    simulator.process_instruction("begin(T3)")
+    simulator.process_instruction("begin(T4)")
+    assert transaction_manager.get_transaction_summary("T2")[1] == "ABORTED"
+    simulator.process_instruction("begin(T5)")
+    assert transaction_manager.get_transaction_summary("T2")[1] == "COMMITTED"
+    assert simulator.metrics.get_counter("retries") == 1 and simulator.metrics.get_counter("retries.before_commit") == 1
+    #The retry ran after begin(T5), so only T6 sees its write
+    simulator.process_instruction("begin(T6)")
+    assert simulator.process_instruction("R(T5,x2)") == 20 and simulator.process_instruction("R(T6,x2)") == 2
+
+def test_backoff_doubles_up_to_its_bound():
+    policy = RetryPolicy(max_retries=5, base_backoff=2, max_backoff=10)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [2, 4, 8, 10, 10]
+    assert policy.should_retry(5) and not policy.should_retry(6)
+    with pytest.raises(ValueError):
+        RetryPolicy(base_backoff=4, max_backoff=2)
@@ -0,0 +1,24 @@
+import os
+from SegmentVersionStore import SegmentVersionStore
+from Simulator import Simulator
+
+def test_lookups_span_memory_and_spilled_segments(tmp_path):
+    store = SegmentVersionStore(str(tmp_path), memory_versions=4)
+    for commit_time in range(1, 11):
+        store.append(1, commit_time, 100 + commit_time)
+        store.append(2, commit_time, 200 + commit_time)
+    assert store.segments and store.spilled
+    assert store.find_snapshot_before_time(1, 5) == 104
+    assert store.find_time_of_snapshot_before(2, 11) == 10
+    assert store.get_snapshots(2) == [(commit_time, 200 + commit_time) for commit_time in range(1, 11)]
+    store.close()
+    assert not store.segments and os.listdir(tmp_path)
+
+def test_close_removes_the_temporary_segment_directories():
+    simulator = Simulator(storage_backend="segments")
+    for line in ["begin(T1)", "W(T1,x2,5)", "end(T1)"]:
+        simulator.process_instruction(line)
+    directories = [site.getDataManager().temporary_dir.name for site in simulator.site_manager.sites]
+    assert all(os.path.isdir(directory) for directory in directories)
+    simulator.close()
+    assert not any(os.path.exists(directory) for directory in directories)
@@ -0,0 +1,21 @@
+import socket
+import threading
+from Simulator import Simulator
+from SimulatorServer import SimulatorServer
+
+def test_failing_line_answers_error_and_keeps_serving():
+    server = SimulatorServer(Simulator(), "tcp:127.0.0.1:0")
+    thread = threading.Thread(target=server.server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.create_connection(server.get_address(), timeout=10) as client:
+            client.sendall(b"begin(Tx)\nbegin(T1)\nR(T1,x2)\nend(T1)\n")
+            received = b""
+            while received.count(b"\n") < 4:
+                received += client.recv(65536)
+        responses = received.decode().splitlines()
+        assert responses[0].startswith("begin(Tx) -> ERROR")
+        assert responses[1:] == ["begin(T1) -> OK", "R(T1,x2) -> 20", "end(T1) -> COMMITTED"]
+    finally:
+        server.server.shutdown()
+        server.shutdown()
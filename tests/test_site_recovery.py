@@ -0,0 +1,16 @@
+from Simulator import Simulator
+
+def test_recovered_copy_is_readable_again_after_a_commit():
+    simulator = Simulator()
+    lines = ["fail(2)", "recover(2)", "fail(1)", "begin(T1)", "R(T1,x2)", "R(T1,x1)", "begin(T2)", "W(T2,x2,5)", "end(T2)"]
+    results = [simulator.process_instruction(line) for line in lines]
+    #Nobody else could commit x1, but site 2's copies of replicated variables may have missed commits
+    assert results[4:6] == [20, 10]
+    assert dict(simulator.transaction_manager.read_router.reads_served) == {2: 1, 3: 1}
+    data_manager = simulator.site_manager.getSite(1).getDataManager()
+    assert data_manager.is_readable(1, 5) and not data_manager.is_readable(4, 5)
+    #T2 committed x2 at time 9, transactions starting later read site 2's copy
+    assert not data_manager.is_readable(2, 9) and data_manager.is_readable(2, 10)
+    simulator.process_instruction("begin(T3)")
+    assert simulator.process_instruction("R(T3,x2)") == 5
+    assert simulator.transaction_manager.read_router.reads_served[2] == 2
@@ -0,0 +1,43 @@
+import pytest
+from Simulator import Simulator
+
+def run_trace(lines, **options):
+    """Runs instruction lines and returns the final status of every transaction that began"""
+    simulator = Simulator(**options)
+    for line in lines:
+        simulator.process_instruction(line)
+    transaction_manager = simulator.transaction_manager
+    names = [line[line.index("(") + 1:-1] for line in lines if line.startswith("begin")]
+    return {name: transaction_manager.get_transaction_summary(name)[1] for name in names}
+
+#T1 -rw-> T2 (T1 read x4 before T2's commit), T3 -rw-> T1 (T3 read x5 before T1's commit) and T2 -wr-> T3:
+#T3 only reads, but committing all three would let it see x4=1 with x5=50
+READ_ONLY_ANOMALY = ["begin(T2)", "W(T2,x4,1)", "begin(T1)", "end(T2)", "R(T1,x4)", "begin(T3)", "W(T1,x5,2)",
+                     "end(T1)", "R(T3,x4)", "R(T3,x5)", "end(T3)"]
+
+def test_dangerous_structure_aborts_read_only_anomaly():
+    statuses = run_trace(READ_ONLY_ANOMALY, validation_mode="dangerous_structure")
+    assert statuses["T1"] == "COMMITTED" and statuses["T2"] == "COMMITTED"
+    assert statuses["T3"] == "ABORTED"
+
+#Declared read-only transactions are not tracked, so they commit the anomaly the tracked reader above aborts
+def test_declared_read_only_pins_known_anomaly():
+    lines = READ_ONLY_ANOMALY[:5] + ["beginRO(T3)"] + READ_ONLY_ANOMALY[6:]
+    statuses = run_trace(lines, validation_mode="dangerous_structure")
+    assert statuses["T3"] == "COMMITTED"
+
+def test_cycle_aborts_read_only_anomaly():
+    statuses = run_trace(READ_ONLY_ANOMALY, validation_mode="cycle")
+    assert statuses == {"T2": "COMMITTED", "T1": "COMMITTED", "T3": "ABORTED"}
+
+def test_cycle_aborts_latest_of_write_skew():
+    lines = ["begin(T1)", "begin(T2)", "R(T1,x2)", "R(T2,x4)", "W(T1,x4,1)", "W(T2,x2,2)", "end(T1)", "end(T2)"]
+    assert run_trace(lines, validation_mode="cycle") == {"T1": "COMMITTED", "T2": "ABORTED"}
+
+@pytest.mark.parametrize("validation_mode", ["cycle", "dangerous_structure"])
+@pytest.mark.parametrize("range_read", ["SCAN(T1,x2,x6)", "MR(T1,x2,x3,x4,x5,x6)"])
+def test_range_read_aborts_concurrent_writer_inside_it(range_read, validation_mode):
+    #T2 -rw-> T1 through x8, then T1 -rw-> T2 through x4 inside the range, while T3 writes x7 just outside it
+    lines = ["begin(T1)", "begin(T2)", "begin(T3)", range_read, "R(T2,x8)", "R(T3,x8)", "W(T1,x8,3)", "end(T1)",
+             "W(T2,x4,1)", "W(T3,x7,2)", "end(T2)", "end(T3)"]
+    assert run_trace(lines, validation_mode=validation_mode) == {"T1": "COMMITTED", "T2": "ABORTED", "T3": "COMMITTED"}
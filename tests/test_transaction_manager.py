@@ -0,0 +1,79 @@
+import pytest
+from Benchmark import Benchmark
+from Simulator import Simulator
+from SiteManager import SiteManager
+from Transaction import TransactionStatus
+from TransactionManager import TransactionManager
+
+def test_unknown_variables_are_rejected_without_ending_the_run(caplog):
+    simulator = Simulator()
+    for line in ["begin(T1)", "R(T1,x99)", "W(T1,x0,5)", "W(T1,x2,7)", "end(T1)", "begin(T2)"]:
+        simulator.process_instruction(line)
+    transaction_manager = simulator.transaction_manager
+    assert "Variable x99 does not exist" in caplog.text and "Variable x0 does not exist" in caplog.text
+    assert transaction_manager.get_transaction_summary("T1")[1] == "COMMITTED"
+    assert transaction_manager.read_request("T2", "x2", transaction_manager.tick()) == 7
+
+@pytest.mark.parametrize("validation_mode", ["cycle", "dangerous_structure"])
+def test_eviction_keeps_retained_state_bounded_by_the_active_transactions(validation_mode, tmp_path):
+    concurrent = 8
+    transaction_manager = TransactionManager(20, 10, SiteManager(10), validation_mode=validation_mode,
+                                             evict_finished=True, max_summaries=100)
+    most_finished = most_nodes = 0
+    for operation in Benchmark(str(tmp_path)).interleaved_workload(2000, concurrent, 4, 20, 0.4, seed=1):
+        operation.run(transaction_manager, None if operation.timestamped_on_commit else transaction_manager.tick())
+        active = sum(txn_obj.get_transaction_status() in (TransactionStatus.RUNNING, TransactionStatus.WAITING)
+                     for txn_obj in transaction_manager.txn_map.values())
+        assert active <= concurrent
+        most_finished = max(most_finished, len(transaction_manager.txn_map) - active)
+        most_nodes = max(most_nodes, len(transaction_manager.serialization_graph))
+    #Only the transactions that overlapped a still active one are kept, however many ran
+    assert most_finished <= 4 * concurrent and most_nodes <= 5 * concurrent
+    assert not transaction_manager.txn_map and not transaction_manager.serialization_graph
+    assert not any(transaction_manager.var_readers.values()) and not any(transaction_manager.var_writers.values())
+    assert len(transaction_manager.finished_summaries) == 100 and transaction_manager.evicted_count == 2000
+
+@pytest.mark.parametrize("concurrency, parallel_runs", [("ssi", 1), ("2pl", 0), ("occ", 0)])
+def test_only_snapshot_reads_run_in_parallel(concurrency, parallel_runs):
+    from Operation import Begin, Read, Write, End
+    simulator = Simulator(metrics_enabled=True, read_threads=4, concurrency=concurrency)
+    results = simulator.execute_batch([Begin("T1"), Begin("T2"), Begin("T3"), Write("T3", 6, 5),
+                                       Read("T1", 2), Read("T2", 4), End("T3"), End("T1"), End("T2")])
+    simulator.close()
+    assert simulator.metrics.get_counter("parallel_read_runs") == parallel_runs
+    assert [result.value for result in results[4:6]] == [20, 40]
+    assert all(result.ok() for result in results)
+    assert results[4].as_dict() == {"operation": repr(results[4].operation), "status": "OK", "value": 20,
+                                    "abort_reason": None, "time": results[4].time}
+
+def test_admission_queue_drains_without_nesting():
+    simulator = Simulator(max_active=1)
+    queued = 400
+    lines = [f"begin(T{i})" for i in range(1, queued + 1)]
+    for i in range(queued, 0, -1):
+        lines += [f"W(T{i},x{i % 20 + 1},{i})", f"end(T{i})"]
+    for line in lines:
+        simulator.process_instruction(line)
+    transaction_manager = simulator.transaction_manager
+    assert all(transaction_manager.get_transaction_summary(f"T{i}")[1] == "COMMITTED" for i in range(1, queued + 1))
+    assert not transaction_manager.deferred_ops and not transaction_manager.admission_queue
+
+def test_own_writes_and_repeat_reads_come_from_the_cache():
+    simulator = Simulator()
+    for line in ["begin(T1)", "W(T1,x2,5)", "R(T1,x4)", "begin(T2)", "W(T2,x4,7)", "end(T2)"]:
+        simulator.process_instruction(line)
+    reads_served = dict(simulator.transaction_manager.read_router.reads_served)
+    assert simulator.process_instruction("R(T1,x2)") == 5
+    assert simulator.process_instruction("R(T1,x4)") == 40
+    #Neither read reached a site
+    assert simulator.transaction_manager.read_router.reads_served == reads_served
+
+def test_sites_and_variables_materialize_only_when_touched():
+    simulator = Simulator(num_variables=100000, num_sites=50)
+    assert not any(site.has_data_manager() for site in simulator.site_manager.sites)
+    results = [simulator.process_instruction(line) for line in ["begin(T1)", "R(T1,x3)", "R(T1,x4)", "W(T1,x5,1)", "end(T1)"]]
+    assert results[1:3] == [30, 40]
+    #x3 and x5 live on sites 4 and 6 only, x4 is read from the first of its replicas
+    materialized = {site.get_id(): sorted(site.getDataManager().variables) for site in simulator.site_manager.sites
+                    if site.has_data_manager()}
+    assert materialized == {1: [4], 4: [3], 6: [5]}